@@ -11,16 +11,27 @@ from os import system, name
 from rich.console import Console
 
 from modules.format import print_center
-from modules.main_menu import main_menu, title_screen
+from modules.main_menu import hour_activity, main_menu, title_screen
 from modules.serverstate import ServerState
-from modules.rconclient import schedule_server_restart
+from modules.rconclient import (
+    schedule_server_restart,
+    reconcile_players,
+    read_rcon_config,
+    sessions,
+)
 from modules.steamcmd import (
     check_steamcmd,
-    # update_servers,
-    validate_workshop_mods,
+    update_servers,
+    plan_workshop_mods,
+    download_workshop_mods,
     import_mods,
     check_and_update_mods,
 )
+from modules.downloads import DownloadScheduler
+from modules.modcatalog import get_catalog
+from modules.events import new_event_ring, open_journal
+from modules.admstats import export_stats
+from modules.logindex import open_index
 from modules.servers import check_servers, validate_server_files, start_server
 # from modules.update_servers import update_servers
 
@@ -71,6 +82,24 @@ async def main():
     servers_path = os.path.join(app_path, "servers")
     # steamcmd_path = os.path.join(app_path, "steamcmd")
 
+    # number of parallel steamcmd workers for mod downloads
+    download_workers = dman_config["dman"]["info"].get("download_workers", 3)
+
+    # how new instances share files with the server template
+    clone_mode = dman_config["dman"]["info"].get("clone_mode", "auto")
+
+    # how workshop mods are placed into instances
+    mod_deploy_mode = dman_config["dman"]["info"].get("mod_deploy_mode", "auto")
+
+    # whether server output is piped through dman or written straight to disk
+    output_mode = dman_config["dman"]["info"].get("output_mode", "pipe")
+
+    # where the servers' BattlEye RCon listens
+    rcon_host = dman_config["dman"]["info"].get("rcon_host", "127.0.0.1")
+
+    # how many players per second are kicked before a restart
+    kick_rate = dman_config["dman"]["info"].get("kick_rate", 20)
+
     # grab username from dman config
     user_info = dman_config["user"]["info"]
     username = user_info["steam_username"]
@@ -99,8 +128,11 @@ async def main():
     # ensure servers directory is initiated
     check_servers(servers_path)
 
-    # # update servers to latest version
-    # update_servers(app_path, username, password)
+    # server events are journaled to app/events.db
+    open_journal(app_path)
+
+    # update servers to latest version, skipped when the build is unchanged
+    update_servers(app_path, username, password, clone_mode=clone_mode)
 
     # # initialize instances to be run using dman config
     instance_keys = [key for key in instance_info.keys()]
@@ -118,7 +150,9 @@ async def main():
     if instance_info:
         server_configs = []
         for instance in instance_keys:
-            instance_name, needs_edit = validate_server_files(app_path, instance)
+            instance_name, needs_edit = validate_server_files(
+                app_path, instance, clone_mode=clone_mode
+            )
             if needs_edit:
                 instances_needing_edits.append(instance_name)
 
@@ -148,24 +182,41 @@ async def main():
         await asyncio.sleep(5)
         return
 
-    # mod_dict = validate_workshop_mods(username, server_configs, app_path)
-    # log.debug(f"mod_dict: {mod_dict}")
-
-    try:
-        mod_dict = validate_workshop_mods(username, server_configs, app_path)
-        log.debug(f"mod_dict: {mod_dict}")
-
-    except Exception as e:
-        log.error(f"Error validating workshop mods: {e}")
-        mod_dict = {}  # Use empty dict if validation fails
-
     if not active_instances:
         print("No active instances, enable them in dman.toml :3")
         return
 
+    # work out each instance's own mod set so it can start once those are ready
+    mod_plans = {}
+    for instance in instance_keys:
+        server_config = server_configs[instance_keys.index(instance)]
+        try:
+            mod_plans[instance] = plan_workshop_mods(server_config, app_path)
+        except Exception as e:
+            log.error(f"[{instance}] Error planning workshop mods: {e}")
+            mod_plans[instance] = (set(), set())
+
+    # set once a mod's download has finished (successfully or not)
+    mod_ready = {
+        mod_id: asyncio.Event()
+        for mod_ids, missing in mod_plans.values()
+        for mod_id in missing
+    }
+    mod_dict = get_catalog(app_path).by_id()
+
+    # active servers needing the fewest downloads come up first
+    startup_order = sorted(
+        instance_keys,
+        key=lambda i: (
+            instance_info[i] is not True,
+            len(mod_plans[i][1]),
+            len(mod_plans[i][0]),
+        ),
+    )
+    log.debug(f"startup_order: {startup_order}")
+
     # this is where we store server information and the actual processes
     servers = {}
-    processes = []
 
     # initiate configurations with server.tomls
     for instance in instance_keys:
@@ -198,10 +249,10 @@ async def main():
             copyfile(default_be_config_path, be_config_path)
 
         # gather rcon info from be config
-        with open(be_config_path, "r") as cfg:
-            cfg_contents = cfg.readlines()
-            rcon_pass = cfg_contents[0].replace("RConPassword", "").strip()
-            rcon_port = int(cfg_contents[2].replace("RConPort", "").strip())
+        rcon_port, rcon_pass = read_rcon_config(app_path, instance)
+
+        # one shared RCON session per instance, opened on first use
+        sessions.register(instance, rcon_port, rcon_pass, rcon_host)
 
         is_active = instance_info[instance]
 
@@ -226,7 +277,7 @@ async def main():
             "start_time": datetime.datetime.now(),
             "last_update": datetime.datetime.now(),
             "players": "",
-            "events": [],
+            "events": new_event_ring(),
         }
 
         # # Update server state to default
@@ -239,48 +290,108 @@ async def main():
         #     }
         # )
 
-        # Process and update mods separately
-        if client_mods or server_mods:
-            updated_client_mods, updated_server_mods = import_mods(
-                app_path, instance, client_mods, server_mods, mod_dict
-            )
+    log.debug(f"servers: {servers}")
 
-            # Update the server_config in memory
-            server_config["server"]["info"]["client_mods"] = updated_client_mods
-            server_config["server"]["info"]["server_mods"] = updated_server_mods
+    # download mods instance by instance in startup order
+    async def download_mods_in_order():
+        # one scheduler for the whole run so resumed jobs are only tried once
+        scheduler = DownloadScheduler(
+            os.path.join(app_path, "steamcmd"), username, workers=download_workers
+        )
+        requested = set()
+        for instance in startup_order:
+            batch = mod_plans[instance][1] - requested
+            if not batch:
+                continue
+            requested.update(batch)
+
+            log.info(f"[{instance}] Downloading {len(batch)} mods")
+            try:
+                mod_dict.update(
+                    await asyncio.to_thread(
+                        download_workshop_mods,
+                        username,
+                        batch,
+                        app_path,
+                        download_workers,
+                        scheduler,
+                    )
+                )
+            except Exception as e:
+                log.error(f"[{instance}] Error downloading workshop mods: {e}")
+
+            for mod_id in batch:
+                mod_ready[mod_id].set()
+
+        # jobs resumed from an interrupted launch that no instance asked for
+        try:
+            await asyncio.to_thread(scheduler.run)
+        except Exception as e:
+            log.error(f"Error resuming queued mod downloads: {e}")
+
+    # bring one instance up as soon as its own mods are in place
+    async def prepare_instance(instance):
+        data = servers[instance]
+        server_config = server_configs[instance_keys.index(instance)]
+
+        try:
+            for mod_id in mod_plans[instance][1]:
+                await mod_ready[mod_id].wait()
+
+            # Process and update mods separately
+            if data["client_mods"] or data["server_mods"]:
+                updated_client_mods, updated_server_mods = await asyncio.to_thread(
+                    import_mods,
+                    app_path,
+                    instance,
+                    data["client_mods"],
+                    data["server_mods"],
+                    dict(mod_dict),
+                    deploy_mode=mod_deploy_mode,
+                )
 
-            # Update the config file
-            with open(
-                os.path.join(app_path, "servers", instance, "server.toml"),
-                "w",
-            ) as f:
-                toml.dump(server_config, f)
+                # Update the server_config in memory
+                server_config["server"]["info"]["client_mods"] = updated_client_mods
+                server_config["server"]["info"]["server_mods"] = updated_server_mods
 
-            # Update the servers dictionary with new mod values
-            servers[instance]["client_mods"] = updated_client_mods
-            servers[instance]["server_mods"] = updated_server_mods
+                # Update the config file
+                with open(
+                    os.path.join(app_path, "servers", instance, "server.toml"),
+                    "w",
+                ) as f:
+                    toml.dump(server_config, f)
 
-    log.debug(f"servers: {servers}")
+                # Update the servers dictionary with new mod values
+                data["client_mods"] = updated_client_mods
+                data["server_mods"] = updated_server_mods
+
+            if not data["is_active"]:
+                return None
 
-    # Prepare the server processes
-    for instance, data in servers.items():
-        # print(servers)
-        if data["is_active"]:
             log.debug(f"Starting server {instance}")
-            processes.append(
-                start_server(
-                    server_states,
-                    data["app_path"],
-                    data["instance"],
-                    data["port"],
-                    data["client_mods"],
-                    data["server_mods"],
-                    data["logs"],
-                )
+            return await start_server(
+                server_states,
+                data["app_path"],
+                data["instance"],
+                data["port"],
+                data["client_mods"],
+                data["server_mods"],
+                data["logs"],
+                output_mode=output_mode,
             )
-
-    # Start servers
-    server_instances = await asyncio.gather(*processes)
+        except Exception as e:
+            log.error(f"[{instance}] Failed to prepare server: {e}")
+            return None
+
+    # Start servers, each one as soon as it is ready
+    print_center("Starting servers...")
+    downloader = asyncio.create_task(download_mods_in_order())
+    started = await asyncio.gather(
+        *(prepare_instance(instance) for instance in startup_order)
+    )
+    await downloader
+    server_instances = [server for server in started if server]
+    print("Done\n")
 
     # Print server info
     log.info(f"All enabled servers started. Summary: {server_instances}")
@@ -292,6 +403,39 @@ async def main():
         cached_states[server] = {"state": data["state"], "players": data["players"]}
     main_menu(server_states)  # Show initial state
 
+    # Keep player counts in line with each server's RCON player list
+    reconcile_tasks = [
+        asyncio.create_task(
+            reconcile_players(server_states, server["instance"])
+        )
+        for server in server_instances
+    ]
+
+    # Export rolling activity stats for other tools to pick up
+    async def export_stats_periodically(interval=60):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                export_stats(os.path.join(app_path, "stats.json"))
+            except Exception as e:
+                log.warning(f"failed to export stats: {e}")
+
+    stats_exporter = asyncio.create_task(export_stats_periodically())
+
+    # Keep the log search index (python -m modules.logindex) up to date
+    async def index_logs_periodically(interval=60):
+        index = open_index(app_path)
+        while True:
+            try:
+                added = await asyncio.to_thread(index.index_app, app_path)
+                if added:
+                    log.debug(f"indexed {added} new log lines")
+            except Exception as e:
+                log.warning(f"failed to index logs: {e}")
+            await asyncio.sleep(interval)
+
+    log_indexer = asyncio.create_task(index_logs_periodically())
+
     # Set up restart scheduling
     scheduling_tasks = []
     for server in server_instances:
@@ -302,6 +446,8 @@ async def main():
                 instance_name=server["instance"],
                 restart_delay=180,
                 warning_time=1800,
+                host=rcon_host,
+                kick_rate=kick_rate,
             )
         )
 
@@ -346,11 +492,13 @@ async def main():
 
             needs_update = False
             for server, data in server_states.items():
-                # Check if server is new or if state/players have changed
+                # Check if server is new or if state/players/activity have changed,
+                # activity also drops as events age out of the hour
                 if (
                     server not in cached_states
                     or data["state"] != cached_states[server]["state"]
                     or data["players"] != cached_states[server]["players"]
+                    or hour_activity(server) != cached_states[server]["activity"]
                 ):
                     needs_update = True
                     break
@@ -380,6 +528,7 @@ async def main():
                     cached_states[server] = {
                         "state": data["state"],
                         "players": data["players"],
+                        "activity": hour_activity(server),
                     }
 
     finally:
@@ -428,4 +577,7 @@ async def shutdown_servers(server_instances):
                     f"[{server['instance']}] Process didn't terminate within timeout"
                 )
 
+    # close the shared RCON sessions
+    sessions.close()
+
     log.info("Server manager shutting down")
@@ -1,14 +1,172 @@
 from __future__ import annotations
+import os
+import re
+import copy
+import gzip
+import json
+import queue
+import shutil
+import atexit
 import logging
+import logging.handlers
 
+# server output is logged as "[instance] ..." or "[instance][TYPE] ..."
+instance_prefix = re.compile(r"\[([\w.-]+)\]")
 
-def setup_logger(level, stream_logs) -> None:
+# formats tracebacks before records are queued
+_traceback_formatter = logging.Formatter()
+
+
+def _gzip_namer(name: str) -> str:
+    return f"{name}.gz"
+
+
+def _gzip_rotator(source: str, dest: str) -> None:
+    with open(source, "rb") as src, gzip.open(dest, "wb") as dst:
+        shutil.copyfileobj(src, dst)
+    os.remove(source)
+
+
+def _rotating_handler(
+    path: str, max_bytes: int, backups: int, when: str | None
+) -> logging.Handler:
+    """Size or time rotated file handler that gzips rotated files"""
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    if when:
+        handler: logging.Handler = logging.handlers.TimedRotatingFileHandler(
+            path, when=when, backupCount=backups, encoding="utf-8"
+        )
+    else:
+        handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8"
+        )
+    handler.namer = _gzip_namer
+    handler.rotator = _gzip_rotator
+    return handler
+
+
+class JsonLinesFormatter(logging.Formatter):
+    """Format records as one JSON object per line"""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "time": self.formatTime(record, "%Y-%m-%dT%H:%M:%S"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        instance = getattr(record, "instance", None)
+        if instance:
+            entry["instance"] = instance
+        # queued records carry the traceback already formatted in exc_text
+        exception = record.exc_text
+        if record.exc_info and not exception:
+            exception = self.formatException(record.exc_info)
+        if exception:
+            entry["exception"] = exception
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class TracebackQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that keeps tracebacks apart from the message.
+
+    The stock prepare() folds the traceback into the message and clears
+    exc_info, so formatters on the listener side can't tell the two apart.
+    Here the traceback is formatted into exc_text instead, which the text
+    formatters append as usual and JsonLinesFormatter writes as its own
+    "exception" field.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        exc_text = record.exc_text
+        if record.exc_info and not exc_text:
+            exc_text = _traceback_formatter.formatException(record.exc_info)
+
+        message = record.getMessage()
+        record = copy.copy(record)
+        record.message = record.msg = message
+        record.args = None
+        record.exc_info = None
+        record.exc_text = exc_text
+        return record
+
+
+class InstanceRouter(logging.Handler):
+    """
+    Route records that carry an instance prefix to a rotating file per
+    instance, opened on first use. Runs on the listener thread, so the
+    prefix lookup and file writes never touch the event loop.
+    """
+
+    def __init__(
+        self,
+        log_dir: str,
+        formatter: logging.Formatter,
+        max_bytes: int,
+        backups: int,
+        when: str | None,
+        suffix: str,
+    ) -> None:
+        super().__init__()
+        self.log_dir = log_dir
+        self.record_formatter = formatter
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.when = when
+        self.suffix = suffix
+        self.handlers: dict[str, logging.Handler] = {}
+
+    def _handler(self, instance: str) -> logging.Handler:
+        handler = self.handlers.get(instance)
+        if handler is None:
+            handler = _rotating_handler(
+                os.path.join(self.log_dir, f"{instance}{self.suffix}"),
+                self.max_bytes,
+                self.backups,
+                self.when,
+            )
+            handler.setFormatter(self.record_formatter)
+            self.handlers[instance] = handler
+        return handler
+
+    def emit(self, record: logging.LogRecord) -> None:
+        instance = getattr(record, "instance", None)
+        if instance is None:
+            match = instance_prefix.match(record.getMessage())
+            if not match:
+                return
+            instance = record.instance = match.group(1)
+
+        try:
+            self._handler(instance).handle(record)
+        except Exception:
+            self.handleError(record)
+
+    def close(self) -> None:
+        for handler in self.handlers.values():
+            handler.close()
+        super().close()
+
+
+def setup_logger(
+    level,
+    stream_logs,
+    log_dir: str = "logs",
+    max_bytes: int = 10 * 1024 * 1024,
+    backups: int = 5,
+    rotate_when: str | None = None,
+    jsonl: bool = False,
+    per_instance: bool = True,
+) -> logging.handlers.QueueListener:
     """
     Configures the logging system for the application.
 
-    This function sets up the logging configuration for the application,
-    allowing logs to be written to the console based on the specified
-    logging level and whether streaming to the console is enabled.
+    Loggers only put records on a queue; a background listener thread
+    formats and writes them, so the event loop never blocks on disk.
+    console.log is rotated and compressed instead of growing without
+    limit, and server output is also split into one rotating file per
+    instance under log_dir.
 
     Parameters
     ----------
@@ -18,12 +176,24 @@ def setup_logger(level, stream_logs) -> None:
     stream_logs : bool
         A flag indicating whether logs should be streamed to the console.
         If True, logs will be output to the console; otherwise, they will
-        not be streamed.
+        be written to console.log.
+    log_dir : str
+        Directory for the per-instance log files.
+    max_bytes : int
+        Size at which a log file is rotated, ignored when rotate_when is set.
+    backups : int
+        Number of rotated, gzipped files to keep per log.
+    rotate_when : str or None
+        Rotate on time instead of size, e.g. "midnight" or "H".
+    jsonl : bool
+        Write the per-instance logs as JSON lines instead of text.
+    per_instance : bool
+        Whether to write per-instance log files at all.
 
     Returns
     -------
-    None
-        This function does not return any value.
+    logging.handlers.QueueListener
+        The running listener, stopped automatically at exit.
     """
     log_formatter = logging.Formatter(
         "%(asctime)s - %(levelname)s - %(filename)s - %(message)s",
@@ -38,9 +208,33 @@ def setup_logger(level, stream_logs) -> None:
         # stream_handler.terminator = ""
         handlers.append(stream_handler)
     else:
-        file_handler = logging.FileHandler("console.log")
+        file_handler = _rotating_handler("console.log", max_bytes, backups, rotate_when)
         file_handler.setFormatter(log_formatter)
         file_handler.setLevel(level)
         handlers.append(file_handler)
 
-    logging.basicConfig(level=level, handlers=handlers)
+    if per_instance:
+        router = InstanceRouter(
+            os.path.join(log_dir, "instances"),
+            JsonLinesFormatter() if jsonl else log_formatter,
+            max_bytes,
+            backups,
+            rotate_when,
+            ".jsonl" if jsonl else ".log",
+        )
+        router.setLevel(level)
+        handlers.append(router)
+
+    # records are handed off to the listener thread
+    log_queue: queue.SimpleQueue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(
+        log_queue, *handlers, respect_handler_level=True
+    )
+    listener.start()
+    atexit.register(listener.stop)
+
+    # the listener's handlers do the real formatting
+    queue_handler = TracebackQueueHandler(log_queue)
+
+    logging.basicConfig(level=level, handlers=[queue_handler])
+    return listener
@@ -7,14 +7,28 @@
 # i have 4 years of experience dealing with dayz's weirdness and im hoping
 # to use that experience to make other people's lives a bit easier
 
+import os
+import toml
 import asyncio
 import logging
 
 from __init__ import main, shutdown_servers
 from __logger__ import setup_logger
 
+
+# logging starts before main() loads dman.toml, so read its log settings here
+def read_log_format():
+    config_path = "dman.toml"
+    if not os.path.exists(config_path):
+        config_path = os.path.join("resources", "dman_default_config.toml")
+    try:
+        return toml.load(config_path)["dman"]["info"].get("log_format", "text")
+    except (OSError, KeyError, toml.TomlDecodeError):
+        return "text"
+
+
 log = logging.getLogger(__name__)
-setup_logger(level=10, stream_logs=False)
+setup_logger(level=10, stream_logs=False, jsonl=read_log_format() == "jsonl")
 
 ## LEVELS ##
 # 10: DEBUG
@@ -0,0 +1,170 @@
+import logging
+import os
+import json
+import time
+
+from modules.logclassifier import LineClassifier
+
+log = logging.getLogger(__name__)
+
+
+# window name -> (length in seconds, number of buckets)
+windows = {
+    "1m": (60, 60),
+    "1h": (3600, 60),
+    "24h": (86400, 96),
+}
+
+# ADM lines counted by the analytics, (event, literals, pattern, state, message)
+adm_rules = [
+    (
+        "kill",
+        ["killed by"],
+        r'Player "(?P<player>[^"]+)"[^|]*?killed by|killed by',
+        None,
+        "Player killed",
+    ),
+    (
+        "hit",
+        ["hit by"],
+        r'Player "(?P<player>[^"]+)"[^|]*?hit by|hit by',
+        None,
+        "Player hit",
+    ),
+    ("chat", ["Chat("], r'Chat\("(?P<player>[^"]*)"|Chat\(', None, "Chat message"),
+]
+
+adm_classifier = LineClassifier(adm_rules)
+
+# ADM event -> counter it feeds
+adm_metrics = {"kill": "kills", "hit": "hits", "chat": "chat"}
+
+# instance -> ServerStats
+fleet_stats = {}
+
+
+class RollingCounter:
+    """
+    Sum (or max) of values over a sliding window in constant memory.
+
+    The window is split into fixed buckets that are reused round-robin, a
+    bucket is reset the first time it is touched in a new period.
+    """
+
+    def __init__(self, window, buckets):
+        self.width = window / buckets
+        self.values = [0] * buckets
+        self.periods = [-1] * buckets
+
+    def _slot(self, now):
+        period = int(now // self.width)
+        slot = period % len(self.values)
+        if self.periods[slot] != period:
+            self.periods[slot] = period
+            self.values[slot] = 0
+        return slot
+
+    def _live(self, now):
+        oldest = int(now // self.width) - len(self.values)
+        return (
+            value
+            for value, period in zip(self.values, self.periods)
+            if period > oldest
+        )
+
+    def add(self, amount=1, now=None):
+        self.values[self._slot(now or time.time())] += amount
+
+    def peak(self, value, now=None):
+        slot = self._slot(now or time.time())
+        self.values[slot] = max(self.values[slot], value)
+
+    def total(self, now=None):
+        return sum(self._live(now or time.time()))
+
+    def maximum(self, now=None):
+        return max(self._live(now or time.time()), default=0)
+
+
+class ServerStats:
+    """Rolling 1m/1h/24h activity counters for one instance"""
+
+    counted = ("joins", "kills", "hits", "chat", "sessions", "session_seconds")
+
+    def __init__(self):
+        self.counters = {
+            metric: {
+                name: RollingCounter(length, buckets)
+                for name, (length, buckets) in windows.items()
+            }
+            for metric in self.counted + ("peak_players",)
+        }
+        # players online now, counts toward every window's peak
+        self.current = 0
+
+    def add(self, metric, amount=1, now=None):
+        for counter in self.counters[metric].values():
+            counter.add(amount, now)
+
+    def players(self, count, now=None):
+        self.current = count
+        for counter in self.counters["peak_players"].values():
+            counter.peak(count, now)
+
+    def session(self, seconds, now=None):
+        self.add("sessions", now=now)
+        self.add("session_seconds", seconds, now)
+
+    def feed_adm(self, lines, now=None):
+        """Count kills, hits and chat in a batch of ADM lines"""
+        for line in lines:
+            result = adm_classifier.classify(line)
+            if result:
+                self.add(adm_metrics[result[1]], now=now)
+
+    def snapshot(self, now=None):
+        """
+        Returns:
+            dict: window -> {joins, kills, hits, chat, peak_players,
+                avg_session}, avg_session in seconds
+        """
+        now = now or time.time()
+        result = {}
+        for name in windows:
+            values = {
+                metric: self.counters[metric][name].total(now)
+                for metric in self.counted
+            }
+            sessions = values.pop("sessions")
+            session_seconds = values.pop("session_seconds")
+            values["peak_players"] = max(
+                self.current, self.counters["peak_players"][name].maximum(now)
+            )
+            values["avg_session"] = (
+                int(session_seconds / sessions) if sessions else 0
+            )
+            result[name] = values
+        return result
+
+
+def get_stats(instance):
+    """The shared stats for an instance, created on first use"""
+    stats = fleet_stats.get(instance)
+    if stats is None:
+        stats = fleet_stats[instance] = ServerStats()
+    return stats
+
+
+def export_stats(path, now=None):
+    """Write a JSON snapshot of every instance's stats to path"""
+    data = {
+        "generated": int(now or time.time()),
+        "instances": {
+            instance: stats.snapshot(now) for instance, stats in fleet_stats.items()
+        },
+    }
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+    return data
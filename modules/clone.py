@@ -0,0 +1,170 @@
+import logging
+import os
+import errno
+import shutil
+
+from fnmatch import fnmatch
+
+try:
+    import fcntl
+except ImportError:  # not available on windows
+    fcntl = None
+
+log = logging.getLogger(__name__)
+
+
+# FICLONE ioctl from linux/fs.h, shares extents on btrfs/xfs/etc
+FICLONE = 0x40049409
+
+# top level entries every instance has to own outright
+owned_paths = ("serverDZ.cfg", "mpmissions", "profiles", "battleye")
+
+# instance files that belong to the instance and are never shared
+owned_patterns = (
+    "*.xml",
+    "*.cfg",
+    "*.json",
+    "*.map",
+    "*.c",
+    "*.db",
+    "*.bin",
+    "*.001",
+    "*.002",
+    "*.txt",
+)
+
+# errors that mean the filesystem can't link/clone, fall back instead
+unsupported_errors = (
+    errno.EXDEV,
+    errno.EPERM,
+    errno.EINVAL,
+    errno.ENOTTY,
+    errno.EOPNOTSUPP,
+    errno.EMLINK,
+)
+
+
+def is_owned(rel_path):
+    """Check whether a template-relative path must be a private copy"""
+    parts = rel_path.replace(os.sep, "/").split("/")
+    if parts[0] in owned_paths:
+        return True
+    return any(fnmatch(parts[-1], pattern) for pattern in owned_patterns)
+
+
+def reflink_file(src, dst):
+    """Clone src into dst sharing its data blocks (copy-on-write)"""
+    if fcntl is None:
+        raise OSError(errno.EOPNOTSUPP, "reflink not supported")
+
+    with open(src, "rb") as s, open(dst, "wb") as d:
+        try:
+            fcntl.ioctl(d.fileno(), FICLONE, s.fileno())
+        except OSError:
+            d.close()
+            os.remove(dst)
+            raise
+    shutil.copystat(src, dst)
+
+
+class Cloner:
+    """
+    Link files from a template instead of copying them.
+
+    Methods are tried in order (reflink, hardlink, copy) and a method that
+    the filesystem rejects is disabled for the rest of the run, so a
+    fallback costs one failed syscall rather than one per file.
+    """
+
+    methods = ("reflink", "hardlink", "copy")
+
+    def __init__(self, mode="auto"):
+        if mode == "auto":
+            self.enabled = list(self.methods)
+        elif mode in self.methods:
+            self.enabled = [mode] if mode == "copy" else [mode, "copy"]
+        else:
+            log.warning(f"unknown clone mode {mode}, using auto")
+            self.enabled = list(self.methods)
+
+        self.stats = {method: 0 for method in self.methods}
+        self.copied_bytes = 0
+
+    def link(self, src, dst):
+        """Place src at dst using the cheapest working method"""
+        if os.path.lexists(dst):
+            os.remove(dst)
+
+        for method in list(self.enabled):
+            if method == "copy":
+                return self.copy(src, dst)
+
+            try:
+                if method == "reflink":
+                    reflink_file(src, dst)
+                else:
+                    os.link(src, dst)
+
+                self.stats[method] += 1
+                return method
+            except OSError as e:
+                if e.errno not in unsupported_errors:
+                    raise
+                log.debug(f"{method} unsupported ({e}), falling back")
+                self.enabled.remove(method)
+
+        raise OSError(errno.EOPNOTSUPP, f"no clone method left for {src}")
+
+    def copy(self, src, dst):
+        """Make a real, private copy of src at dst"""
+        if os.path.lexists(dst):
+            os.remove(dst)
+        shutil.copy2(src, dst)
+        self.stats["copy"] += 1
+        self.copied_bytes += os.path.getsize(dst)
+        return "copy"
+
+    def summary(self):
+        counts = ", ".join(f"{count} {method}" for method, count in self.stats.items())
+        return f"{counts} ({self.copied_bytes} bytes copied)"
+
+
+def clone_tree(src, dst, mode="auto", owned=is_owned):
+    """
+    Provision dst from the template at src.
+
+    Immutable game files are reflinked or hardlinked, while configs and
+    the directories each instance writes to are real copies. Pass
+    owned=None to link every file. Returns the Cloner so callers can
+    report what was done.
+    """
+    cloner = Cloner(mode)
+
+    for root, dirs, files in os.walk(src):
+        rel_root = os.path.relpath(root, src)
+        dst_root = os.path.normpath(os.path.join(dst, rel_root))
+        os.makedirs(dst_root, exist_ok=True)
+
+        for file in files:
+            rel_path = os.path.normpath(os.path.join(rel_root, file))
+            src_file = os.path.join(root, file)
+            dst_file = os.path.join(dst_root, file)
+
+            if os.path.islink(src_file):
+                os.symlink(os.readlink(src_file), dst_file)
+            elif owned and owned(rel_path):
+                cloner.copy(src_file, dst_file)
+            else:
+                cloner.link(src_file, dst_file)
+
+        shutil.copystat(root, dst_root)
+
+    return cloner
+
+
+def remove_path(path):
+    """Remove a file, symlink or directory tree at path"""
+    if os.path.islink(path) or os.path.isfile(path):
+        os.remove(path)
+    elif os.path.isdir(path):
+        shutil.rmtree(path)
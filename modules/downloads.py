@@ -0,0 +1,468 @@
+import logging
+import os
+import re
+import json
+import time
+import tempfile
+import subprocess
+import threading
+
+from concurrent.futures import ThreadPoolExecutor
+
+from modules.clone import remove_path
+from modules.vdf import parse_vdf, write_acf
+
+log = logging.getLogger(__name__)
+
+
+# SteamCMD result lines for workshop downloads
+workshop_success_pattern = re.compile(r"Success\. Downloaded item (\d+)")
+workshop_failure_pattern = re.compile(
+    r"ERROR! (?:Download item|Timeout downloading item) (\d+)(?: failed \(([^)]*)\))?"
+)
+
+
+# download many workshop items in a single steamcmd session
+def download_workshop_items(
+    steamcmd_path,
+    username,
+    mod_ids,
+    password=None,
+    timeout_per_mod=300,
+    on_result=None,
+    install_dir=None,
+):
+    """
+    Download a set of workshop items with one SteamCMD login.
+
+    A runscript is generated with one workshop_download_item line per mod,
+    so SteamCMD only bootstraps and logs in once for the whole batch. The
+    combined output is parsed to report success or failure per mod.
+
+    Args:
+        steamcmd_path (str): Directory containing steamcmd.sh
+        username (str): Steam username
+        mod_ids (iterable): Workshop ids to download
+        password (str): Steam password, omit to use cached credentials
+        timeout_per_mod (int): Seconds allowed per mod before the batch is killed
+        on_result (callable): Called with (mod_id, success, detail) as each
+            mod finishes
+        install_dir (str): Download into <install_dir>/steamapps instead of
+            steamcmd's own, via force_install_dir
+
+    Returns:
+        dict: mod_id -> {"success": bool, "detail": str}
+    """
+    mod_ids = [str(mod_id) for mod_id in mod_ids]
+    results = {}
+    if not mod_ids:
+        return results
+
+    def record(mod_id, success, detail):
+        if mod_id not in mod_ids or mod_id in results:
+            return
+        results[mod_id] = {"success": success, "detail": detail}
+        if on_result:
+            on_result(mod_id, success, detail)
+
+    # runscript holds the login, keep it private and short-lived
+    login = f"login {username} {password}" if password else f"login {username}"
+    script = [
+        "@ShutdownOnFailedCommand 0",
+        "@NoPromptForPassword 1",
+    ]
+    if install_dir:
+        # has to come before login to take effect
+        script.append(f'force_install_dir "{os.path.abspath(install_dir)}"')
+    script.append(login)
+    script += [f"workshop_download_item 221100 {mod_id}" for mod_id in mod_ids]
+    script.append("quit")
+
+    fd, script_path = tempfile.mkstemp(
+        prefix="dman_workshop_", suffix=".txt", dir=steamcmd_path
+    )
+    with os.fdopen(fd, "w") as f:
+        f.write("\n".join(script) + "\n")
+
+    timed_out = False
+    try:
+        log.info(f"downloading {len(mod_ids)} mods in one steamcmd session...")
+        process = subprocess.Popen(
+            ["./steamcmd.sh", "+runscript", script_path],
+            shell=False,
+            cwd=steamcmd_path,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+            errors="replace",
+        )
+
+        # kill the whole batch if it runs past its combined budget
+        def kill_batch():
+            nonlocal timed_out
+            timed_out = True
+            process.kill()
+
+        timer = threading.Timer(timeout_per_mod * len(mod_ids), kill_batch)
+        timer.start()
+
+        try:
+            for line in iter(process.stdout.readline, ""):
+                log.debug(f"SteamCMD workshop output: {line.strip()}")
+
+                match = workshop_success_pattern.search(line)
+                if match:
+                    record(match.group(1), True, "downloaded")
+                    continue
+
+                match = workshop_failure_pattern.search(line)
+                if match:
+                    record(match.group(1), False, match.group(2) or "timeout")
+
+            process.wait()
+        finally:
+            timer.cancel()
+    finally:
+        try:
+            os.remove(script_path)
+        except OSError:
+            pass
+
+    # anything steamcmd never reported on counts as a failure
+    reason = "batch timed out" if timed_out else "no result from steamcmd"
+    for mod_id in mod_ids:
+        if mod_id not in results:
+            record(mod_id, False, reason)
+
+    failed = [mod_id for mod_id in mod_ids if not results[mod_id]["success"]]
+    if failed:
+        log.warning(f"{len(failed)}/{len(mod_ids)} mods failed to download: {failed}")
+    else:
+        log.info(f"downloaded {len(mod_ids)} mods")
+
+    return results
+
+
+class DownloadScheduler:
+    """
+    Download workshop mods with a bounded pool of steamcmd workers.
+
+    Each worker pulls a small batch of ready jobs and downloads it in one
+    steamcmd session, so a stuck item only holds up its own batch. Failed
+    jobs are retried with exponential backoff. The queue of pending and
+    failed jobs is persisted to disk so an interrupted run resumes where
+    it left off on the next launch.
+
+    SteamCMD rewrites appworkshop_221100.acf and keeps its download state
+    under steamapps/workshop, so concurrent sessions on one install would
+    clobber each other's records. With more than one worker, each
+    downloads into its own force_install_dir under dman_workers/ and
+    finished mods are moved into the shared install, one batch at a
+    time, with their acf entries merged in. SteamCMD's login cache is
+    still shared, and it is only read during a session.
+    """
+
+    def __init__(
+        self,
+        steamcmd_path,
+        username,
+        password=None,
+        workers=3,
+        batch_size=10,
+        retries=3,
+        backoff=10,
+        timeout_per_mod=300,
+        queue_path=None,
+    ):
+        self.steamcmd_path = steamcmd_path
+        self.username = username
+        self.password = password
+        self.workers = max(1, int(workers))
+        self.batch_size = max(1, int(batch_size))
+        self.retries = max(1, int(retries))
+        self.backoff = backoff
+        self.timeout_per_mod = timeout_per_mod
+        self.queue_path = queue_path or os.path.join(
+            steamcmd_path, "dman_download_queue.json"
+        )
+
+        self.batch_limit = self.batch_size
+        # jobs the current run works on, None for every queued job
+        self.wanted = None
+        self.lock = threading.Lock()
+        self.publish_lock = threading.Lock()
+        self.jobs = {}
+        self.results = {}
+        self._load_queue()
+
+    def _load_queue(self):
+        """Resume pending and failed jobs from a previous run"""
+        if not os.path.exists(self.queue_path):
+            return
+
+        try:
+            with open(self.queue_path, "r") as f:
+                saved = json.load(f)
+        except Exception as e:
+            log.warning(f"failed to load download queue: {e}")
+            return
+
+        for mod_id, job in saved.get("jobs", {}).items():
+            # a fresh run gets a fresh retry budget
+            job["attempts"] = 0
+            job["next_attempt"] = 0
+            job["status"] = "pending"
+            self.jobs[mod_id] = job
+
+        if self.jobs:
+            log.info(f"resuming {len(self.jobs)} queued mod downloads")
+
+    def _save_queue(self):
+        """Persist unfinished jobs, caller must hold the lock"""
+        tmp_path = f"{self.queue_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump({"jobs": self.jobs}, f)
+            os.replace(tmp_path, self.queue_path)
+        except Exception as e:
+            log.warning(f"failed to save download queue: {e}")
+
+    def add(self, mod_ids):
+        """Queue workshop ids for download"""
+        with self.lock:
+            for mod_id in mod_ids:
+                mod_id = str(mod_id)
+                if mod_id not in self.jobs:
+                    self.jobs[mod_id] = {
+                        "status": "pending",
+                        "attempts": 0,
+                        "next_attempt": 0,
+                        "detail": "",
+                    }
+            self._save_queue()
+
+    def _take_batch(self):
+        """
+        Claim up to batch_size ready jobs.
+
+        Returns (batch, wait) where wait is how long to sleep before jobs
+        in backoff become ready, or None when nothing is left to do.
+        """
+        with self.lock:
+            now = time.time()
+            batch = []
+            next_ready = None
+
+            for mod_id, job in self.jobs.items():
+                if job["status"] != "pending":
+                    continue
+                if self.wanted is not None and mod_id not in self.wanted:
+                    continue
+                if job["next_attempt"] <= now:
+                    job["status"] = "running"
+                    batch.append(mod_id)
+                    if len(batch) >= self.batch_limit:
+                        break
+                elif next_ready is None or job["next_attempt"] < next_ready:
+                    next_ready = job["next_attempt"]
+
+            if batch:
+                return batch, 0
+            if next_ready is not None:
+                return [], max(0.0, next_ready - now)
+            if any(job["status"] == "running" for job in self.jobs.values()):
+                # another worker may still hand back retries
+                return [], 1.0
+            return [], None
+
+    def _finish(self, mod_id, success, detail, on_result):
+        """Record a batch result, requeueing failures with backoff"""
+        with self.lock:
+            job = self.jobs.get(mod_id)
+            if job is None:
+                return
+
+            job["attempts"] += 1
+            job["detail"] = detail
+
+            if success:
+                del self.jobs[mod_id]
+                final = True
+            elif job["attempts"] < self.retries:
+                delay = self.backoff * 2 ** (job["attempts"] - 1)
+                job["status"] = "pending"
+                job["next_attempt"] = time.time() + delay
+                log.warning(
+                    f"mod {mod_id} failed ({detail}), retry {job['attempts']}/{self.retries - 1} in {delay}s"
+                )
+                final = False
+            else:
+                # keep it queued on disk so the next launch tries again
+                job["status"] = "failed"
+                log.error(
+                    f"mod {mod_id} failed after {job['attempts']} attempts: {detail}"
+                )
+                final = True
+
+            if final:
+                self.results[mod_id] = {
+                    "success": success,
+                    "detail": detail,
+                    "attempts": job["attempts"],
+                }
+            self._save_queue()
+
+        if final and on_result:
+            on_result(mod_id, success, detail)
+
+    def _workshop_path(self, install_dir=None):
+        return os.path.join(install_dir or self.steamcmd_path, "steamapps", "workshop")
+
+    def _publish(self, install_dir, mod_ids):
+        """
+        Move mods a worker downloaded into the shared install and merge
+        their acf entries into the shared appworkshop_221100.acf.
+
+        Returns:
+            dict: mod_id -> error for mods that couldn't be moved
+        """
+        errors = {}
+        worker_path = self._workshop_path(install_dir)
+        shared_path = self._workshop_path()
+        worker_acf = os.path.join(worker_path, "appworkshop_221100.acf")
+        shared_acf = os.path.join(shared_path, "appworkshop_221100.acf")
+
+        def read(path):
+            try:
+                with open(path, "r", encoding="utf-8", errors="replace") as f:
+                    return parse_vdf(f.read())
+            except FileNotFoundError:
+                return {}
+
+        with self.publish_lock:
+            worker_data = read(worker_acf)
+            shared_data = read(shared_acf)
+            worker_items = worker_data.setdefault("AppWorkshop", {})
+            shared_items = shared_data.setdefault("AppWorkshop", {"appid": "221100"})
+
+            for mod_id in mod_ids:
+                src = os.path.join(worker_path, "content", "221100", mod_id)
+                dst = os.path.join(shared_path, "content", "221100", mod_id)
+                try:
+                    os.makedirs(os.path.dirname(dst), exist_ok=True)
+                    if os.path.lexists(dst):
+                        remove_path(dst)
+                    os.replace(src, dst)
+                except OSError as e:
+                    errors[mod_id] = f"could not move download into place: {e}"
+                    continue
+
+                # the worker forgets the item so a later download isn't skipped
+                for section in ("WorkshopItemsInstalled", "WorkshopItemDetails"):
+                    entry = worker_items.get(section, {}).pop(mod_id, None)
+                    if entry is not None:
+                        shared_items.setdefault(section, {})[mod_id] = entry
+
+            os.makedirs(shared_path, exist_ok=True)
+            write_acf(shared_acf, shared_data)
+            if os.path.exists(worker_acf):
+                write_acf(worker_acf, worker_data)
+
+        return errors
+
+    def _worker(self, on_result, install_dir=None):
+        while True:
+            batch, wait = self._take_batch()
+            if wait is None:
+                return
+            if not batch:
+                time.sleep(wait)
+                continue
+
+            try:
+                results = download_workshop_items(
+                    self.steamcmd_path,
+                    self.username,
+                    batch,
+                    password=self.password,
+                    timeout_per_mod=self.timeout_per_mod,
+                    install_dir=install_dir,
+                )
+                if install_dir:
+                    done = [
+                        mod_id
+                        for mod_id in batch
+                        if results.get(mod_id, {}).get("success")
+                    ]
+                    for mod_id, error in self._publish(install_dir, done).items():
+                        results[mod_id] = {"success": False, "detail": error}
+            except Exception as e:
+                log.error(f"download batch failed: {e}")
+                results = {
+                    mod_id: {"success": False, "detail": str(e)} for mod_id in batch
+                }
+
+            for mod_id in batch:
+                result = results.get(
+                    mod_id, {"success": False, "detail": "no result from steamcmd"}
+                )
+                self._finish(mod_id, result["success"], result["detail"], on_result)
+
+    def run(self, on_result=None, mod_ids=None):
+        """
+        Download queued jobs and block until they are done.
+
+        A scheduler can be run repeatedly, e.g. once per instance. Jobs
+        that ran out of retries stay failed for the life of the scheduler
+        instead of being retried by every later run, and are only tried
+        again after a restart.
+
+        Args:
+            on_result (callable): Called with (mod_id, success, detail) once
+                a job succeeds or runs out of retries
+            mod_ids (iterable): Only work on these jobs, every pending job
+                when None
+
+        Returns:
+            dict: mod_id -> {"success": bool, "detail": str, "attempts": int}
+                for the jobs finished by this run
+        """
+        with self.lock:
+            self.wanted = None if mod_ids is None else {str(m) for m in mod_ids}
+            self.results = {}
+            pending = sum(
+                job["status"] == "pending"
+                and (self.wanted is None or mod_id in self.wanted)
+                for mod_id, job in self.jobs.items()
+            )
+        if not pending:
+            return {}
+
+        # spread the queue over every worker instead of filling one batch
+        workers = min(self.workers, pending)
+        self.batch_limit = min(self.batch_size, -(-pending // workers))
+        log.info(f"downloading {pending} mods with {workers} workers")
+
+        # a lone worker can use steamcmd's own install directly
+        install_dirs = [None]
+        if workers > 1:
+            install_dirs = [
+                os.path.join(self.steamcmd_path, "dman_workers", str(index))
+                for index in range(workers)
+            ]
+
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(self._worker, on_result, install_dir)
+                for install_dir in install_dirs
+            ]
+            for future in futures:
+                future.result()
+
+        with self.lock:
+            # failed jobs are saved as they are, loading resets them to pending
+            self._save_queue()
+            self.wanted = None
+
+        return self.results
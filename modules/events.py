@@ -0,0 +1,207 @@
+import atexit
+import logging
+import os
+import sqlite3
+import datetime
+import threading
+
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+# events kept in memory per instance, older ones only live in the journal
+EVENT_RING_SIZE = 100
+
+# the shared journal, opened by open_journal
+_journal = None
+
+
+def new_event_ring(maxlen=EVENT_RING_SIZE):
+    """Fixed-size event buffer for server_states[...]["events"]"""
+    return deque(maxlen=maxlen)
+
+
+class EventJournal:
+    """
+    Append-only event history in SQLite, indexed by instance and time.
+
+    Every server event is written here while server_states only keeps the
+    most recent ones, so history survives restarts without growing memory.
+
+    Appends only buffer the row. A timer thread writes the buffer in one
+    transaction flush_interval seconds after the first pending event, or
+    straight away once flush_size events are waiting, so the event loop
+    never waits on SQLite.
+    """
+
+    def __init__(self, path, flush_interval=1.0, flush_size=100):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.path = path
+        self.flush_interval = flush_interval
+        self.flush_size = flush_size
+        self.pending = []
+        self.timer = None
+        self.lock = threading.Lock()
+        self.db_lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        # WAL keeps appends cheap and lets readers run alongside the writer
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.execute(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                instance TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                state TEXT,
+                message TEXT
+            )
+            """
+        )
+        self.db.execute(
+            "CREATE INDEX IF NOT EXISTS events_instance_time"
+            " ON events (instance, timestamp)"
+        )
+        self.db.commit()
+
+    def append(self, instance, event):
+        """Queue an event for the next flush"""
+        row = (
+            instance,
+            event["timestamp"].timestamp(),
+            event["state"],
+            event["message"],
+        )
+        with self.lock:
+            self.pending.append(row)
+            if len(self.pending) >= self.flush_size:
+                self._schedule(0)
+            elif self.timer is None:
+                self._schedule(self.flush_interval)
+
+    def _schedule(self, delay):
+        """Start a flush timer, caller must hold the lock"""
+        if self.timer is not None:
+            if delay:
+                return
+            self.timer.cancel()
+        self.timer = threading.Timer(delay, self.flush)
+        self.timer.daemon = True
+        self.timer.start()
+
+    def flush(self):
+        """Write every pending event in one transaction"""
+        with self.db_lock:
+            with self.lock:
+                rows, self.pending = self.pending, []
+                self.timer = None
+            if not rows:
+                return
+            try:
+                with self.db:
+                    self.db.executemany(
+                        "INSERT INTO events (instance, timestamp, state, message)"
+                        " VALUES (?, ?, ?, ?)",
+                        rows,
+                    )
+            except Exception as e:
+                log.warning(f"failed to journal {len(rows)} events: {e}")
+
+    def query(self, instance=None, start=None, end=None, limit=None):
+        """
+        Yield events oldest first, streamed from disk.
+
+        Args:
+            instance (str): Only events for this instance, all when None
+            start (datetime): Only events at or after this time
+            end (datetime): Only events before this time
+            limit (int): Stop after this many events
+
+        Yields:
+            dict: {"instance", "timestamp", "state", "message"}
+        """
+        self.flush()
+
+        clauses, params = [], []
+        if instance is not None:
+            clauses.append("instance = ?")
+            params.append(instance)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end.timestamp())
+
+        sql = "SELECT instance, timestamp, state, message FROM events"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(int(limit))
+
+        # a reader connection of its own streams alongside the flush thread
+        db = sqlite3.connect(self.path)
+        try:
+            for instance, timestamp, state, message in db.execute(sql, params):
+                yield {
+                    "instance": instance,
+                    "timestamp": datetime.datetime.fromtimestamp(timestamp),
+                    "state": state,
+                    "message": message,
+                }
+        finally:
+            db.close()
+
+    def close(self):
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+        self.flush()
+        with self.db_lock:
+            self.db.close()
+
+
+def open_journal(app_path):
+    """Open the shared journal at app/events.db"""
+    global _journal
+    if _journal is None:
+        _journal = EventJournal(os.path.join(app_path, "events.db"))
+        # write out whatever is still buffered on exit
+        atexit.register(_journal.close)
+    return _journal
+
+
+def get_journal():
+    """The shared journal, or None if it hasn't been opened"""
+    return _journal
+
+
+def record_event(server_states, instance, state, message):
+    """
+    Add an event to an instance's in-memory ring and the journal.
+
+    Args:
+        server_states (dict): Shared server state
+        instance (str): Instance the event belongs to
+        state (str): ServerState value at the time of the event
+        message (str): What happened
+    """
+    event = {
+        "timestamp": datetime.datetime.now(),
+        "state": state,
+        "message": message,
+    }
+
+    server = server_states.get(instance)
+    if server is not None:
+        server["events"].append(event)
+
+    if _journal is not None:
+        try:
+            _journal.append(instance, event)
+        except Exception as e:
+            log.warning(f"[{instance}] failed to journal event: {e}")
+
+    return event
@@ -0,0 +1,186 @@
+import logging
+import asyncio
+
+from modules.rconclient import (
+    BE_LOGIN,
+    BE_COMMAND,
+    BE_SERVER_MESSAGE,
+    build_packet,
+    parse_packet,
+)
+
+log = logging.getLogger(__name__)
+
+
+class FakeBEServer(asyncio.DatagramProtocol):
+    """
+    Local stand-in for a DayZ server's BattlEye RCon, for trying the RCON
+    code without a game server.
+
+    Understands login, keepalives, players, say, kick and #shutdown,
+    answers anything else with an empty response, and splits responses
+    longer than max_payload into multi-packet replies like BattlEye does.
+    A resent sequence number gets the same response again without the
+    command running twice. Every received command is kept in commands.
+
+    latency is seconds before each response is sent, or a callable taking
+    the command. drop is an optional callable taking (seq, command) that
+    returns True to ignore the packet, as if it was lost.
+    """
+
+    def __init__(
+        self, password, players=None, max_payload=1024, latency=0.0, drop=None
+    ):
+        self.password = password
+        self.players = list(players or [])
+        self.max_payload = max_payload
+        self.latency = latency
+        self.drop = drop
+
+        self.transport = None
+        self.clients = set()
+        self.commands = []
+        self.message_seq = 0
+        self.shutdown = False
+        # addr -> seq -> (command, response)
+        self.answered = {}
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def datagram_received(self, data, addr):
+        packet = parse_packet(data)
+        if packet is None:
+            return
+        packet_type, payload = packet
+
+        if packet_type == BE_LOGIN:
+            success = payload.decode("utf-8", errors="replace") == self.password
+            if success:
+                self.clients.add(addr)
+            self.transport.sendto(
+                build_packet(BE_LOGIN, bytes((0x01 if success else 0x00,))), addr
+            )
+
+        elif packet_type == BE_COMMAND and payload and addr in self.clients:
+            seq = payload[0]
+            command = payload[1:].decode("utf-8", errors="replace")
+            if self.drop and self.drop(seq, command):
+                return
+
+            answered = self.answered.setdefault(addr, {})
+            previous = answered.get(seq)
+            if previous and previous[0] == command:
+                response = previous[1]
+            else:
+                response = self.handle(command) if command else ""
+                answered[seq] = (command, response)
+
+            latency = self.latency(command) if callable(self.latency) else self.latency
+            if latency:
+                asyncio.get_running_loop().call_later(
+                    latency, self.respond, addr, seq, response
+                )
+            else:
+                self.respond(addr, seq, response)
+
+    def handle(self, command):
+        self.commands.append(command)
+        name, _, args = command.partition(" ")
+
+        if name == "players":
+            lines = [
+                "Players on server:",
+                "[#] [IP Address]:[Port] [Ping] [GUID] [Name]",
+                "--------------------------------------------------",
+            ]
+            for slot, player in enumerate(self.players):
+                if player is not None:
+                    lines.append(
+                        f"{slot}   127.0.0.1:2304   30   {slot:032x}(OK) {player}"
+                    )
+            online = sum(player is not None for player in self.players)
+            lines.append(f"({online} players in total)")
+            return "\n".join(lines)
+
+        if name == "kick":
+            slot = args.split(" ", 1)[0]
+            if slot.isdigit() and int(slot) < len(self.players):
+                self.players[int(slot)] = None
+            return ""
+
+        if name == "say":
+            self.broadcast(f"RCon admin: {args}")
+            return ""
+
+        if name == "#shutdown":
+            self.shutdown = True
+            return ""
+
+        return ""
+
+    def respond(self, addr, seq, response):
+        data = response.encode("utf-8")
+        if len(data) <= self.max_payload:
+            self.transport.sendto(build_packet(BE_COMMAND, bytes((seq,)) + data), addr)
+            return
+
+        # 0x00, packet count, packet index, then the part
+        parts = [
+            data[i : i + self.max_payload]
+            for i in range(0, len(data), self.max_payload)
+        ]
+        for index, part in enumerate(parts):
+            header = bytes((seq, 0x00, len(parts), index))
+            self.transport.sendto(build_packet(BE_COMMAND, header + part), addr)
+
+    def broadcast(self, message):
+        """Send a server message to every logged in client"""
+        for addr in self.clients:
+            self.transport.sendto(
+                build_packet(
+                    BE_SERVER_MESSAGE,
+                    bytes((self.message_seq,)) + message.encode("utf-8"),
+                ),
+                addr,
+            )
+        self.message_seq = (self.message_seq + 1) % 256
+
+
+async def start_fake_server(host="127.0.0.1", port=2306, password="test", **kwargs):
+    """
+    Start a FakeBEServer on host:port.
+
+    Returns:
+        tuple: (transport, server), close the transport to stop it
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.create_datagram_endpoint(
+        lambda: FakeBEServer(password, **kwargs), local_addr=(host, port)
+    )
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="run a fake BattlEye RCon server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=2306)
+    parser.add_argument("--password", default="test")
+    parser.add_argument("--players", type=int, default=10)
+    args = parser.parse_args()
+
+    async def serve():
+        transport, server = await start_fake_server(
+            args.host,
+            args.port,
+            args.password,
+            players=[f"Survivor{i}" for i in range(args.players)],
+        )
+        print(f"fake BattlEye RCon listening on {args.host}:{args.port}")
+        try:
+            await asyncio.Event().wait()
+        finally:
+            transport.close()
+
+    asyncio.run(serve())
@@ -0,0 +1,235 @@
+import re
+import time
+
+from modules.serverstate import ServerState
+
+
+# (event, literals, pattern, state, message), first matching rule wins.
+# player rules accept the RPT form ('Player "Bob" (id=...) has connected')
+# and BattlEye's ("Player #3 Bob (1.2.3.4:2304) connected"), without the slot
+# every rule lists the literal text it can't match without, so lines that
+# contain none of them are rejected with a single search.
+server_log_rules = [
+    (
+        "ready",
+        ["Waiting for connection"],
+        r"Waiting for connection\.\.\.",
+        ServerState.RUNNING,
+        "Server ready for connections",
+    ),
+    (
+        "version",
+        ["DayZ Console version"],
+        r"DayZ Console version",
+        ServerState.RUNNING,
+        "Server ready for connections",
+    ),
+    (
+        "player_disconnected",
+        ["disconnected"],
+        r'Player (?:#\d+\s+)?"?(?P<player>[^"(]+?)"?\s*'
+        r"(?:\((?:id=(?P<player_id>[^)\s]+))?[^)]*\))?\s*(?:has been )?disconnected",
+        None,
+        "Player disconnected",
+    ),
+    (
+        "player_connected",
+        ["connected"],
+        r'Player (?:#\d+\s+)?"?(?P<player>[^"(]+?)"?\s*'
+        r"(?:\((?:id=(?P<player_id>[^)\s]+))?[^)]*\)\s*)?(?:is |has )?connected"
+        r"(?:\s*\(id=(?P<connect_id>[^)\s]+))?",
+        None,
+        "Player connected",
+    ),
+    (
+        "error",
+        ["ERROR", "CRITICAL", "FATAL"],
+        r"ERROR|CRITICAL|FATAL",
+        ServerState.ERROR,
+        "Server error detected",
+    ),
+    (
+        "timeout",
+        ["Connection with host timed out"],
+        r"Connection with host timed out",
+        ServerState.WARNING,
+        "Connection timeout",
+    ),
+    (
+        "disk",
+        ["No space left on device"],
+        r"No space left on device",
+        ServerState.ERROR,
+        "Disk space issue",
+    ),
+    (
+        "crash",
+        ["Segmentation fault", "Aborted", "Killed"],
+        r"Segmentation fault|Aborted|Killed",
+        ServerState.CRASHED,
+        "Server crash detected",
+    ),
+]
+
+
+class LineClassifier:
+    """
+    Classify server log lines in a single pass.
+
+    All rule literals are compiled into one prefilter, so the common case
+    (a line no rule cares about) costs one regex search. Only lines that
+    hit the prefilter are checked against the rules those literals belong
+    to, in rule order.
+    """
+
+    def __init__(self, rules=None):
+        self.rules = []
+        self.messages = {}
+        self.by_literal = {}
+
+        for index, (event, literals, pattern, state, message) in enumerate(
+            rules or server_log_rules
+        ):
+            self.rules.append((index, event, re.compile(pattern), state))
+            self.messages[event] = message
+            for literal in literals:
+                self.by_literal.setdefault(literal, []).append(index)
+
+        # longest literals first so overlapping ones resolve to the most specific
+        literals = sorted(self.by_literal, key=len, reverse=True)
+        self.prefilter = re.compile("|".join(re.escape(lit) for lit in literals))
+
+    def classify(self, line):
+        """
+        Returns (state, event, captures) for the first rule that matches,
+        or None. state may be None for informational events.
+        """
+        hits = self.prefilter.findall(line)
+        if not hits:
+            return None
+
+        candidates = sorted({index for hit in hits for index in self.by_literal[hit]})
+        for index in candidates:
+            _, event, pattern, state = self.rules[index]
+            match = pattern.search(line)
+            if match:
+                return state, event, match.groupdict()
+
+        return None
+
+    def message(self, event):
+        return self.messages.get(event, event)
+
+
+# line -> expected (event, player, player id), checked by self_check
+regression_lines = {
+    "Player John connected": ("player_connected", "John", None),
+    "Player John disconnected": ("player_disconnected", "John", None),
+    'Player "John" (id=AbC123=) has connected': (
+        "player_connected",
+        "John",
+        "AbC123=",
+    ),
+    'Player "John" (id=AbC123= pos=<1.0, 2.0, 3.0>) has been disconnected': (
+        "player_disconnected",
+        "John",
+        "AbC123=",
+    ),
+    'Player "John Doe" is connected (id=AbC123=)': (
+        "player_connected",
+        "John Doe",
+        "AbC123=",
+    ),
+    "Player #3 Bob (1.2.3.4:2304) connected": ("player_connected", "Bob", None),
+    "Player #3 Bob disconnected": ("player_disconnected", "Bob", None),
+    "Player #12 Bob Smith (10.0.0.1:2304) connected": (
+        "player_connected",
+        "Bob Smith",
+        None,
+    ),
+    "Waiting for connection...": ("ready", None, None),
+}
+
+
+def self_check(classifier=None):
+    """
+    Classify regression_lines.
+
+    Returns:
+        list: (line, expected, got) for every line that didn't match
+    """
+    classifier = classifier or LineClassifier()
+    failures = []
+    for line, expected in regression_lines.items():
+        result = classifier.classify(line)
+        got = None
+        if result:
+            captures = result[2]
+            got = (
+                result[1],
+                captures.get("player"),
+                captures.get("player_id") or captures.get("connect_id"),
+            )
+        if got != expected:
+            failures.append((line, expected, got))
+    return failures
+
+
+def benchmark(lines=None, repeat=20):
+    """
+    Measure classifier throughput in lines/sec against the previous
+    approach (substring checks plus one re.search per pattern).
+    """
+    if lines is None:
+        lines = [
+            "12:00:01.123 Loading script module 3_Game",
+            "Compiling script file scripts/4_World/entities/manbase.c",
+            "   0.452 [Scripts] Creating instance of class PlayerBase",
+            "Warning: Config entry cfgVehicles/Foo not found",
+            "Updating base class Inventory_Base->ItemBase for Hatchet",
+            " 12:00:02 Mission read from bank.",
+            "NetServer: trying port 2302...",
+            "[CE][Storage] Restoring file \"types.bin\" 1 ...",
+            "Player John connected",
+            "Player John disconnected",
+            "Player #3 Bob (1.2.3.4:2304) connected",
+            "Waiting for connection...",
+            "SCRIPT ERROR: Null pointer access in 'Foo'",
+        ] * 1000
+
+    classifier = LineClassifier()
+    legacy = [
+        (re.compile(pattern), state) for _, _, pattern, state, _ in server_log_rules
+    ]
+
+    def run_legacy():
+        for line in lines:
+            if "connected" in line and "Player" in line:
+                pass
+            for pattern, state in legacy:
+                if pattern.search(line):
+                    break
+            line.strip()
+            line.strip()
+
+    def run_classifier():
+        classify = classifier.classify
+        for line in lines:
+            classify(line.strip())
+
+    results = {}
+    for name, func in (("legacy", run_legacy), ("classifier", run_classifier)):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        elapsed = time.perf_counter() - start
+        results[name] = len(lines) * repeat / elapsed
+
+    return results
+
+
+if __name__ == "__main__":
+    for line, expected, got in self_check():
+        print(f"MISMATCH {line!r}: expected {expected}, got {got}")
+    for name, rate in benchmark().items():
+        print(f"{name}: {rate:,.0f} lines/sec")
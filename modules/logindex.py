@@ -0,0 +1,289 @@
+import logging
+import os
+import re
+import sqlite3
+import datetime
+
+from fnmatch import fnmatch
+
+from modules.logclassifier import LineClassifier, server_log_rules
+from modules.admstats import adm_rules
+
+log = logging.getLogger(__name__)
+
+
+# DayZ names its logs DayZServer_x64_<date>_<time>.RPT/.ADM
+file_date_pattern = re.compile(r"(\d{4})-(\d{2})-(\d{2})_(\d{2})-(\d{2})-(\d{2})")
+
+# "12:00:01.123 ..." (RPT) or "12:00:01 | ..." (ADM)
+profile_time_pattern = re.compile(r"^\s*(\d{1,2}):(\d{2}):(\d{2})")
+
+# server output in console.log, "10-18 20:13.19 - INFO - servers.py - [a][INFO] ..."
+# RPT/ADM lines echoed there are skipped, they're indexed from their own files
+console_line_pattern = re.compile(
+    r"^(\d{2})-(\d{2}) (\d{2}):(\d{2})\.(\d{2}) - \w+ - \S+ - "
+    r"\[([\w.-]+)\]\[(?:INFO|ERROR)\]"
+)
+
+# server rules plus the ADM activity rules
+index_classifier = LineClassifier(server_log_rules + adm_rules)
+
+
+class LogIndex:
+    """
+    Compact on-disk index of notable log lines.
+
+    Each classified line becomes a posting (instance, time, event, player,
+    file, offset) in SQLite, indexed by instance, player and event over
+    time, so lookups never scan the logs themselves. Files are indexed
+    incrementally from the last offset seen, and the offset of each
+    posting lets the original line be read back on demand. Queries with
+    only a time range use the plain timestamp index.
+    """
+
+    def __init__(self, path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS postings (
+                instance TEXT NOT NULL,
+                timestamp REAL NOT NULL,
+                event TEXT NOT NULL,
+                player TEXT,
+                path TEXT NOT NULL,
+                offset INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS postings_instance_time
+                ON postings (instance, timestamp);
+            CREATE INDEX IF NOT EXISTS postings_player_time
+                ON postings (player COLLATE NOCASE, timestamp);
+            CREATE INDEX IF NOT EXISTS postings_event_time
+                ON postings (event, timestamp);
+            CREATE INDEX IF NOT EXISTS postings_time
+                ON postings (timestamp);
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                inode INTEGER,
+                offset INTEGER,
+                last_time REAL
+            );
+            """
+        )
+        self.db.commit()
+
+    def index_file(self, path, instance=None):
+        """
+        Index whatever was appended to path since the last call.
+
+        Args:
+            path (str): An RPT/ADM file, or dman's console.log
+            instance (str): Instance a profile log belongs to, console.log
+                lines carry their own
+
+        Returns:
+            int: Number of postings added
+        """
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            return 0
+
+        row = self.db.execute(
+            "SELECT inode, offset, last_time FROM files WHERE path = ?", (path,)
+        ).fetchone()
+        inode, offset, last_time = row if row else (None, 0, None)
+        if inode != stat.st_ino or stat.st_size < offset:
+            # new or rotated file
+            offset, last_time = 0, None
+        if stat.st_size == offset:
+            return 0
+
+        if last_time is None:
+            match = file_date_pattern.search(os.path.basename(path))
+            if match:
+                last_time = datetime.datetime(*map(int, match.groups())).timestamp()
+            else:
+                last_time = stat.st_mtime
+
+        postings = []
+        with open(path, "rb") as f:
+            f.seek(offset)
+            for raw in f:
+                if not raw.endswith(b"\n"):
+                    # finish the line next time
+                    break
+
+                line = raw.decode("utf-8", errors="replace")
+                line_instance, line_time = instance, None
+                if instance is None:
+                    match = console_line_pattern.match(line)
+                    if match:
+                        month, day, hour, minute, second = map(int, match.groups()[:5])
+                        line_instance = match.group(6)
+                        year = datetime.datetime.fromtimestamp(last_time).year
+                        line_time = datetime.datetime(
+                            year, month, day, hour, minute, second
+                        ).timestamp()
+                else:
+                    match = profile_time_pattern.match(line)
+                    if match:
+                        line_time = _time_after(last_time, *map(int, match.groups()))
+
+                if line_time is not None:
+                    last_time = line_time
+
+                if line_instance:
+                    result = index_classifier.classify(line)
+                    if result:
+                        postings.append(
+                            (
+                                line_instance,
+                                last_time,
+                                result[1],
+                                (result[2].get("player") or "").strip() or None,
+                                path,
+                                offset,
+                            )
+                        )
+                offset += len(raw)
+
+        self.db.executemany(
+            "INSERT INTO postings VALUES (?, ?, ?, ?, ?, ?)", postings
+        )
+        self.db.execute(
+            "INSERT OR REPLACE INTO files VALUES (?, ?, ?, ?)",
+            (path, stat.st_ino, offset, last_time),
+        )
+        self.db.commit()
+        return len(postings)
+
+    def index_app(self, app_path, console_path="console.log"):
+        """Index every instance's RPT/ADM files and console.log"""
+        added = 0
+        servers_path = os.path.join(app_path, "servers")
+        if os.path.isdir(servers_path):
+            for instance in os.listdir(servers_path):
+                profiles_path = os.path.join(servers_path, instance, "profiles")
+                if not os.path.isdir(profiles_path):
+                    continue
+                for file in sorted(os.listdir(profiles_path)):
+                    if fnmatch(file, "*.RPT") or fnmatch(file, "*.ADM"):
+                        added += self.index_file(
+                            os.path.join(profiles_path, file), instance
+                        )
+
+        added += self.index_file(os.path.abspath(console_path))
+        return added
+
+    def query(
+        self, instance=None, player=None, event=None, start=None, end=None, limit=100
+    ):
+        """
+        Look up postings, oldest first.
+
+        Args:
+            instance (str): Only this instance
+            player (str): Only lines about this player (case-insensitive)
+            event (str): Only this event type, e.g. "player_connected"
+            start (datetime): Only at or after this time
+            end (datetime): Only before this time
+            limit (int): At most this many postings
+
+        Returns:
+            list: dicts with instance, timestamp, event, player, path, offset
+        """
+        clauses, params = [], []
+        for column, value in (("instance", instance), ("event", event)):
+            if value is not None:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        if player is not None:
+            clauses.append("player = ? COLLATE NOCASE")
+            params.append(player)
+        if start is not None:
+            clauses.append("timestamp >= ?")
+            params.append(start.timestamp())
+        if end is not None:
+            clauses.append("timestamp < ?")
+            params.append(end.timestamp())
+
+        sql = "SELECT instance, timestamp, event, player, path, offset FROM postings"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY timestamp LIMIT ?"
+        params.append(int(limit))
+
+        return [
+            {
+                "instance": row[0],
+                "timestamp": datetime.datetime.fromtimestamp(row[1]),
+                "event": row[2],
+                "player": row[3],
+                "path": row[4],
+                "offset": row[5],
+            }
+            for row in self.db.execute(sql, params)
+        ]
+
+    def close(self):
+        self.db.close()
+
+
+def _time_after(previous, hour, minute, second):
+    """Timestamp for a time of day, rolling over midnight after previous"""
+    base = datetime.datetime.fromtimestamp(previous)
+    moment = base.replace(hour=hour, minute=minute, second=second, microsecond=0)
+    if moment.timestamp() < previous - 3600:
+        moment += datetime.timedelta(days=1)
+    return moment.timestamp()
+
+
+def read_line(path, offset):
+    """Read back the original line of a posting"""
+    try:
+        with open(path, "rb") as f:
+            f.seek(offset)
+            return f.readline().decode("utf-8", errors="replace").rstrip()
+    except FileNotFoundError:
+        return ""
+
+
+def open_index(app_path):
+    return LogIndex(os.path.join(app_path, "log_index.db"))
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="search dman's log index")
+    parser.add_argument("--app", default="app", help="dman app directory")
+    parser.add_argument("--instance")
+    parser.add_argument("--player")
+    parser.add_argument("--event")
+    parser.add_argument("--since", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.datetime.fromisoformat)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument(
+        "--no-update", action="store_true", help="don't index new log data first"
+    )
+    args = parser.parse_args()
+
+    index = open_index(args.app)
+    if not args.no_update:
+        index.index_app(args.app)
+
+    for posting in index.query(
+        instance=args.instance,
+        player=args.player,
+        event=args.event,
+        start=args.since,
+        end=args.until,
+        limit=args.limit,
+    ):
+        print(
+            f"{posting['timestamp']:%Y-%m-%d %H:%M:%S} [{posting['instance']}] "
+            f"{posting['event']}: {read_line(posting['path'], posting['offset'])}"
+        )
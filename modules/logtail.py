@@ -0,0 +1,263 @@
+import logging
+import os
+import json
+import time
+import errno
+import asyncio
+import ctypes
+import ctypes.util
+
+from fnmatch import fnmatch
+
+log = logging.getLogger(__name__)
+
+
+# inotify flags from linux/inotify.h
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+watch_mask = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+# log files DayZ writes into the profiles directory, by kind
+profile_log_patterns = {"RPT": "*.RPT", "ADM": "*.ADM"}
+
+
+class Inotify:
+    """
+    Minimal inotify binding through ctypes.
+
+    Only used as a wake-up signal, events aren't decoded. Raises OSError
+    when inotify isn't available so callers can fall back to polling.
+    """
+
+    def __init__(self, path):
+        libc_name = ctypes.util.find_library("c")
+        if not libc_name:
+            raise OSError(errno.ENOSYS, "libc not found")
+
+        libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(libc, "inotify_init1"):
+            raise OSError(errno.ENOSYS, "inotify not available")
+
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            err = ctypes.get_errno()
+            raise OSError(err, os.strerror(err))
+
+        wd = libc.inotify_add_watch(self.fd, os.fsencode(path), watch_mask)
+        if wd < 0:
+            err = ctypes.get_errno()
+            os.close(self.fd)
+            raise OSError(err, os.strerror(err))
+
+    def drain(self):
+        """Discard pending events"""
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class ProfileTailer:
+    """
+    Follow the newest RPT and ADM file in an instance's profiles directory.
+
+    New data is picked up on inotify events, or every poll_interval when
+    inotify isn't available. When DayZ starts a new log file on restart,
+    the rest of the old one is read before switching over. Byte offsets
+    are persisted so a dman restart resumes where it left off instead of
+    rereading files, and files already present without a saved offset are
+    followed from their end.
+
+    callback(lines, kind) gets each batch of complete lines with the
+    kind ("RPT" or "ADM") they came from.
+    """
+
+    def __init__(
+        self,
+        profiles_path,
+        offsets_path,
+        callback,
+        patterns=None,
+        poll_interval=1.0,
+        max_read=1024 * 1024,
+        save_interval=5.0,
+    ):
+        self.profiles_path = profiles_path
+        self.offsets_path = offsets_path
+        self.callback = callback
+        self.patterns = patterns or profile_log_patterns
+        self.poll_interval = poll_interval
+        self.max_read = max_read
+        self.save_interval = save_interval
+
+        # kind -> {"path", "inode", "offset"}
+        self.files = self._load_offsets()
+        self.started = time.time()
+        self.last_save = 0.0
+        self.dirty = False
+
+    def _load_offsets(self):
+        if not os.path.exists(self.offsets_path):
+            return {}
+        try:
+            with open(self.offsets_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning(f"failed to load log offsets {self.offsets_path}: {e}")
+            return {}
+
+    def save_offsets(self):
+        if not self.dirty:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.offsets_path), exist_ok=True)
+            tmp_path = f"{self.offsets_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(self.files, f)
+            os.replace(tmp_path, self.offsets_path)
+            self.dirty = False
+            self.last_save = time.monotonic()
+        except Exception as e:
+            log.warning(f"failed to save log offsets {self.offsets_path}: {e}")
+
+    def _newest(self, pattern):
+        newest = None
+        try:
+            with os.scandir(self.profiles_path) as entries:
+                for entry in entries:
+                    if not fnmatch(entry.name, pattern):
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except OSError:
+                        continue
+                    if newest is None or stat.st_mtime > newest[1].st_mtime:
+                        newest = (entry.path, stat)
+        except FileNotFoundError:
+            pass
+        return newest
+
+    def _read(self, kind, tracked):
+        """Hand new complete lines of a tracked file to the callback"""
+        try:
+            stat = os.stat(tracked["path"])
+        except FileNotFoundError:
+            return False
+
+        if stat.st_ino != tracked["inode"] or stat.st_size < tracked["offset"]:
+            # replaced or truncated in place
+            tracked["inode"] = stat.st_ino
+            tracked["offset"] = 0
+
+        if stat.st_size == tracked["offset"]:
+            return False
+
+        with open(tracked["path"], "rb") as f:
+            f.seek(tracked["offset"])
+            data = f.read(self.max_read)
+
+        newline = data.rfind(b"\n")
+        if newline != -1:
+            tracked["offset"] += newline + 1
+            data = data[:newline]
+        elif len(data) < self.max_read:
+            # wait for the rest of the line
+            return False
+        else:
+            # one line longer than max_read, hand it over in pieces
+            tracked["offset"] += len(data)
+        self.dirty = True
+
+        lines = data.decode("utf-8", errors="replace").split("\n")
+        try:
+            self.callback([line.rstrip("\r") for line in lines], kind)
+        except Exception as e:
+            log.error(f"Error processing {kind} lines: {e}")
+
+        # more to read if the file grew past what we just read
+        return stat.st_size > tracked["offset"]
+
+    def scan(self):
+        """
+        Read whatever is new in every followed file. Returns True when a
+        file still has unread data.
+        """
+        more = False
+        for kind, pattern in self.patterns.items():
+            tracked = self.files.get(kind)
+            newest = self._newest(pattern)
+
+            if newest and (not tracked or newest[0] != tracked["path"]):
+                if tracked:
+                    # finish the previous file before rotating
+                    while self._read(kind, tracked):
+                        pass
+                    log.info(f"{kind} log rotated to {os.path.basename(newest[0])}")
+
+                path, stat = newest
+                # a file that was already there when we started, with nothing
+                # followed before it, is picked up from its end
+                if tracked or stat.st_mtime >= self.started:
+                    offset = 0
+                else:
+                    offset = stat.st_size
+                tracked = self.files[kind] = {
+                    "path": path,
+                    "inode": stat.st_ino,
+                    "offset": offset,
+                }
+                self.dirty = True
+
+            if tracked:
+                more = self._read(kind, tracked) or more
+
+        if self.dirty and time.monotonic() - self.last_save >= self.save_interval:
+            self.save_offsets()
+        return more
+
+    async def run(self):
+        """Tail until cancelled"""
+        os.makedirs(self.profiles_path, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        wakeup = asyncio.Event()
+
+        try:
+            inotify = Inotify(self.profiles_path)
+            loop.add_reader(inotify.fd, wakeup.set)
+            log.debug(f"watching {self.profiles_path} with inotify")
+        except OSError as e:
+            inotify = None
+            log.debug(f"inotify unavailable ({e}), polling {self.profiles_path}")
+
+        try:
+            while True:
+                if self.scan():
+                    # keep draining a backlog but let other tasks run
+                    await asyncio.sleep(0)
+                    continue
+
+                try:
+                    # with inotify the timeout is only a safety net
+                    timeout = self.poll_interval * (5 if inotify else 1)
+                    await asyncio.wait_for(wakeup.wait(), timeout=timeout)
+                except asyncio.TimeoutError:
+                    pass
+
+                wakeup.clear()
+                if inotify:
+                    inotify.drain()
+        finally:
+            if inotify:
+                loop.remove_reader(inotify.fd)
+                inotify.close()
+            self.save_offsets()
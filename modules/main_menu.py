@@ -7,10 +7,28 @@ from rich.table import Table
 from rich.panel import Panel
 from rich.box import SIMPLE
 
+from modules.admstats import fleet_stats
+
 
 log = logging.getLogger(__name__)
 
 
+def hour_activity(server):
+    """
+    Joins and kills in the last hour, the menu's activity columns.
+
+    Returns:
+        tuple: (joins, kills), blank until the server has seen any activity
+    """
+    stats = fleet_stats.get(server)
+    if stats is None:
+        return "", ""
+    return (
+        stats.counters["joins"]["1h"].total(),
+        stats.counters["kills"]["1h"].total(),
+    )
+
+
 def get_console_size():
     # gather raw output from console
     # console_width = check_output(["stty", "size"], stdout=PIPE)
@@ -65,11 +83,12 @@ def main_menu(server_states):
     )
 
     # Calculate relative column widths based on console width
-    server_width = int(w * 0.30)  # 30% of width
-    state_width = int(w * 0.20)  # 15% of width
-    players_width = int(w * 0.10)  # 15% of width
-    pid_width = int(w * 0.15)  # 15% of width
-    port_width = int(w * 0.15)  # 15% of width
+    server_width = int(w * 0.25)  # 25% of width
+    state_width = int(w * 0.15)  # 15% of width
+    players_width = int(w * 0.10)  # 10% of width
+    pid_width = int(w * 0.10)  # 10% of width
+    port_width = int(w * 0.10)  # 10% of width
+    activity_width = int(w * 0.10)  # 10% of width each
 
     # Add columns with specified widths
     table.add_column("Server", style="", width=server_width, no_wrap=True)
@@ -86,6 +105,20 @@ def main_menu(server_states):
         width=players_width,
         no_wrap=True,
     )
+    table.add_column(
+        "Joins 1h",
+        style="white",
+        justify="right",
+        width=activity_width,
+        no_wrap=True,
+    )
+    table.add_column(
+        "Kills 1h",
+        style="white",
+        justify="right",
+        width=activity_width,
+        no_wrap=True,
+    )
     table.add_column(
         "State", style="", justify="right", width=state_width, no_wrap=True
     )
@@ -97,6 +130,8 @@ def main_menu(server_states):
         players = data["players"]
         state = data["state"]
 
+        joins, kills = hour_activity(server)
+
         # Conditional styling based on state
         state_text = str(state).replace("ServerState.", "")
         if state_text == "STARTING":
@@ -126,6 +161,8 @@ def main_menu(server_states):
             str(pid),
             str(port),
             str(players),
+            str(joins),
+            str(kills),
             f"[{state_style}]{state_text}[/{state_style}]",
         )
 
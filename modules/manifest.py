@@ -0,0 +1,160 @@
+import logging
+import os
+import json
+import hashlib
+
+from modules.clone import Cloner, is_owned
+
+log = logging.getLogger(__name__)
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Content hash used to tell changed files apart"""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def load_manifest(path):
+    """Load a persisted manifest, empty if missing or unreadable"""
+    if not os.path.exists(path):
+        return {}
+
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except Exception as e:
+        log.warning(f"failed to load manifest {path}: {e}")
+        return {}
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f)
+    os.replace(tmp_path, path)
+
+
+def _entry(path, stat, previous, reference=None):
+    """
+    Build a manifest entry, reusing a known hash when size and mtime match
+    either the previous manifest or the reference (template) entry.
+    """
+    size = stat.st_size
+    mtime = int(stat.st_mtime)
+
+    for known in (previous, reference):
+        if known and known["size"] == size and known["mtime"] == mtime:
+            return {"size": size, "mtime": mtime, "hash": known["hash"]}
+
+    return {"size": size, "mtime": mtime, "hash": hash_file(path)}
+
+
+def build_template_manifest(root, previous=None):
+    """
+    Walk the template and record (size, mtime, hash) for every shared file.
+
+    Instance-owned files are left out, they are never synced. Only files
+    whose size or mtime changed since the previous manifest are hashed.
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for dir_root, dirs, files in os.walk(root):
+        for file in files:
+            path = os.path.join(dir_root, file)
+            rel_path = os.path.relpath(path, root).replace(os.sep, "/")
+            if is_owned(rel_path) or os.path.islink(path):
+                continue
+
+            manifest[rel_path] = _entry(
+                path, os.stat(path), previous.get(rel_path)
+            )
+
+    return manifest
+
+
+def build_instance_manifest(root, template_manifest, previous=None):
+    """
+    Record the state of the template-managed files in an instance.
+
+    Only paths the template ships or that were synced before are looked
+    at, so mods and other instance content are never walked. Files that
+    still match the template's size and mtime reuse its hash.
+    """
+    previous = previous or {}
+    manifest = {}
+
+    for rel_path in set(template_manifest) | set(previous):
+        path = os.path.join(root, rel_path)
+        try:
+            stat = os.stat(path)
+        except FileNotFoundError:
+            continue
+
+        manifest[rel_path] = _entry(
+            path, stat, previous.get(rel_path), template_manifest.get(rel_path)
+        )
+
+    return manifest
+
+
+def diff_manifests(source, target):
+    """
+    Compare a source manifest against a target.
+
+    Returns (changed, removed): paths to (re)place in the target and paths
+    the target tracks that the source no longer ships.
+    """
+    changed = [
+        rel_path
+        for rel_path, entry in source.items()
+        if target.get(rel_path, {}).get("hash") != entry["hash"]
+    ]
+    removed = [rel_path for rel_path in target if rel_path not in source]
+    return changed, removed
+
+
+def sync_instance(
+    template_path, template_manifest, instance_path, manifest_path, mode="auto"
+):
+    """
+    Bring an instance in line with the template by touching only the files
+    whose hashes differ. Changed files are relinked from the template (or
+    copied when linking isn't possible) and files dropped from the template
+    are removed.
+
+    Returns:
+        dict: {"changed": int, "removed": int, "bytes": int}
+    """
+    previous = load_manifest(manifest_path)
+    instance_manifest = build_instance_manifest(
+        instance_path, template_manifest, previous
+    )
+    changed, removed = diff_manifests(template_manifest, instance_manifest)
+
+    cloner = Cloner(mode)
+    moved_bytes = 0
+
+    for rel_path in changed:
+        src = os.path.join(template_path, rel_path)
+        dst = os.path.join(instance_path, rel_path)
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+
+        cloner.link(src, dst)
+        moved_bytes += template_manifest[rel_path]["size"]
+        instance_manifest[rel_path] = dict(template_manifest[rel_path])
+
+    for rel_path in removed:
+        try:
+            os.remove(os.path.join(instance_path, rel_path))
+        except FileNotFoundError:
+            pass
+        instance_manifest.pop(rel_path, None)
+
+    save_manifest(manifest_path, instance_manifest)
+
+    return {"changed": len(changed), "removed": len(removed), "bytes": moved_bytes}
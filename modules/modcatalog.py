@@ -0,0 +1,149 @@
+import logging
+import os
+import json
+
+from modules.vdf import read_workshop_items
+
+log = logging.getLogger(__name__)
+
+
+# one shared catalog per app path
+_catalogs = {}
+
+
+def read_mod_name(meta_path, default):
+    """Pull the display name out of a mod's meta.cpp"""
+    try:
+        with open(meta_path) as cpp:
+            for line in cpp:
+                if "name" in line:
+                    return (
+                        line.replace('"', "")
+                        .replace(";", "")
+                        .replace("name =", "")
+                        .strip()
+                    )
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning(f"error reading meta.cpp {meta_path}: {e}")
+
+    return default
+
+
+class ModCatalog:
+    """
+    Persisted index of downloaded workshop mods.
+
+    Maps mod id -> name, path, size, manifest and directory mtime. A
+    refresh only opens meta.cpp for mods whose directory mtime or
+    installed manifest changed, so startup costs one scandir plus the
+    changed mods instead of a file open per mod.
+    """
+
+    def __init__(self, app_path):
+        self.steamapps_path = os.path.join(app_path, "steamcmd", "steamapps")
+        self.content_path = os.path.join(
+            self.steamapps_path, "workshop", "content", "221100"
+        )
+        self.index_path = os.path.join(app_path, "mod_catalog.json")
+        self.mods = {}
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.index_path):
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                self.mods = json.load(f)
+        except Exception as e:
+            log.warning(f"failed to load mod catalog: {e}")
+            self.mods = {}
+
+    def _save(self):
+        tmp_path = f"{self.index_path}.tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(self.mods, f)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            log.warning(f"failed to save mod catalog: {e}")
+
+    def _index(self, mod_id, path, mtime, item):
+        self.mods[mod_id] = {
+            "name": read_mod_name(os.path.join(path, "meta.cpp"), mod_id),
+            "path": path,
+            "size": item.get("size", 0),
+            "manifest": item.get("manifest", ""),
+            "mtime": mtime,
+        }
+
+    def refresh(self, force_ids=()):
+        """
+        Revalidate the index against the workshop content directory.
+
+        Args:
+            force_ids (iterable): Mod ids to re-read even if unchanged,
+                e.g. right after they were downloaded
+
+        Returns:
+            ModCatalog: self, for chaining
+        """
+        os.makedirs(self.content_path, exist_ok=True)
+        installed_items = read_workshop_items(self.steamapps_path)
+        force_ids = set(force_ids)
+
+        seen = set()
+        changed = False
+        with os.scandir(self.content_path) as entries:
+            for entry in entries:
+                try:
+                    if not entry.is_dir():
+                        continue
+                    mtime = entry.stat().st_mtime
+                except OSError:
+                    # dangling symlink
+                    continue
+
+                mod_id = entry.name
+                seen.add(mod_id)
+                item = installed_items.get(mod_id, {})
+                known = self.mods.get(mod_id)
+
+                if (
+                    known
+                    and mod_id not in force_ids
+                    and known["mtime"] == mtime
+                    and known["manifest"] == item.get("manifest", "")
+                ):
+                    continue
+
+                self._index(mod_id, entry.path, mtime, item)
+                changed = True
+
+        for mod_id in set(self.mods) - seen:
+            del self.mods[mod_id]
+            changed = True
+
+        if changed:
+            self._save()
+        return self
+
+    def name(self, mod_id):
+        return self.mods.get(mod_id, {}).get("name", mod_id)
+
+    def by_id(self):
+        """mod_id -> mod_name for every indexed mod"""
+        return {mod_id: mod["name"] for mod_id, mod in self.mods.items()}
+
+    def by_name(self):
+        """mod_name -> mod_id for every indexed mod"""
+        return {mod["name"]: mod_id for mod_id, mod in self.mods.items()}
+
+
+def get_catalog(app_path):
+    """Return the shared, refreshed catalog for app_path"""
+    catalog = _catalogs.get(app_path)
+    if catalog is None:
+        catalog = _catalogs[app_path] = ModCatalog(app_path)
+    return catalog.refresh()
@@ -0,0 +1,182 @@
+import logging
+import os
+import json
+
+from modules.clone import clone_tree, remove_path
+
+log = logging.getLogger(__name__)
+
+
+# versions of each mod live under <instance>/.mods/<mod_id>/<version>
+STAGING_DIR = ".mods"
+
+
+def staging_path(instance_path, mod_id, version=None):
+    path = os.path.join(instance_path, STAGING_DIR, mod_id)
+    return os.path.join(path, version) if version else path
+
+
+def _load_versions(instance_path, mod_id):
+    path = os.path.join(staging_path(instance_path, mod_id), "versions.json")
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {"current": None, "previous": None}
+
+
+def _save_versions(instance_path, mod_id, versions):
+    path = os.path.join(staging_path(instance_path, mod_id), "versions.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(versions, f)
+    os.replace(tmp_path, path)
+
+
+def active_version(instance_path, mod_name):
+    """Return (mod_id, version) that @mod_name points at, or None"""
+    link_path = os.path.join(instance_path, f"@{mod_name}")
+    if not os.path.islink(link_path):
+        return None
+
+    parts = os.path.normpath(os.readlink(link_path)).split(os.sep)
+    if len(parts) >= 3 and parts[-3] == STAGING_DIR:
+        return parts[-2], parts[-1]
+    return None
+
+
+def is_staged(instance_path, mod_id, version):
+    """True if the version is staged as a real directory tree"""
+    path = staging_path(instance_path, mod_id, version)
+    return os.path.isdir(path) and not os.path.islink(path)
+
+
+def stage_mod(instance_path, mod_id, version, workshop_mod_path, deploy_mode="auto"):
+    """
+    Stage a mod version next to the live one.
+
+    The version is always a real tree (reflinked, hardlinked or copied
+    per deploy_mode), never a symlink to the workshop folder, which
+    steamcmd rewrites in place on the next update. Symlinks are only used
+    to switch @mod_name between versions.
+
+    Content is deployed into <version>.partial and renamed into place only
+    once it is complete, so an existing version directory is always whole.
+    Returns the staged version path.
+    """
+    if deploy_mode == "symlink":
+        # older configs, a symlinked version would change under the server
+        deploy_mode = "auto"
+
+    version_path = staging_path(instance_path, mod_id, version)
+    if is_staged(instance_path, mod_id, version):
+        return version_path
+
+    os.makedirs(staging_path(instance_path, mod_id), exist_ok=True)
+
+    partial_path = f"{version_path}.partial"
+    if os.path.lexists(partial_path):
+        # left over from an interrupted run
+        remove_path(partial_path)
+
+    result = clone_tree(workshop_mod_path, partial_path, mode=deploy_mode, owned=None)
+    result = result.summary()
+    log.debug(f"staged mod {mod_id} version {version}: {result}")
+
+    if os.path.lexists(version_path):
+        # symlinked into the workshop by an older dman, replace it
+        os.remove(version_path)
+
+    # completion barrier, the version only exists once fully staged
+    os.replace(partial_path, version_path)
+    return version_path
+
+
+def activate_mod(instance_path, mod_name, mod_id, version):
+    """
+    Point @mod_name at a staged version with a single atomic rename.
+
+    The version that was live before is kept for rollback and anything
+    older is pruned.
+    """
+    link_path = os.path.join(instance_path, f"@{mod_name}")
+    target = os.path.join(STAGING_DIR, mod_id, version)
+    versions = _load_versions(instance_path, mod_id)
+
+    current = active_version(instance_path, mod_name)
+    if current == (mod_id, version):
+        return False
+
+    if os.path.isdir(link_path) and not os.path.islink(link_path):
+        # one-off migration of a pre-staging copy, keep it as the rollback
+        legacy = staging_path(instance_path, mod_id, "legacy")
+        if os.path.lexists(legacy):
+            remove_path(legacy)
+        os.replace(link_path, legacy)
+        current = (mod_id, "legacy")
+
+    tmp_link = f"{link_path}.tmp"
+    if os.path.lexists(tmp_link):
+        os.remove(tmp_link)
+    os.symlink(target, tmp_link, target_is_directory=True)
+    os.replace(tmp_link, link_path)
+
+    previous = current[1] if current and current[0] == mod_id else None
+    versions = {"current": version, "previous": previous or versions.get("current")}
+    _save_versions(instance_path, mod_id, versions)
+
+    prune_versions(
+        instance_path, mod_id, keep=(versions["current"], versions["previous"])
+    )
+    log.info(f"activated mod {mod_name} version {version}")
+    return True
+
+
+def rollback_mod(instance_path, mod_name):
+    """Swap @mod_name back to its previous staged version"""
+    current = active_version(instance_path, mod_name)
+    if not current:
+        log.warning(f"mod {mod_name} is not staged, nothing to roll back")
+        return False
+
+    mod_id, version = current
+    previous = _load_versions(instance_path, mod_id).get("previous")
+    if not previous or not os.path.lexists(
+        staging_path(instance_path, mod_id, previous)
+    ):
+        log.warning(f"no previous version of mod {mod_name} to roll back to")
+        return False
+
+    return activate_mod(instance_path, mod_name, mod_id, previous)
+
+
+def prune_versions(instance_path, mod_id, keep):
+    """Remove staged versions of a mod that aren't in keep"""
+    mod_path = staging_path(instance_path, mod_id)
+    for entry in os.listdir(mod_path):
+        if entry in keep or entry == "versions.json":
+            continue
+        try:
+            remove_path(os.path.join(mod_path, entry))
+        except Exception as e:
+            log.warning(f"failed to prune mod {mod_id} version {entry}: {e}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(
+        description="roll an instance's mod back to its previous staged version"
+    )
+    parser.add_argument("instance", help="instance name")
+    parser.add_argument("mod", help="mod name, without the @")
+    parser.add_argument("--app", default="app", help="dman app directory")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    instance_path = os.path.join(args.app, "servers", args.instance)
+    if rollback_mod(instance_path, args.mod):
+        mod_id, version = active_version(instance_path, args.mod)
+        print(f"@{args.mod} now at version {version}, restart the instance to use it")
+    else:
+        raise SystemExit(1)
@@ -0,0 +1,140 @@
+import logging
+import time
+
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+def player_key(name):
+    """Names are matched case-insensitively, DayZ doesn't allow duplicates"""
+    return name.strip().lower()
+
+
+class PlayerRegistry:
+    """
+    Who is online where.
+
+    Sessions are keyed by player name per instance, with reverse indexes
+    by name and by player id across instances, so online checks, counts
+    and "where is player X" are dictionary lookups. Finished sessions
+    are kept in a bounded history per instance for durations.
+    """
+
+    def __init__(self, history_size=500):
+        self.history_size = history_size
+        # instance -> key -> session
+        self.online = {}
+        # key -> instance, id -> key
+        self.locations = {}
+        self.ids = {}
+        # instance -> recent finished sessions
+        self.history = {}
+
+    def _sessions(self, instance):
+        return self.online.setdefault(instance, {})
+
+    def connect(self, instance, name, player_id=None, when=None):
+        """Start a session, a repeated connect just updates the known id"""
+        key = player_key(name)
+        sessions = self._sessions(instance)
+
+        session = sessions.get(key)
+        if session is None:
+            # a player can only be on one server at a time
+            elsewhere = self.locations.get(key)
+            if elsewhere and elsewhere != instance:
+                self.disconnect(elsewhere, name, when=when)
+
+            session = sessions[key] = {
+                "name": name.strip(),
+                "id": None,
+                "since": when or time.time(),
+            }
+            self.locations[key] = instance
+
+        if player_id and not session["id"]:
+            session["id"] = player_id
+            self.ids[player_id] = key
+        return session
+
+    def disconnect(self, instance, name, when=None):
+        """
+        End a session.
+
+        Returns:
+            float: Session duration in seconds, None if the player wasn't
+                known to be online
+        """
+        key = player_key(name)
+        session = self._sessions(instance).pop(key, None)
+        if session is None:
+            return None
+
+        if self.locations.get(key) == instance:
+            del self.locations[key]
+        if session["id"]:
+            self.ids.pop(session["id"], None)
+
+        session["until"] = when or time.time()
+        history = self.history.setdefault(instance, deque(maxlen=self.history_size))
+        history.append(session)
+        return session["until"] - session["since"]
+
+    def is_online(self, instance, name):
+        return player_key(name) in self.online.get(instance, {})
+
+    def count(self, instance):
+        return len(self.online.get(instance, {}))
+
+    def players(self, instance):
+        """Online sessions for an instance"""
+        return list(self.online.get(instance, {}).values())
+
+    def where(self, player):
+        """Instance a player (name or id) is online on, or None"""
+        key = self.ids.get(player, player_key(player))
+        return self.locations.get(key)
+
+    def duration(self, instance, name, now=None):
+        """Seconds the player has been online, None if offline"""
+        session = self.online.get(instance, {}).get(player_key(name))
+        if session is None:
+            return None
+        return (now or time.time()) - session["since"]
+
+    def reconcile(self, instance, names):
+        """
+        Make an instance's sessions match an authoritative player list,
+        e.g. from RCON. Returns (added, removed) names.
+        """
+        listed = {player_key(name): name for name in names}
+        sessions = self._sessions(instance)
+
+        removed = [
+            session["name"]
+            for key, session in list(sessions.items())
+            if key not in listed
+        ]
+        for name in removed:
+            self.disconnect(instance, name)
+
+        added = [name for key, name in listed.items() if key not in sessions]
+        for name in added:
+            self.connect(instance, name)
+
+        if added or removed:
+            log.info(
+                f"[{instance}] reconciled players: "
+                f"{len(added)} added, {len(removed)} removed"
+            )
+        return added, removed
+
+    def clear(self, instance):
+        """End every session on an instance, e.g. when it stops"""
+        for session in self.players(instance):
+            self.disconnect(instance, session["name"])
+
+
+# shared across every instance for cross-server lookups
+registry = PlayerRegistry()
@@ -0,0 +1,81 @@
+import re
+import time
+
+
+# lines that only differ in numbers (timestamps, ids, coords) count as similar
+_digits = re.compile(r"\d+")
+
+
+def line_signature(line, length=80):
+    """Key that groups near-identical log lines together"""
+    return _digits.sub("#", line[:length])
+
+
+class TokenBucketLimiter:
+    """
+    Per-key token buckets for log output.
+
+    Each key may log `burst` lines at once and `rate` lines per second
+    after that. Lines over the limit are only counted, and the count is
+    reported once the key is allowed to log again or through summaries()
+    so a storm shows up as a single "suppressed N similar lines" record.
+    """
+
+    def __init__(self, rate=5.0, burst=20, summary_interval=30.0, max_keys=1024):
+        self.rate = rate
+        self.burst = burst
+        self.summary_interval = summary_interval
+        self.max_keys = max_keys
+
+        # key -> [tokens, last refill, suppressed count, last summary]
+        self.buckets = {}
+
+    def allow(self, key, now=None):
+        """
+        Take a token for key.
+
+        Returns:
+            tuple: (allowed, suppressed) where suppressed is the number of
+                lines dropped for key since it was last allowed, to be
+                reported alongside this one
+        """
+        now = time.monotonic() if now is None else now
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.max_keys:
+                self._evict()
+            bucket = self.buckets[key] = [self.burst, now, 0, now]
+
+        bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+        bucket[1] = now
+
+        if bucket[0] >= 1:
+            bucket[0] -= 1
+            suppressed, bucket[2] = bucket[2], 0
+            bucket[3] = now
+            return True, suppressed
+
+        bucket[2] += 1
+        return False, 0
+
+    def summaries(self, now=None):
+        """
+        Collect (key, suppressed) for keys that have been dropping lines
+        for longer than summary_interval, resetting their counts.
+        """
+        now = time.monotonic() if now is None else now
+        due = []
+        for key, bucket in self.buckets.items():
+            if bucket[2] and now - bucket[3] >= self.summary_interval:
+                due.append((key, bucket[2]))
+                bucket[2] = 0
+                bucket[3] = now
+        return due
+
+    def _evict(self):
+        # forget quiet keys first, they have nothing to report
+        quiet = [key for key, bucket in self.buckets.items() if not bucket[2]]
+        for key in quiet or list(self.buckets):
+            del self.buckets[key]
+            if len(self.buckets) < self.max_keys // 2:
+                break
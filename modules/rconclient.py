@@ -1,215 +1,665 @@
 import logging
+import re
+import time
+import zlib
 import struct
-import socket
 import asyncio
 import os
-import datetime
 
 # from dman import server_states
 from modules.serverstate import ServerState
+from modules.events import record_event
+from modules.players import registry
 
 log = logging.getLogger(__name__)
 
 
-# RCON Constants
-SERVERDATA_AUTH = 3
-SERVERDATA_AUTH_RESPONSE = 2
-SERVERDATA_EXECCOMMAND = 2
-SERVERDATA_RESPONSE_VALUE = 0
+# BattlEye "players" row: slot, ip:port, ping, guid(status), name [(Lobby)]
+player_row_pattern = re.compile(
+    r"^(?P<slot>\d+)\s+\S+:\d+\s+-?\d+\s+\S+?(?:\(\?\)|\(OK\))?\s+(?P<name>.+?)(?:\s+\(Lobby\))?$"
+)
+
+# BattlEye RCon packet types
+BE_LOGIN = 0x00
+BE_COMMAND = 0x01
+BE_SERVER_MESSAGE = 0x02
+
+
+def build_packet(packet_type, payload=b""):
+    """
+    Build a BattlEye RCon packet:
+    'B' 'E' | crc32 (little endian) | 0xFF | type | payload
+    The checksum covers everything from the 0xFF on.
+    """
+    body = bytes((0xFF, packet_type)) + payload
+    return b"BE" + struct.pack("<I", zlib.crc32(body) & 0xFFFFFFFF) + body
+
+
+def parse_packet(data):
+    """
+    Validate a BattlEye RCon packet.
+
+    Returns:
+        tuple: (type, payload), or None for anything malformed
+    """
+    if len(data) < 8 or data[:2] != b"BE" or data[6] != 0xFF:
+        return None
+    if struct.unpack("<I", data[2:6])[0] != zlib.crc32(data[6:]) & 0xFFFFFFFF:
+        return None
+    return data[7], data[8:]
+
+
+class RCONProtocol(asyncio.DatagramProtocol):
+    """Hands datagrams to the owning RCONClient"""
+
+    def __init__(self, client):
+        self.client = client
+
+    def datagram_received(self, data, addr):
+        self.client._received(data)
+
+    def error_received(self, exc):
+        # e.g. ICMP port unreachable while the server is down
+        log.debug(f"RCON socket error: {exc}")
+
+    def connection_lost(self, exc):
+        self.client._lost(exc)
 
 
 class RCONClient:
-    """Simple RCON client implementation for DayZ servers"""
+    """
+    BattlEye RCon client for DayZ servers over UDP.
+
+    Runs entirely on the event loop through a DatagramProtocol, so waiting
+    on the server never blocks other tasks. Commands are pipelined: each
+    gets its own sequence number and future, up to max_in_flight are
+    outstanding at once, and responses split over several packets are
+    reassembled before the future resolves. Server messages are
+    acknowledged as they arrive and an empty command is sent as keepalive
+    whenever the session has been idle, as BattlEye drops clients that are
+    silent for 45 seconds.
+    """
 
-    def __init__(self, port, password, host="127.0.0.1"):
+    def __init__(
+        self,
+        port,
+        password,
+        host="127.0.0.1",
+        timeout=5.0,
+        retries=2,
+        keepalive_interval=30.0,
+        on_message=None,
+        max_in_flight=64,
+    ):
         self.host = host
         self.port = port
         self.password = password
-        self.socket = None
+        self.timeout = timeout
+        self.retries = retries
+        self.keepalive_interval = keepalive_interval
+        self.on_message = on_message
+
+        self.transport = None
         self.authenticated = False
-        self.request_id = 0
+        self.sequence = 0
+        self.last_sent = 0.0
+        self._login = None
+        # seq -> future, seq -> {index: part} for multi-packet responses
+        self._pending = {}
+        self._parts = {}
+        # bounded well below 256 so a free sequence number always exists
+        self._in_flight = asyncio.Semaphore(min(max_in_flight, 255))
+        self._keepalive_task = None
 
     async def connect(self):
-        """Connect to the RCON server"""
+        """Connect and log in to the RCON server"""
         try:
-            # Create socket
-            self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-            self.socket.settimeout(10)  # 10 second timeout
-            self.socket.connect((self.host, self.port))
+            loop = asyncio.get_running_loop()
+            self.transport, _ = await loop.create_datagram_endpoint(
+                lambda: RCONProtocol(self), remote_addr=(self.host, self.port)
+            )
             log.info(f"Connected to RCON at {self.host}:{self.port}")
 
             # Authenticate
             result = await self.authenticate()
             if not result:
-                log.error("RCON authentication failed")
-                self.socket.close()
+                self.close()
                 return False
 
             self.authenticated = True
+            self._keepalive_task = asyncio.create_task(self._keepalive())
             return True
+        except asyncio.CancelledError:
+            # e.g. a caller's timeout, don't leak the socket
+            self.close()
+            raise
         except Exception as e:
             log.error(f"RCON connection error: {e}")
-            if self.socket:
-                self.socket.close()
+            self.close()
             return False
 
-    # async def connect(self, retries=3, delay=5):
-    #     """Connect to the RCON server with retries"""
-    #     for attempt in range(retries):
-    #         try:
-    #             self.socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-    #             self.socket.settimeout(10)
-    #             self.socket.connect((self.host, self.port))
-    #             log.info(f"Connected to RCON at {self.host}:{self.port}")
-
-    #             result = await self.authenticate()
-    #             if result:
-    #                 self.authenticated = True
-    #                 return True
-
-    #             log.warning(
-    #                 f"RCON authentication failed, attempt {attempt + 1}/{retries}"
-    #             )
-    #         except Exception as e:
-    #             log.warning(
-    #                 f"RCON connection error (attempt {attempt + 1}/{retries}): {e}"
-    #             )
-    #             if self.socket:
-    #                 self.socket.close()
-    #                 self.socket = None
-
-    #         if attempt < retries - 1:
-    #             log.info(f"Retrying RCON connection in {delay} seconds...")
-    #             await asyncio.sleep(delay)
-
-    #     log.error(f"Failed to connect to RCON after {retries} attempts")
-    #     return False
-
     async def authenticate(self):
         """Authenticate with the RCON server using the provided password"""
-        if not self.socket:
+        if not self.transport:
             return False
 
-        self.request_id += 1
-        request_id = self.request_id
-
-        # Send auth packet
-        packet = self._build_packet(request_id, SERVERDATA_AUTH, self.password)
-        self.socket.send(packet)
+        for _ in range(self.retries + 1):
+            self._login = asyncio.get_running_loop().create_future()
+            self._send(BE_LOGIN, self.password.encode("utf-8"))
+            try:
+                success = await asyncio.wait_for(self._login, self.timeout)
+            except asyncio.TimeoutError:
+                continue
 
-        # Receive response
-        response = await self._receive_response()
+            if success:
+                log.info("RCON authentication successful")
+            else:
+                log.error("RCON authentication failed")
+            return success
 
-        # Check if authentication was successful
-        if (
-            response
-            and response.get("type") == SERVERDATA_AUTH_RESPONSE
-            and response.get("id") == request_id
-        ):
-            log.info("RCON authentication successful")
-            return True
-        else:
-            log.error("RCON authentication failed")
-            return False
+        log.error("RCON login timed out")
+        return False
 
     async def send_command(self, command):
         """Send a command to the RCON server and get the response"""
-        if not self.socket or not self.authenticated:
+        if not self.transport or not self.authenticated:
             log.error("RCON not connected or not authenticated")
             return None
 
-        self.request_id += 1
-        request_id = self.request_id
+        async with self._in_flight:
+            seq = self.sequence
+            while seq in self._pending:
+                seq = (seq + 1) % 256
+            self.sequence = (seq + 1) % 256
 
-        # Send command packet
-        packet = self._build_packet(request_id, SERVERDATA_EXECCOMMAND, command)
-        self.socket.send(packet)
-
-        # Receive response
-        response = await self._receive_response()
+            future = asyncio.get_running_loop().create_future()
+            self._pending[seq] = future
+            packet = bytes((seq,)) + command.encode("utf-8")
+            try:
+                for _ in range(self.retries + 1):
+                    # BattlEye answers a repeated sequence number again rather
+                    # than running the command twice, so resending is safe
+                    self._send(BE_COMMAND, packet)
+                    try:
+                        return await asyncio.wait_for(
+                            asyncio.shield(future), self.timeout
+                        )
+                    except asyncio.TimeoutError:
+                        continue
+                    except ConnectionError as e:
+                        log.warning(f"RCON command failed: {command}: {e}")
+                        return None
+            finally:
+                self._pending.pop(seq, None)
+                self._parts.pop(seq, None)
 
-        if response and response.get("id") == request_id:
-            return response.get("body", "")
+        log.warning(f"RCON command timed out: {command}")
         return None
 
-    async def _receive_response(self):
-        """Receive and parse RCON response packet"""
-        try:
-            # First get the packet size
-            size_data = self.socket.recv(4)
-            if not size_data:
-                return None
+    async def send_commands(self, commands):
+        """
+        Send several commands at once and wait for all of them.
 
-            size = struct.unpack("<I", size_data)[0]
-
-            # Now get the actual packet
-            packet_data = b""
-            remaining = size
-            while remaining > 0:
-                chunk = self.socket.recv(remaining)
-                if not chunk:
-                    break
-                packet_data += chunk
-                remaining -= len(chunk)
-
-            # Parse the packet
-            if (
-                len(packet_data) >= 8
-            ):  # Minimum packet size (id + type + empty string + null terminator)
-                response_id = struct.unpack("<I", packet_data[0:4])[0]
-                response_type = struct.unpack("<I", packet_data[4:8])[0]
-
-                # Extract the response body (null-terminated string)
-                body = ""
-                if len(packet_data) > 8:
-                    body = packet_data[8:-2].decode("utf-8", errors="replace")
-
-                return {"id": response_id, "type": response_type, "body": body}
-        except Exception as e:
-            log.error(f"Error receiving RCON response: {e}")
-
-        return None
-
-    def _build_packet(self, request_id, packet_type, body):
-        """Build an RCON packet"""
-        # Convert body to bytes if it's a string
-        if isinstance(body, str):
-            body = body.encode("utf-8")
+        Returns:
+            list: Responses in the order of commands, None where one failed
+        """
+        responses = await asyncio.gather(
+            *(self.send_command(command) for command in commands),
+            return_exceptions=True,
+        )
+        for command, response in zip(commands, responses):
+            if isinstance(response, Exception):
+                log.warning(f"RCON command failed: {command}: {response}")
+        return [
+            None if isinstance(response, Exception) else response
+            for response in responses
+        ]
+
+    def _send(self, packet_type, payload=b""):
+        if not self.transport:
+            raise ConnectionError("RCON connection closed")
+        self.transport.sendto(build_packet(packet_type, payload))
+        self.last_sent = time.monotonic()
+
+    def _received(self, data):
+        packet = parse_packet(data)
+        if packet is None:
+            log.debug("dropping malformed RCON packet")
+            return
+        packet_type, payload = packet
+
+        if packet_type == BE_LOGIN:
+            if self._login and not self._login.done() and payload:
+                self._login.set_result(payload[0] == 0x01)
+
+        elif packet_type == BE_COMMAND and payload:
+            seq = payload[0]
+            future = self._pending.get(seq)
+            if not future or future.done():
+                return
+
+            if len(payload) >= 4 and payload[1] == 0x00:
+                # multi-packet: 0x00, packet count, packet index, part
+                count, index = payload[2], payload[3]
+                parts = self._parts.setdefault(seq, {})
+                parts[index] = payload[4:]
+                if len(parts) < count:
+                    return
+                data = b"".join(parts[i] for i in range(count))
+                del self._parts[seq]
+            else:
+                data = payload[1:]
 
-        # Add null terminators
-        body = body + b"\x00\x00"
+            future.set_result(data.decode("utf-8", errors="replace"))
 
-        # Calculate packet size (excluding the size field itself)
-        size = 4 + 4 + len(body)  # id + type + body with null terminators
+        elif packet_type == BE_SERVER_MESSAGE and payload:
+            # has to be acknowledged or the server keeps resending it
+            self._send(BE_SERVER_MESSAGE, payload[:1])
+            message = payload[1:].decode("utf-8", errors="replace")
+            log.debug(f"RCON message: {message}")
+            if self.on_message:
+                self.on_message(message)
 
-        # Build the packet
-        packet = struct.pack("<I", size)  # Size
-        packet += struct.pack("<I", request_id)  # Request ID
-        packet += struct.pack("<I", packet_type)  # Packet Type
-        packet += body  # Body with null terminators
+    def _lost(self, exc):
+        self.authenticated = False
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("RCON connection lost"))
 
-        return packet
+    async def _keepalive(self):
+        try:
+            while self.transport:
+                await asyncio.sleep(self.keepalive_interval / 3)
+                if time.monotonic() - self.last_sent >= self.keepalive_interval:
+                    if await self.send_command("") is None:
+                        # the server went away (or restarted and forgot us)
+                        self.authenticated = False
+                        return
+        except asyncio.CancelledError:
+            pass
 
     def close(self):
         """Close the RCON connection"""
-        if self.socket:
+        if self._keepalive_task:
+            self._keepalive_task.cancel()
+            self._keepalive_task = None
+        if self.transport:
             try:
-                self.socket.close()
+                self.transport.close()
                 log.info("RCON connection closed")
             except Exception as e:
                 log.error(f"Error closing RCON connection: {e}")
             finally:
-                self.socket = None
+                self.transport = None
                 self.authenticated = False
 
 
+def read_rcon_config(app_path, instance_name):
+    """
+    Read the RCON port and password from an instance's BEServer_x64.cfg
+
+    Returns:
+        tuple: (rcon_port, rcon_password)
+    """
+    be_rcon_config = os.path.join(
+        app_path, "servers", instance_name, "battleye", "BEServer_x64.cfg"
+    )
+
+    rcon_port, rcon_password = None, None
+    with open(be_rcon_config, "r") as cfg:
+        for line in cfg:
+            key, _, value = line.strip().partition(" ")
+            if key == "RConPassword":
+                rcon_password = value.strip()
+            elif key == "RConPort":
+                rcon_port = int(value.strip())
+
+    return rcon_port, rcon_password
+
+
+class RCONSessionPool:
+    """
+    One long-lived RCON session per instance, shared by everything that
+    talks to the server (restart scheduling, kicks, player polling,
+    broadcasts).
+
+    Sessions are opened on first use and kept alive by the client's
+    keepalive. A session whose connection is lost or that fails a
+    keepalive, e.g. because the server restarted and forgot the login,
+    is dropped and reopened on next use, with failed connects retried at
+    most every reconnect_delay.
+    """
+
+    def __init__(self, reconnect_delay=10.0, timeout=5.0, retries=2):
+        self.reconnect_delay = reconnect_delay
+        self.timeout = timeout
+        self.retries = retries
+        # instance -> (host, port, password)
+        self.targets = {}
+        self.clients = {}
+        self.locks = {}
+        self.failed_at = {}
+
+    def register(self, instance_name, rcon_port, rcon_password, host="127.0.0.1"):
+        target = (host, rcon_port, rcon_password)
+        if self.targets.get(instance_name) != target:
+            self.targets[instance_name] = target
+            self.reset(instance_name)
+
+    def registered(self, instance_name):
+        return instance_name in self.targets
+
+    def _alive(self, client):
+        return client is not None and client.transport and client.authenticated
+
+    async def get(self, instance_name):
+        """The instance's connected session, or None if it can't be reached"""
+        client = self.clients.get(instance_name)
+        if self._alive(client):
+            return client
+
+        lock = self.locks.setdefault(instance_name, asyncio.Lock())
+        async with lock:
+            # another task may have reconnected while we waited
+            client = self.clients.get(instance_name)
+            if self._alive(client):
+                return client
+            self.reset(instance_name)
+
+            if instance_name not in self.targets:
+                log.error(f"[{instance_name}] No RCON settings registered")
+                return None
+
+            failed_at = self.failed_at.get(instance_name)
+            if failed_at and time.monotonic() - failed_at < self.reconnect_delay:
+                return None
+
+            host, rcon_port, rcon_password = self.targets[instance_name]
+            client = RCONClient(
+                port=rcon_port,
+                password=rcon_password,
+                host=host,
+                timeout=self.timeout,
+                retries=self.retries,
+            )
+            if not await client.connect():
+                self.failed_at[instance_name] = time.monotonic()
+                log.warning(f"[{instance_name}] RCON unavailable")
+                return None
+
+            self.failed_at.pop(instance_name, None)
+            self.clients[instance_name] = client
+            return client
+
+    async def command(self, instance_name, command):
+        """
+        Run a command on an instance's session.
+
+        The command is sent once. Commands like say, kick or #shutdown
+        must not run twice, so nothing is re-sent after a reconnect.
+
+        Returns:
+            str: The response, None if the server didn't answer
+        """
+        client = await self.get(instance_name)
+        if client is None:
+            return None
+
+        response = await client.send_command(command)
+        if response is None:
+            await self.check(instance_name, client)
+        return response
+
+    async def check(self, instance_name, client):
+        """
+        Health check a session after a missed reply.
+
+        One slow or dropped command doesn't mean the session is gone, so
+        it is only closed if the connection was lost, the keepalive gave
+        up on it, or an empty keepalive command goes unanswered too.
+
+        Returns:
+            bool: True if the session is still usable
+        """
+        if self._alive(client) and await client.send_command("") is not None:
+            return True
+
+        client.authenticated = False
+        if self.clients.get(instance_name) is client:
+            log.warning(
+                f"[{instance_name}] RCON session lost, reconnecting on next use"
+            )
+            self.reset(instance_name)
+        return False
+
+    async def commands(self, instance_name, commands):
+        """
+        Pipeline several commands on an instance's session.
+
+        Returns:
+            list: Responses in the order of commands, None where one failed
+        """
+        client = await self.get(instance_name)
+        if client is None:
+            return [None] * len(commands)
+        return await client.send_commands(commands)
+
+    def reset(self, instance_name):
+        """Close an instance's session, the next use reconnects"""
+        client = self.clients.pop(instance_name, None)
+        if client:
+            client.close()
+
+    def close(self):
+        for instance_name in list(self.clients):
+            self.reset(instance_name)
+
+
+# shared by every RCON user in dman
+sessions = RCONSessionPool()
+
+
+async def broadcast(instance_name, message):
+    """Send a global chat message to an instance"""
+    return await sessions.command(instance_name, f'say -1 "{message}"')
+
+
+async def fan_out(command, instances=None, concurrency=8, timeout=10.0):
+    """
+    Run one RCON command on many instances concurrently.
+
+    At most `concurrency` servers are talked to at once and each gets its
+    own timeout, so an unresponsive server only costs its own slot.
+
+    Args:
+        command: RCON command to run
+        instances: Instance names, or a callable filtering them; every
+            registered instance when None
+        concurrency: Maximum servers in flight at once
+        timeout: Seconds each server gets, including reconnecting
+
+    Returns:
+        dict: instance -> {"ok", "response", "seconds", "error"}
+    """
+    if instances is None:
+        targets = list(sessions.targets)
+    elif callable(instances):
+        targets = [name for name in sessions.targets if instances(name)]
+    else:
+        targets = list(instances)
+
+    limit = asyncio.Semaphore(max(1, concurrency))
+
+    async def run(instance_name):
+        async with limit:
+            started = time.monotonic()
+            error = None
+            response = None
+            try:
+                response = await asyncio.wait_for(
+                    sessions.command(instance_name, command), timeout
+                )
+                if response is None:
+                    error = "no response"
+            except asyncio.TimeoutError:
+                error = f"timed out after {timeout}s"
+            except Exception as e:
+                error = str(e)
+
+            return instance_name, {
+                "ok": error is None,
+                "response": response,
+                "seconds": round(time.monotonic() - started, 3),
+                "error": error,
+            }
+
+    results = dict(await asyncio.gather(*(run(name) for name in targets)))
+
+    failed = [name for name, result in results.items() if not result["ok"]]
+    log.info(
+        f"RCON '{command}' on {len(results)} servers, {len(failed)} failed"
+        + (f": {', '.join(failed)}" if failed else "")
+    )
+    return results
+
+
+async def broadcast_all(message, instances=None, concurrency=8, timeout=10.0):
+    """Send a global chat message to every (or a filtered set of) instance"""
+    return await fan_out(
+        f'say -1 "{message}"', instances, concurrency=concurrency, timeout=timeout
+    )
+
+
+def parse_players(response, instance_name=None):
+    """
+    Parse the response to the RCON players command.
+
+    Returns:
+        list: (player_id, player_name) tuples, player_id being the slot
+            number commands like kick expect
+    """
+    players = []
+    # Typical format:
+    # Players on server:
+    # [#] [IP Address]:[Port] [Ping] [GUID] [Name]
+    # --------------------------------------------------
+    # 0   1.2.3.4:2304     31   0123abcd(OK) PlayerName
+    # (1 players in total)
+    for line in response.strip().split("\n"):
+        line = line.strip()
+        if not line or not line[0].isdigit():
+            continue
+
+        match = player_row_pattern.match(line)
+        if match:
+            players.append((int(match.group("slot")), match.group("name")))
+            continue
+
+        # simpler "slot id name" rows
+        parts = line.split()
+        if len(parts) >= 3:
+            try:
+                players.append((int(parts[0]), " ".join(parts[2:])))
+                continue
+            except ValueError:
+                pass
+        log.warning(f"[{instance_name}] Could not parse player line: {line}")
+
+    return players
+
+
+async def kick_players(
+    instance_name,
+    players,
+    reason="",
+    rate=20.0,
+    confirm_timeout=10.0,
+    confirm_interval=1.0,
+):
+    """
+    Kick many players at once and confirm they are gone.
+
+    Kicks are sent concurrently, paced to at most `rate` per second (0 for
+    no cap). The player list is then polled until none of the kicked
+    players are left or confirm_timeout passes, and anyone still listed is
+    kicked again on each poll. Kicks that fail or go unanswered count as
+    remaining until the player list shows the player gone.
+
+    Args:
+        instance_name: Name of the server instance
+        players: (player_id, player_name) tuples as returned by parse_players
+        reason: Kick message shown to the players
+        rate: Maximum kicks sent per second
+        confirm_timeout: Seconds to wait for the kicks to show up
+        confirm_interval: Seconds between player list checks
+
+    Returns:
+        dict: {"kicked": [names], "remaining": [names], "seconds": float}
+    """
+    started = time.monotonic()
+    reason = reason.replace('"', "'")
+
+    async def send_kicks(targets):
+        tasks = []
+        for player_id, _ in targets:
+            tasks.append(
+                asyncio.create_task(
+                    sessions.command(instance_name, f'kick {player_id} "{reason}"')
+                )
+            )
+            if rate:
+                await asyncio.sleep(1 / rate)
+
+        # a failed kick just leaves the player listed, the confirmation
+        # poll below kicks them again
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for (player_id, name), result in zip(targets, results):
+            if result is None or isinstance(result, Exception):
+                log.warning(f"[{instance_name}] Kick of {name} (#{player_id}) failed")
+        return results
+
+    await send_kicks(players)
+
+    # confirm against the server's own list, slots are reused so match names
+    remaining = list(players)
+    deadline = started + confirm_timeout
+    while remaining:
+        response = await sessions.command(instance_name, "players")
+        if response is not None:
+            online = {name for _, name in parse_players(response, instance_name)}
+            remaining = [player for player in remaining if player[1] in online]
+            registry.reconcile(instance_name, online)
+        if not remaining or time.monotonic() >= deadline:
+            break
+
+        await asyncio.sleep(confirm_interval)
+        await send_kicks(remaining)
+
+    remaining_names = [name for _, name in remaining]
+    result = {
+        "kicked": [name for _, name in players if name not in remaining_names],
+        "remaining": remaining_names,
+        "seconds": round(time.monotonic() - started, 3),
+    }
+    log.info(
+        f"[{instance_name}] Kicked {len(result['kicked'])}/{len(players)} players "
+        f"in {result['seconds']}s"
+    )
+    if remaining:
+        log.warning(
+            f"[{instance_name}] Still online after kick: {', '.join(remaining_names)}"
+        )
+    return result
+
+
 async def kick_all_and_restart(
     server_states,
     instance_name,
-    rcon_port,
-    rcon_password,
+    rcon_port=None,
+    rcon_password=None,
     host="127.0.0.1",
     restart_delay=60,
+    kick_rate=20.0,
 ):
     """
     Kick all players and restart a DayZ server using RCON
@@ -217,14 +667,18 @@ async def kick_all_and_restart(
     Args:
         instance_name: Name of the server instance
         host: RCON host address (default 127.0.0.1)
-        rcon_port: RCON port (default is game port + 1)
-        rcon_password: RCON password
+        rcon_port: RCON port, only needed if the session isn't registered
+        rcon_password: RCON password, only needed if the session isn't registered
         restart_delay: Delay in seconds before server restart (default 60)
+        kick_rate: Maximum kicks sent per second (default 20)
 
     Returns:
         bool: True if successful, False otherwise
     """
-    if not rcon_password:
+    if rcon_port and rcon_password:
+        sessions.register(instance_name, rcon_port, rcon_password, host)
+
+    if not sessions.registered(instance_name):
         log.error(f"[{instance_name}] No RCON password provided")
         return False
 
@@ -233,39 +687,22 @@ async def kick_all_and_restart(
         log.error(f"[{instance_name}] Server instance not found in server_states")
         return False
 
-    # server = server_states[instance_name]
-    # game_port = server.get("rcon_port")
-
-    # # If no RCON port specified, use game port + 1 (DayZ default)
-    # if not rcon_port and game_port:
-    #     rcon_port = game_port + 1
-
-    if not rcon_port:
-        log.error(f"[{instance_name}] Could not determine RCON port")
-        return False
-
-    log.info(
-        f"[{instance_name}] Starting kick all and restart procedure via RCON on port {rcon_port}"
-    )
-
-    # Create RCON client
-    rcon = RCONClient(port=rcon_port, password=rcon_password, host=host)
+    log.info(f"[{instance_name}] Starting kick all and restart procedure via RCON")
 
     try:
-        # Connect to RCON
-        connected = await rcon.connect()
-        if not connected:
+        # Make sure the shared session is up
+        if await sessions.get(instance_name) is None:
             log.error(f"[{instance_name}] Failed to connect to RCON")
             return False
 
         # Announce server restart
         message = f"SERVER RESTART IN {restart_delay} SECONDS. YOU WILL BE KICKED."
         log.info(f"[{instance_name}] Broadcasting restart message: {message}")
-        await rcon.send_command(f'say -1 "{message}"')
+        await broadcast(instance_name, message)
 
         # Get list of players
         log.info(f"[{instance_name}] Getting player list")
-        players_response = await rcon.send_command("players")
+        players_response = await sessions.command(instance_name, "players")
 
         if not players_response:
             log.warning(
@@ -274,44 +711,17 @@ async def kick_all_and_restart(
             players = []
         else:
             # Parse player list
-            players = []
-            # Typical format:
-            # Players on server:
-            # [#] [ID] [Name]
-            # 0   12   PlayerName
-
-            lines = players_response.strip().split("\n")
-            if len(lines) > 2:  # Header lines + at least one player
-                for i in range(2, len(lines)):
-                    parts = lines[i].strip().split()
-                    if len(parts) >= 3:
-                        try:
-                            player_id = int(parts[1])
-                            player_name = " ".join(parts[2:])
-                            players.append((player_id, player_name))
-                        except (ValueError, IndexError):
-                            log.warning(
-                                f"[{instance_name}] Could not parse player line: {lines[i]}"
-                            )
-
-        # If players found, kick them all
+            players = parse_players(players_response, instance_name)
+
+        # If players found, kick them all at once
         if players:
             log.info(f"[{instance_name}] Kicking {len(players)} players")
-            for player_id, player_name in players:
-                kick_message = (
-                    "Server is restarting. Please reconnect in a few minutes."
-                )
-                log.info(
-                    f"[{instance_name}] Kicking player {player_name} (ID: {player_id})"
-                )
-
-                kick_response = await rcon.send_command(
-                    f'kick {player_id} "{kick_message}"'
-                )
-                log.debug(f"[{instance_name}] Kick response: {kick_response}")
-
-                # Small delay between kicks to avoid overloading the server
-                await asyncio.sleep(0.5)
+            await kick_players(
+                instance_name,
+                players,
+                "Server is restarting. Please reconnect in a few minutes.",
+                rate=kick_rate,
+            )
         else:
             log.info(f"[{instance_name}] No players to kick")
 
@@ -325,30 +735,29 @@ async def kick_all_and_restart(
 
             # Announce time remaining if more than one step left
             if i > step:
-                await rcon.send_command(f'say -1 "SERVER RESTARTING IN {i} SECONDS"')
+                await broadcast(instance_name, f"SERVER RESTARTING IN {i} SECONDS")
                 log.info(f"[{instance_name}] Restart in {i} seconds")
                 await asyncio.sleep(step)
 
         # Final announcement
-        await rcon.send_command('say -1 "SERVER RESTARTING NOW"')
+        await broadcast(instance_name, "SERVER RESTARTING NOW")
         log.info(f"[{instance_name}] Executing restart command")
 
         # Send restart command
-        restart_response = await rcon.send_command("#shutdown")
+        restart_response = await sessions.command(instance_name, "#shutdown")
         log.info(f"[{instance_name}] Restart response: {restart_response}")
 
-        # Close RCON connection
-        rcon.close()
+        # the server forgets the login when it goes down, start fresh
+        sessions.reset(instance_name)
 
         # Update server state
         if instance_name in server_states:
             server_states[instance_name]["state"] = ServerState.STOPPED
-            server_states[instance_name]["events"].append(
-                {
-                    "timestamp": datetime.datetime.now(),
-                    "state": ServerState.STOPPED.value,
-                    "message": "Server restarted via RCON",
-                }
+            record_event(
+                server_states,
+                instance_name,
+                ServerState.STOPPED.value,
+                "Server restarted via RCON",
             )
 
         log.info(f"[{instance_name}] Kick all and restart completed successfully")
@@ -356,20 +765,26 @@ async def kick_all_and_restart(
 
     except Exception as e:
         log.error(f"[{instance_name}] Error during kick all and restart: {e}")
-        if rcon:
-            rcon.close()
         return False
 
 
 # Example function to start the restart process for a specific server
 async def schedule_server_restart(
-    server_states, app_path, instance_name, restart_delay=60, warning_time=300
+    server_states,
+    app_path,
+    instance_name,
+    restart_delay=60,
+    warning_time=300,
+    host="127.0.0.1",
+    kick_rate=20.0,
 ):
     """
     Schedule a server restart with warnings
 
     Args:
         instance_name: Name of the server instance
+        host: RCON host address (default 127.0.0.1)
+        kick_rate: Maximum kicks sent per second (default 20)
         restart_delay: Time in seconds to wait between kicking players and restart (default 60)
         warning_time: Time in seconds to warn players before kicking begins (default 300, 5 minutes)
     """
@@ -378,18 +793,9 @@ async def schedule_server_restart(
         log.error(f"Cannot restart unknown server: {instance_name}")
         return
 
-    # Get server config to find RCON password
-    be_rcon_config = os.path.join(
-        app_path, "servers", instance_name, "battleye", "BEServer_x64.cfg"
-    )
-
     try:
         # rip rcon password and port from be config
-        with open(be_rcon_config, "r") as cfg:
-            cfg = cfg.readlines()
-
-            rcon_password = cfg[0].replace("RConPassword", "").strip()
-            rcon_port = int(cfg[2].replace("RConPort", "").strip())
+        rcon_port, rcon_password = read_rcon_config(app_path, instance_name)
 
         if not rcon_password:
             log.error(
@@ -397,16 +803,15 @@ async def schedule_server_restart(
             )
             return
 
+        if not sessions.registered(instance_name):
+            sessions.register(instance_name, rcon_port, rcon_password, host)
+
         # # Wait 30 seconds before trying to connect
         # log.info(f"[{instance_name}] Waiting for server to initialize RCON...")
         # await asyncio.sleep(10)
 
-        # Send warning messages at intervals
-        rcon = RCONClient(host="192.168.1.15", port=rcon_port, password=rcon_password)
-
-        connected = await rcon.connect()
-
-        if not connected:
+        # Send warning messages at intervals over the shared session
+        if await sessions.get(instance_name) is None:
             log.error(f"[{instance_name}] Failed to connect to RCON for warnings")
             return
 
@@ -420,7 +825,7 @@ async def schedule_server_restart(
                     f"SERVER RESTART IN {minutes} MINUTE{'S' if minutes > 1 else ''}"
                 )
                 log.info(f"[{instance_name}] Warning: {message}")
-                await rcon.send_command(f'say -1 "{message}"')
+                await broadcast(instance_name, message)
 
                 # Wait until next warning interval
                 next_index = warning_intervals.index(interval) + 1
@@ -431,15 +836,12 @@ async def schedule_server_restart(
                     # Last warning, wait until restart
                     await asyncio.sleep(interval - restart_delay)
 
-        rcon.close()
-
         # Execute kick all and restart
         success = await kick_all_and_restart(
             server_states=server_states,
-            rcon_port=rcon_port,
-            rcon_password=rcon_password,
             instance_name=instance_name,
             restart_delay=restart_delay,
+            kick_rate=kick_rate,
         )
 
         if not success:
@@ -447,3 +849,33 @@ async def schedule_server_restart(
 
     except Exception as e:
         log.error(f"[{instance_name}] Error scheduling restart: {e}")
+
+
+# Keep the player session table honest against the server's own list
+async def reconcile_players(server_states, instance_name, interval=120):
+    """
+    Periodically replace the log-derived player sessions of a running
+    server with its RCON player list, so missed connect/disconnect lines
+    can't make the count drift.
+
+    Args:
+        instance_name: Name of the server instance, registered with sessions
+        interval: Seconds between reconciliations (default 120)
+    """
+    try:
+        while True:
+            await asyncio.sleep(interval)
+
+            server = server_states.get(instance_name)
+            if not server or server["state"] != ServerState.RUNNING:
+                continue
+
+            response = await sessions.command(instance_name, "players")
+            if response is None:
+                continue
+
+            players = parse_players(response, instance_name)
+            registry.reconcile(instance_name, [name for _, name in players])
+            server["players"] = registry.count(instance_name)
+    except asyncio.CancelledError:
+        pass
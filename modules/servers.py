@@ -1,16 +1,27 @@
 import logging
 import os
+import re
+import time
 import asyncio
 import datetime
-import re
 
 from modules.serverstate import ServerState
+from modules.logclassifier import LineClassifier
 from modules.format import print_center
+from modules.clone import clone_tree
+from modules.logtail import ProfileTailer
+from modules.ratelimit import TokenBucketLimiter, line_signature
+from modules.events import new_event_ring, record_event
+from modules.players import registry
+from modules.admstats import get_stats
 
-from shutil import copyfile, copytree
+from shutil import copyfile, copyfileobj
 
 log = logging.getLogger(__name__)
 
+# shared by every monitor, the rules are compiled once
+classifier = LineClassifier()
+
 
 # initiate servers directory and return list of sub-directories
 def check_servers(servers_path):
@@ -37,7 +48,7 @@ def check_servers(servers_path):
 
 
 #  initiate server files and default config if needed
-def validate_server_files(app_path, server_name):
+def validate_server_files(app_path, server_name, clone_mode="auto"):
     log.info(f"initializing instance {server_name}...")
 
     # print to CLI UI, center text
@@ -51,10 +62,13 @@ def validate_server_files(app_path, server_name):
 
     if os.path.isdir(instance_path) is not True or len(os.listdir(instance_path)) == 0:
         log.info("creating instance...")
-        copytree(
+        # link game files from the template, copy only what the instance owns
+        cloner = clone_tree(
             os.path.join(app_path, "steamcmd", "server_template"),
             instance_path,
+            mode=clone_mode,
         )
+        log.info(f"instance {server_name} provisioned: {cloner.summary()}")
 
     # make default toml
     if (
@@ -75,7 +89,15 @@ def validate_server_files(app_path, server_name):
 
 
 # Enhanced monitor process function
-async def monitor_process(server_states, process, instance_name=None, port=None):
+async def monitor_process(
+    server_states,
+    process,
+    instance_name=None,
+    port=None,
+    output_path=None,
+    profiles_path=None,
+    offsets_path=None,
+):
     """
     Monitor a server process with enhanced logging capabilities.
     Captures stdout and stderr in real-time and logs with appropriate levels.
@@ -85,6 +107,11 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
         process: The asyncio subprocess object
         instance_name: Name of the server instance
         port: Port the server is running on
+        output_path: File the server writes its output to directly, tailed
+            instead of reading pipes when set
+        profiles_path: Profiles directory whose RPT/ADM logs are followed
+            into the same state tracking
+        offsets_path: Where the RPT/ADM read offsets are persisted
     """
     server_id = instance_name or f"pid-{process.pid}"
     log.info(f"[{server_id}] Server monitoring started on PID {process.pid}")
@@ -97,7 +124,7 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
         "start_time": datetime.datetime.now(),
         "last_update": datetime.datetime.now(),
         "players": 0,
-        "events": [],
+        "events": new_event_ring(),
     }
 
     # Create a function to update and log state changes
@@ -121,87 +148,121 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
         server_states[server_id]["last_update"] = datetime.datetime.now()
 
         if message:
-            server_states[server_id]["events"].append(
-                {
-                    "timestamp": datetime.datetime.now(),
-                    "state": new_state.value,
-                    "message": message,
-                }
-            )
+            record_event(server_states, server_id, new_state.value, message)
 
-    # Regular expressions for parsing important server messages
-    startup_patterns = [
-        (
-            re.compile(r"Waiting for connection\.\.\."),
-            ServerState.RUNNING,
-            "Server ready for connections",
-        ),
-        (
-            re.compile(r"DayZ Console version"),
-            ServerState.RUNNING,
-            "Server ready for connections",
-        ),
-        (re.compile(r'Player [^"]+ connected'), None, "Player connected"),
-        (re.compile(r'Player [^"]+ disconnected'), None, "Player disconnected"),
-        (
-            re.compile(r"ERROR|CRITICAL|FATAL"),
-            ServerState.ERROR,
-            "Server error detected",
-        ),
-        # (re.compile(r"WARNING"), ServerState.WARNING, "Server warning"),
-        (
-            re.compile(r"Connection with host timed out"),
-            ServerState.WARNING,
-            "Connection timeout",
-        ),
-        (re.compile(r"No space left on device"), ServerState.ERROR, "Disk space issue"),
-        (
-            re.compile(r"Segmentation fault|Aborted|Killed"),
-            ServerState.CRASHED,
-            "Server crash detected",
-        ),
-    ]
+    # rolling activity counters shown in the menu and exported
+    stats = get_stats(server_id)
+
+    # one limiter per server, keyed by rule or by line shape
+    limiter = TokenBucketLimiter()
+
+    def log_limited(level, key, text):
+        allowed, suppressed = limiter.allow(key)
+        if not allowed:
+            return
+        if suppressed:
+            log.warning(f"[{server_id}] suppressed {suppressed} similar lines")
+        log.log(level, text)
 
     # Function to analyze log lines and update state accordingly
-    def process_log_line(line, error=False):
-        line_type = "ERROR" if error else "INFO"
+    def process_log_line(line, error=False, source=None):
+        line_type = source or ("ERROR" if error else "INFO")
         log_prefix = f"[{server_id}][{line_type}]"
-
-        # Count players if possible (simplified example)
-        if "connected" in line and "Player" in line:
-            if "Player" in line and "connected" in line and "dis" not in line:
-                server_states[server_id]["players"] += 1
-            elif "Player" in line and "disconnected" in line:
-                server_states[server_id]["players"] = max(
-                    0, server_states[server_id]["players"] - 1
+        line = line.strip()
+
+        # one prefilter search decides whether any rule applies
+        result = classifier.classify(line)
+        if result:
+            state, event, captures = result
+
+            # Track player sessions from connect/disconnect events
+            if event == "player_connected":
+                if not registry.is_online(server_id, captures["player"]):
+                    stats.add("joins")
+                registry.connect(
+                    server_id,
+                    captures["player"],
+                    captures.get("player_id") or captures.get("connect_id"),
                 )
+                server_states[server_id]["players"] = registry.count(server_id)
+                stats.players(registry.count(server_id))
+            elif event == "player_disconnected":
+                duration = registry.disconnect(server_id, captures["player"])
+                server_states[server_id]["players"] = registry.count(server_id)
+                if duration is not None:
+                    stats.session(duration)
+                    log.debug(
+                        f"[{server_id}] {captures['player']} played {int(duration)}s"
+                    )
 
-        # Process line with regex patterns
-        for pattern, state, message in startup_patterns:
-            if pattern.search(line):
-                if state:
-                    update_state(state, message)
-                log.info(f"{log_prefix} {message}: {line.strip()}")
-                return
+            message = classifier.message(event)
+            if state:
+                update_state(state, message)
+            log_limited(
+                logging.INFO, (line_type, event), f"{log_prefix} {message}: {line}"
+            )
+            return
 
         # Default logging based on line type
         if error:
-            log.error(f"{log_prefix} {line.strip()}")
-        else:
-            # Only log meaningful output lines to avoid spam
-            if line.strip() and not line.strip().startswith(
-                ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9")
-            ):
-                log.debug(f"{log_prefix} {line.strip()}")
+            log_limited(
+                logging.ERROR, (line_type, line_signature(line)), f"{log_prefix} {line}"
+            )
+        # Only log meaningful output lines to avoid spam
+        elif line and not line[0].isdigit() and log.isEnabledFor(logging.DEBUG):
+            log_limited(
+                logging.DEBUG, (line_type, line_signature(line)), f"{log_prefix} {line}"
+            )
+
+    # Function to analyze a batch of lines from one stream
+    def process_log_lines(lines, error=False, source=None):
+        for line in lines:
+            # one bad line mustn't cost the rest of the batch
+            try:
+                process_log_line(line, error, source)
+            except Exception as e:
+                log.error(f"[{server_id}] Error processing log line: {e}: {line!r}")
+
+        if source == "ADM":
+            stats.feed_adm(lines)
+
+        # report keys that have been suppressed for a while
+        for (line_type, key), count in limiter.summaries():
+            log.warning(
+                f"[{server_id}][{line_type}] suppressed {count} similar lines: {key}"
+            )
 
     try:
-        # Set up async readers for stdout and stderr
-        stdout_reader = asyncio.create_task(
-            read_stream(process.stdout, lambda line: process_log_line(line))
-        )
-        stderr_reader = asyncio.create_task(
-            read_stream(process.stderr, lambda line: process_log_line(line, True))
-        )
+        if output_path:
+            # output goes straight to disk, only sample the tail for state
+            stdout_reader = asyncio.create_task(
+                tail_output(
+                    output_path,
+                    lambda lines: process_log_lines(lines),
+                    keep=classifier.prefilter,
+                )
+            )
+            stderr_reader = None
+        else:
+            # Set up async readers for stdout and stderr
+            stdout_reader = asyncio.create_task(
+                read_stream(process.stdout, lambda lines: process_log_lines(lines))
+            )
+            stderr_reader = asyncio.create_task(
+                read_stream(
+                    process.stderr, lambda lines: process_log_lines(lines, True)
+                )
+            )
+
+        # Follow the RPT/ADM logs DayZ writes into its profiles directory
+        profile_tailer = None
+        if profiles_path and offsets_path:
+            tailer = ProfileTailer(
+                profiles_path,
+                offsets_path,
+                lambda lines, kind: process_log_lines(lines, source=kind),
+            )
+            profile_tailer = asyncio.create_task(tailer.run())
 
         # Create periodic status reporting task
         status_reporter = asyncio.create_task(
@@ -213,9 +274,17 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
 
         # Cancel stream readers and status reporter
         stdout_reader.cancel()
-        stderr_reader.cancel()
+        if stderr_reader:
+            stderr_reader.cancel()
+        if profile_tailer:
+            profile_tailer.cancel()
         status_reporter.cancel()
 
+        # nobody is online on a stopped server
+        registry.clear(server_id)
+        server_states[server_id]["players"] = 0
+        stats.players(0)
+
         # Handle process termination
         if return_code != 0:
             update_state(
@@ -229,7 +298,7 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
         )
 
         # Final status report
-        report_server_status(server_id, final=True)
+        report_server_status(server_states, server_id, final=True)
 
     except asyncio.CancelledError:
         update_state(ServerState.STOPPED, "Monitor task cancelled")
@@ -258,18 +327,269 @@ async def monitor_process(server_states, process, instance_name=None, port=None)
                     update_state(ServerState.STOPPED, "Server killed by monitor")
 
 
-# Helper function to read stream data line by line
-async def read_stream(stream, callback):
-    """Read lines from an asyncio stream and process them with the callback"""
+# Helper function to read stream data in chunks
+async def read_stream(stream, callback, chunk_size=65536, max_line_length=8192):
+    """
+    Read an asyncio stream in large chunks and hand complete lines to the
+    callback in batches.
+
+    Each chunk is decoded once and split in bulk. Lines longer than
+    max_line_length are truncated instead of overrunning the reader, and
+    the loop yields between chunks so bursty output can't starve other
+    tasks. The callback is expected to handle errors per line, an
+    exception escaping it only costs the rest of that batch.
+    """
+    pending = b""
+    skipping = False
+
     while True:
-        line = await stream.readline()
-        if not line:
+        chunk = await stream.read(chunk_size)
+        if not chunk:
             break
+
+        if skipping:
+            # drop the rest of an over-limit line up to its newline
+            newline = chunk.find(b"\n")
+            if newline == -1:
+                continue
+            chunk = chunk[newline + 1 :]
+            skipping = False
+
+        data = pending + chunk
+        newline = data.rfind(b"\n")
+        if newline == -1:
+            complete, pending = b"", data
+        else:
+            complete, pending = data[:newline], data[newline + 1 :]
+
+        lines = []
+        if complete:
+            lines = complete.decode("utf-8", errors="replace").split("\n")
+
+        if len(pending) > max_line_length:
+            lines.append(
+                pending[:max_line_length].decode("utf-8", errors="replace")
+                + " [truncated]"
+            )
+            pending = b""
+            skipping = True
+
+        if lines:
+            lines = [
+                (
+                    line
+                    if len(line) <= max_line_length
+                    else line[:max_line_length] + " [truncated]"
+                )
+                for line in lines
+            ]
+            try:
+                callback(lines)
+            except Exception as e:
+                log.error(f"Error processing stream lines: {e}")
+
+        # let other servers' readers and the UI run between chunks
+        await asyncio.sleep(0)
+
+    if pending and not skipping:
         try:
-            decoded_line = line.decode("utf-8", errors="replace")
-            callback(decoded_line)
+            callback([pending.decode("utf-8", errors="replace")])
         except Exception as e:
-            log.error(f"Error processing stream line: {e}")
+            log.error(f"Error processing stream lines: {e}")
+
+
+def _shift_backups(path, backups):
+    """Move path.1 .. path.N-1 up one, making room for a new path.1"""
+    for index in range(backups - 1, 0, -1):
+        older = f"{path}.{index}"
+        if os.path.exists(older):
+            os.replace(older, f"{path}.{index + 1}")
+
+
+def open_output_file(instance_path, max_bytes=50 * 1024 * 1024, backups=3):
+    """
+    Open the instance's server output file for the child to write to.
+
+    The previous run's file is rotated to .1 (older ones shift up to
+    backups) when it is over max_bytes. The file is opened with O_APPEND
+    so the tailer can rotate it in place while the server is running.
+
+    Returns:
+        tuple: (fd, path)
+    """
+    logs_path = os.path.join(instance_path, "logs")
+    os.makedirs(logs_path, exist_ok=True)
+    path = os.path.join(logs_path, "server_output.log")
+
+    if os.path.exists(path) and os.path.getsize(path) > max_bytes:
+        _shift_backups(path, backups)
+        os.replace(path, f"{path}.1")
+
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o644)
+    return fd, path
+
+
+def rotate_output(path, backups=3):
+    """
+    Rotate a file the server still has open: copy it to .1 (older backups
+    shift up) and truncate it in place. The server's O_APPEND descriptor
+    keeps working and its next write lands at the start of the file.
+
+    The copy is done by the kernel (sendfile), run it off the event loop.
+
+    Returns:
+        int: Bytes copied to .1, the caller reads anything it hadn't yet
+            from there
+    """
+    _shift_backups(path, backups)
+    backup = f"{path}.1"
+    copyfile(path, backup)
+    with open(path, "rb") as src, open(backup, "ab") as dst:
+        # catch up on what was written during the copy, then truncate
+        src.seek(os.path.getsize(backup))
+        copyfileobj(src, dst)
+        os.truncate(path, 0)
+    return os.path.getsize(backup)
+
+
+def _read_lines(f, start, end, pending=b"", keep=None, chunk_size=256 * 1024):
+    """
+    Split pending + the bytes of f between start and end into lines.
+
+    Reads in chunks so a large range never has to be held at once. With
+    keep, a compiled bytes pattern, the raw bytes are searched and only
+    the lines it finds a match in are decoded and returned.
+
+    Returns:
+        tuple: (complete lines, trailing partial line as bytes)
+    """
+    lines = []
+    f.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = f.read(min(chunk_size, remaining))
+        if not chunk:
+            break
+        remaining -= len(chunk)
+
+        data = pending + chunk
+        newline = data.rfind(b"\n")
+        if newline == -1:
+            pending = data
+            continue
+        block, pending = data[:newline], data[newline + 1 :]
+
+        if keep is None:
+            lines.extend(block.decode("utf-8", errors="replace").split("\n"))
+            continue
+
+        # one search over the whole chunk, then cut out the matching lines
+        line_end = -1
+        for match in keep.finditer(block):
+            if match.start() <= line_end:
+                continue
+            line_start = block.rfind(b"\n", 0, match.start()) + 1
+            line_end = block.find(b"\n", match.end())
+            if line_end == -1:
+                line_end = len(block)
+            lines.append(block[line_start:line_end].decode("utf-8", errors="replace"))
+
+    return lines, pending
+
+
+# Helper function to sample a server output file
+async def tail_output(
+    path,
+    callback,
+    interval=1.0,
+    max_read=256 * 1024,
+    max_bytes=50 * 1024 * 1024,
+    backups=3,
+    keep=None,
+    max_scan=1024 * 1024,
+):
+    """
+    Follow a file the server writes to directly and hand new lines to the
+    callback in batches.
+
+    At most max_read bytes of new output are handed over per interval.
+    When the server writes faster than that, only the newest lines are
+    sampled. The newest max_scan bytes of the skipped backlog are still
+    searched for keep (a compiled pattern, e.g. the classifier's
+    prefilter) on the raw bytes, so state changes like "Waiting for
+    connection" survive a burst. Anything older is dropped with a
+    warning, so the cost of monitoring stays flat however chatty the
+    server is.
+
+    Once the file grows past max_bytes it is rotated to numbered backups
+    with rotate_output, after reading whatever was still unread.
+    """
+    if keep is not None and isinstance(keep.pattern, str):
+        # the literals are plain ASCII, match them without decoding
+        keep = re.compile(keep.pattern.encode("utf-8"), keep.flags & ~re.UNICODE)
+
+    offset = 0
+    pending = b""
+    dropped = 0
+    warned_at = 0.0
+
+    def sample(f, start, end):
+        nonlocal pending, dropped
+        kept = []
+        if end - start > max_read:
+            sample_start = end - max_read
+            scan_start = sample_start
+            if keep is not None:
+                scan_start = max(start, sample_start - max_scan)
+                dropped += scan_start - start
+            if scan_start > start:
+                # resume at the start of the next line
+                f.seek(scan_start)
+                scan_start += len(f.readline())
+                pending = b""
+            if scan_start < sample_start:
+                kept, pending = _read_lines(f, scan_start, sample_start, pending, keep)
+            else:
+                sample_start = scan_start
+            start = sample_start
+        lines, pending = _read_lines(f, start, end, pending)
+        return kept + lines
+
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            continue
+
+        if size < offset:
+            # truncated underneath us
+            offset, pending = 0, b""
+
+        lines = []
+        if size > offset:
+            with open(path, "rb") as f:
+                lines = sample(f, offset, size)
+            offset = size
+
+        if offset > max_bytes:
+            end = await asyncio.to_thread(rotate_output, path, backups)
+            if end > offset:
+                # written since the read above, only the backup has it now
+                with open(f"{path}.1", "rb") as f:
+                    lines += sample(f, offset, end)
+            offset = 0
+
+        if dropped and time.monotonic() - warned_at >= 60:
+            log.warning(f"{path}: output too fast, skipped {dropped} bytes unread")
+            dropped = 0
+            warned_at = time.monotonic()
+
+        if lines:
+            try:
+                callback(lines)
+            except Exception as e:
+                log.error(f"Error processing output lines: {e}")
 
 
 # Periodic status reporting function
@@ -303,8 +623,10 @@ def report_server_status(server_states, server_id, final=False):
     log.info(f"[{server_id}] Uptime: {int(hours)}h {int(minutes)}m {int(seconds)}s")
     log.info(f"[{server_id}] Current Players: {server['players']}")
 
-    # Report recent events (last 5 or all if final report)
-    events_to_show = server["events"] if final else server["events"][-5:]
+    # Report recent events (last 5 or the whole ring if final report)
+    events_to_show = list(server["events"])
+    if not final:
+        events_to_show = events_to_show[-5:]
     if events_to_show:
         log.info(f"[{server_id}] Recent events:")
         for event in events_to_show:
@@ -316,8 +638,22 @@ def report_server_status(server_states, server_id, final=False):
 
 # Update the start_server function to pass instance name to monitor_process
 async def start_server(
-    server_states, app_path, instance, port, client_mods, server_mods, logs
+    server_states,
+    app_path,
+    instance,
+    port,
+    client_mods,
+    server_mods,
+    logs,
+    output_mode="pipe",
 ):
+    """
+    Launch an instance's DayZServer and start monitoring it.
+
+    output_mode 'pipe' reads the server's stdout/stderr through dman,
+    'file' hands the child a file descriptor so its output goes straight
+    to <instance>/logs/server_output.log and is only sampled for state.
+    """
     instance_path = os.path.join(app_path, "servers", instance)
 
     log.info(f"[{instance}] Starting server on port {port}")
@@ -343,13 +679,28 @@ async def start_server(
     # Log complete command for debugging
     log.debug(f"[{instance}] Launch command: {' '.join(args).strip()}")
 
+    output_fd = output_path = None
+    if output_mode == "file":
+        output_fd, output_path = open_output_file(instance_path)
+        log.info(f"[{instance}] Server output goes to {output_path}")
+    elif output_mode != "pipe":
+        log.warning(f"[{instance}] unknown output mode {output_mode}, using pipe")
+
     try:
-        process = await asyncio.create_subprocess_exec(
-            *args,
-            cwd=instance_path,
-            stdout=asyncio.subprocess.PIPE,
-            stderr=asyncio.subprocess.PIPE,
-        )
+        if output_fd is not None:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                cwd=instance_path,
+                stdout=output_fd,
+                stderr=asyncio.subprocess.STDOUT,
+            )
+        else:
+            process = await asyncio.create_subprocess_exec(
+                *args,
+                cwd=instance_path,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
 
         log.info(f"[{instance}] Server process started with PID {process.pid}")
 
@@ -362,9 +713,23 @@ async def start_server(
         }
 
         # Start enhanced monitoring task with instance name
-        asyncio.create_task(monitor_process(server_states, process, instance, port))
+        asyncio.create_task(
+            monitor_process(
+                server_states,
+                process,
+                instance,
+                port,
+                output_path,
+                profiles_path=os.path.join(instance_path, "profiles"),
+                offsets_path=os.path.join(app_path, "log_offsets", f"{instance}.json"),
+            )
+        )
 
         return server_info
     except Exception as e:
         log.error(f"[{instance}] Failed to start server: {e}")
         raise
+    finally:
+        # the child has its own copy of the descriptor
+        if output_fd is not None:
+            os.close(output_fd)
@@ -8,8 +8,17 @@ import shutil
 import json
 
 from modules.format import print_center
+from modules.modcatalog import get_catalog
+from modules.modstage import active_version, activate_mod, is_staged, stage_mod
+from modules.manifest import (
+    build_template_manifest,
+    load_manifest,
+    save_manifest,
+    sync_instance,
+)
+from modules.downloads import DownloadScheduler
+from modules.vdf import parse_vdf, read_app_manifest, read_workshop_items
 
-from shutil import copytree, ignore_patterns
 from subprocess import check_output
 from rich.console import Console
 from rich.progress import (
@@ -259,11 +268,118 @@ def check_steamcmd(app_path, username, password):
     log.info("steamcmd setup complete")
 
 
-def update_servers(app_path, username, password):
+# read the buildid steamcmd recorded for the installed server template
+def get_installed_build(server_template_path):
+    app_state = read_app_manifest(os.path.join(server_template_path, "steamapps"))
+    return app_state.get("buildid", "")
+
+
+# ask steam for the current public buildid without downloading anything
+def get_latest_build(steamcmd_path, username, password):
+    try:
+        process = subprocess.run(
+            [
+                "./steamcmd.sh",
+                "+login",
+                username,
+                password,
+                "+app_info_update",
+                "1",
+                "+app_info_print",
+                "223350",
+                "+quit",
+            ],
+            shell=False,
+            cwd=steamcmd_path,
+            timeout=120,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            errors="replace",
+        )
+    except Exception as e:
+        log.warning(f"failed to query latest server build: {e}")
+        return ""
+
+    # app_info_print dumps the app's KeyValues after its header line
+    output = process.stdout
+    start = output.find('"223350"')
+    if start == -1:
+        log.warning("latest server build not found in steamcmd output")
+        return ""
+
+    app_info = parse_vdf(output[start:]).get("223350", {})
+    public = app_info.get("depots", {}).get("branches", {}).get("public", {})
+    return public.get("buildid", "")
+
+
+def load_build_records(app_path):
+    """Load the buildid recorded for the template and each instance"""
+    records_path = os.path.join(app_path, "server_builds.json")
+    if os.path.exists(records_path):
+        try:
+            with open(records_path, "r") as f:
+                return json.load(f)
+        except Exception as e:
+            log.warning(f"Failed to load server build records: {e}")
+
+    return {"template": "", "instances": {}}
+
+
+def save_build_records(app_path, records):
+    records_path = os.path.join(app_path, "server_builds.json")
+    try:
+        with open(records_path, "w") as f:
+            json.dump(records, f, indent=2)
+    except Exception as e:
+        log.warning(f"Failed to save server build records: {e}")
+
+
+def update_servers(app_path, username, password, clone_mode="auto"):
+    """
+    Update the server template and push changes to every instance.
+
+    The installed buildid is read from the template's app manifest and
+    compared with Steam's public build, so app_update only runs when a new
+    build exists. Instances are tracked by the build they were last synced
+    to, and a persisted manifest of (size, mtime, hash) per file lets each
+    one receive only the files that changed.
+    """
     steamcmd = os.path.join(app_path, "steamcmd")
-    # console = Console()
+    server_template_path = os.path.join(app_path, "steamcmd", "server_template")
+    servers_path = os.path.join(app_path, "servers")
 
-    # print(servers)
+    steamcmd_sh = os.path.join(steamcmd, "steamcmd.sh")
+    if not os.path.exists(steamcmd_sh):
+        log.error(f"steamcmd.sh not found at {steamcmd_sh}")
+        raise FileNotFoundError(f"steamcmd.sh not found at {steamcmd_sh}")
+
+    records = load_build_records(app_path)
+    installed_build = get_installed_build(server_template_path)
+    latest_build = get_latest_build(steamcmd, username, password)
+    log.info(f"server build installed: {installed_build}, latest: {latest_build}")
+
+    instances = []
+    if os.path.isdir(servers_path):
+        instances = [
+            d
+            for d in os.listdir(servers_path)
+            if os.path.isdir(os.path.join(servers_path, d))
+        ]
+
+    # unknown latest build means steam could not be asked, update to be safe
+    template_current = bool(installed_build) and installed_build == latest_build
+    stale_instances = [
+        server
+        for server in instances
+        if records["instances"].get(server) != installed_build
+    ]
+
+    if template_current and not stale_instances:
+        log.info("server template and instances are up to date, skipping update")
+        records["template"] = installed_build
+        save_build_records(app_path, records)
+        return
 
     # Get terminal width
     w, h = get_console_size()
@@ -273,8 +389,6 @@ def update_servers(app_path, username, password):
     # Subtract space for other columns (spinner, text, percentage, time)
     bar_width = terminal_width - 50  # Adjust this value as needed
 
-    # for server in servers:
-    server_template_path = os.path.join(app_path, "steamcmd", "server_template")
     with Progress(
         SpinnerColumn(),
         TextColumn("[bold blue]{task.description}"),
@@ -284,118 +398,128 @@ def update_servers(app_path, username, password):
         console=console,
         expand=True,  # Ensure the progress bar expands to fill available space
     ) as progress:
-        log.info("Server template not found, installing (this will take a while)...")
-        # os.makedirs(server_template, exist_ok=True)
-
-        steamcmd_sh = os.path.join(steamcmd, "steamcmd.sh")
-        if not os.path.exists(steamcmd_sh):
-            log.error(f"steamcmd.sh not found at {steamcmd_sh}")
-            raise FileNotFoundError(f"steamcmd.sh not found at {steamcmd_sh}")
-
-        # Create a task for the server template installation
-        template_task = progress.add_task(
-            "[yellow]Updating Servers...",
-            total=100,
-        )
+        if not template_current:
+            log.info(f"updating server template to build {latest_build}...")
 
-        # Process running flag
-        process_running = True
+            # Create a task for the server template update
+            template_task = progress.add_task(
+                "[yellow]Updating server template...",
+                total=100,
+            )
 
-        # Run steamcmd with correct arguments using Popen for real-time output
-        process = subprocess.Popen(
-            [
-                steamcmd_sh,
-                f"+force_install_dir {server_template_path}",
-                f"+login {username} {password}",
-                "+app_update 223350",
-                "+quit",
-            ],
-            shell=False,
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE,
-            text=True,
-            bufsize=1,
-            universal_newlines=True,
-        )
+            # Process running flag
+            process_running = True
 
-        # Regex to extract progress percentage from SteamCMD output
-        progress_pattern = re.compile(r"Update state \(0x\d+\) (\d+)%.*")
+            # Run steamcmd with correct arguments using Popen for real-time output
+            process = subprocess.Popen(
+                [
+                    steamcmd_sh,
+                    f"+force_install_dir {server_template_path}",
+                    f"+login {username} {password}",
+                    "+app_update 223350",
+                    "+quit",
+                ],
+                shell=False,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                bufsize=1,
+                universal_newlines=True,
+            )
+
+            # Regex to extract progress percentage from SteamCMD output
+            progress_pattern = re.compile(r"Update state \(0x\d+\) (\d+)%.*")
+
+            # Current progress percentage
+            current_progress = 0
+
+            # Function to parse output and update progress
+            def update_template_progress():
+                nonlocal current_progress
+                for line in iter(process.stdout.readline, ""):
+                    if not process_running:
+                        break
 
-        # Current progress percentage
-        current_progress = 0
+                    match = progress_pattern.search(line)
+                    if match:
+                        percent = int(match.group(1))
+                        current_progress = percent
+                        progress.update(template_task, completed=percent)
+                    log.debug(f"SteamCMD install output: {line.strip()}")
 
-        # Function to parse output and update progress
-        def update_template_progress():
-            nonlocal current_progress
-            for line in iter(process.stdout.readline, ""):
-                if not process_running:
-                    break
+                # Process stderr
+                for line in iter(process.stderr.readline, ""):
+                    if not process_running:
+                        break
+                    log.error(f"SteamCMD install error: {line.strip()}")
 
-                match = progress_pattern.search(line)
-                if match:
-                    percent = int(match.group(1))
-                    current_progress = percent
-                    progress.update(template_task, completed=percent)
-                log.debug(f"SteamCMD install output: {line.strip()}")
+            # Start progress updater in a thread
+            progress_thread = threading.Thread(
+                target=update_template_progress, daemon=True
+            )
+            progress_thread.start()
 
-            # Process stderr
-            for line in iter(process.stderr.readline, ""):
-                if not process_running:
-                    break
-                log.error(f"SteamCMD install error: {line.strip()}")
+            # Wait for process to complete
+            process.wait()
 
-        # Start progress updater in a thread
-        progress_thread = threading.Thread(target=update_template_progress, daemon=True)
-        progress_thread.start()
+            # Mark process as completed
+            process_running = False
 
-        # Wait for process to complete
-        process.wait()
+            # Small delay to let the thread catch up
+            time.sleep(0.2)
 
-        instances = [
-            d
-            for d in os.listdir(os.path.join(app_path, "servers"))
-            if os.path.isdir(os.path.join(app_path, "servers", d))
-        ]
+            # Ensure progress is at 100%
+            progress.update(
+                template_task,
+                completed=100,
+                description="[yellow]Server template update complete",
+            )
 
-        # Mark process as completed
-        process_running = False
-
-        # Small delay to let the thread catch up
-        time.sleep(0.2)
-
-        for server in instances:
-            server_path = os.path.join(app_path, "servers", server)
-            if server_path:
-                copytree(
-                    src=server_template_path,
-                    dst=server_path,
-                    ignore=ignore_patterns(
-                        "*.xml",
-                        "*.cfg",
-                        "*.json",
-                        "*.map",
-                        "*.c",
-                        "*.db",
-                        "*.bin",
-                        "*.001",
-                        "*.002",
-                        "*.txt",
-                    ),
-                    dirs_exist_ok=True,
+            if process.returncode != 0:
+                log.error(
+                    f"Failed to update server template with return code: {process.returncode}"
                 )
-
-        # Ensure progress is at 100%
-        progress.update(
-            template_task,
-            completed=100,
-            description="[yellow]Server template installation complete",
+                raise RuntimeError("Server template update failed")
+
+            installed_build = get_installed_build(server_template_path)
+            stale_instances = [
+                server
+                for server in instances
+                if records["instances"].get(server) != installed_build
+            ]
+
+        records["template"] = installed_build
+
+        # hash only what changed in the template since the last update
+        manifests_path = os.path.join(app_path, "manifests")
+        template_manifest_path = os.path.join(manifests_path, "template.json")
+        template_manifest = build_template_manifest(
+            server_template_path, load_manifest(template_manifest_path)
         )
+        save_manifest(template_manifest_path, template_manifest)
 
-        if process.returncode != 0:
-            log.error(
-                f"Failed to install server template with return code: {process.returncode}"
+        # push only changed files to instances that are behind the template
+        sync_task = progress.add_task(
+            "[yellow]Updating Servers...", total=len(stale_instances)
+        )
+        for server in stale_instances:
+            server_path = os.path.join(servers_path, server)
+            result = sync_instance(
+                server_template_path,
+                template_manifest,
+                server_path,
+                os.path.join(manifests_path, f"{server}.json"),
+                mode=clone_mode,
+            )
+            log.info(
+                f"[{server}] updated to build {installed_build}: {result['changed']} changed, {result['removed']} removed, {result['bytes']} bytes moved"
             )
-            raise RuntimeError("Server template installation failed")
+
+            records["instances"][server] = installed_build
+            save_build_records(app_path, records)
+            progress.update(sync_task, advance=1)
+
+    save_build_records(app_path, records)
 
 
 # find Steam path if it's not in expected location
@@ -476,189 +600,145 @@ def find_steam_workshop_path(app_id, app_path):
 
 
 # ensure mod installation in workshop and server root
-def validate_workshop_mods(username, server_configs, app_path):
+def validate_workshop_mods(username, server_configs, app_path, download_workers=3):
     # print to CLI UI, center text
     print_center("Validating mods...")
 
     # print("\nValidating mods...", end="", flush=True)
 
-    steamcmd_path = os.path.join(app_path, "steamcmd")
-    mod_templates_path = os.path.join(
-        steamcmd_path, "steamapps", "workshop", "content", "221100"
+    # gather every mod the configured servers need
+    mods_to_download = set()
+    for config in server_configs:
+        mod_ids, missing = plan_workshop_mods(config, app_path)
+        mods_to_download.update(missing)
+
+    workshop_mods_by_id = download_workshop_mods(
+        username, mods_to_download, app_path, download_workers=download_workers
     )
-    os.makedirs(mod_templates_path, exist_ok=True)
 
-    # dictionary to store mod_id -> mod_name mappings
-    workshop_mods_by_id = {}
-    workshop_mods_by_name = {}
+    print("Done\n")
 
-    # dictionary to track mod names that we already know
-    known_mod_names = {}
+    return workshop_mods_by_id
 
-    # first, build a mapping of existing mods in workshop directory
-    if os.path.exists(mod_templates_path):
-        existing_mod_ids = [
-            d
-            for d in os.listdir(mod_templates_path)
-            if os.path.isdir(os.path.join(mod_templates_path, d))
-        ]
 
-        # get names for existing mods
-        for mod_id in existing_mod_ids:
-            meta_path = os.path.join(mod_templates_path, mod_id, "meta.cpp")
-            name = mod_id
-
-            if os.path.exists(meta_path):
-                try:
-                    with open(meta_path) as cpp:
-                        lines = cpp.read().splitlines()
-
-                    for line in lines:
-                        if "name" in line:
-                            name = (
-                                line.replace('"', "")
-                                .replace(";", "")
-                                .replace("name =", "")
-                                .strip()
-                            )
-                            break
-                except Exception as e:
-                    log.warning(f"error reading meta.cpp for mod {mod_id}: {e}")
+# work out which workshop mods a server config needs and which are missing
+def plan_workshop_mods(server_config, app_path):
+    """
+    Resolve a server's client and server mods to workshop ids.
 
-            workshop_mods_by_id[mod_id] = name
-            workshop_mods_by_name[name] = mod_id
-            known_mod_names[name] = mod_id
+    Returns:
+        tuple: (set of every workshop id the server needs,
+                set of those not yet downloaded)
+    """
+    mod_templates_path = os.path.join(
+        app_path, "steamcmd", "steamapps", "workshop", "content", "221100"
+    )
 
-    # parse both mod IDs and mod names from configs
+    # dictionary to track mod names that we already know
+    known_mod_names = get_catalog(app_path).by_name()
+
+    # parse both mod IDs and mod names from config
     all_mod_ids = set()
     all_mod_names = set()
 
-    for config in server_configs:
-        # process client mods
-        if (
-            "client_mods" in config["server"]["info"]
-            and config["server"]["info"]["client_mods"]
-        ):
-            client_mods = config["server"]["info"]["client_mods"]
-            process_mod_string(client_mods, all_mod_ids, all_mod_names, known_mod_names)
+    info = server_config["server"]["info"]
+    for key in ("client_mods", "server_mods"):
+        if info.get(key):
+            process_mod_string(info[key], all_mod_ids, all_mod_names, known_mod_names)
 
-        # process server mods
-        if (
-            "server_mods" in config["server"]["info"]
-            and config["server"]["info"]["server_mods"]
-        ):
-            server_mods = config["server"]["info"]["server_mods"]
-            process_mod_string(server_mods, all_mod_ids, all_mod_names, known_mod_names)
+    # only consider valid mod IDs (10 digit numbers), names can't be downloaded
+    mod_ids = {
+        mod_id for mod_id in all_mod_ids if mod_id.isdigit() and len(mod_id) == 10
+    }
 
-    log.debug(f"all mod IDs: {all_mod_ids}")
-    log.debug(f"all mod names: {all_mod_names}")
+    # check if it's already in the workshop directory
+    missing = {
+        mod_id
+        for mod_id in mod_ids
+        if not os.path.exists(os.path.join(mod_templates_path, mod_id))
+    }
 
-    # determine which mods need to be downloaded (only IDs can be downloaded)
-    mods_to_download = set()
-    for mod_id in all_mod_ids:
-        # only consider valid mod IDs (10 digit numbers)
-        if mod_id.isdigit() and len(mod_id) == 10:
-            # check if it's already in the workshop directory
-            if not os.path.exists(os.path.join(mod_templates_path, mod_id)):
-                mods_to_download.add(mod_id)
+    return mod_ids, missing
 
-    log.debug(f"mods to download: {list(mods_to_download)}")
 
-    # download missing mods one at a time with timeout protection
-    if mods_to_download:
-        # Find Steam workshop content directory
-        default_workshop_path = find_steam_workshop_path("221100", app_path)
-        if not default_workshop_path:
-            log.warning("could not find Steam workshop content directory")
-            # Fallback to the path in the project directory
-            default_workshop_path = mod_templates_path
+# ensure mod installation in workshop
+def download_workshop_mods(
+    username, mods_to_download, app_path, download_workers=3, scheduler=None
+):
+    """
+    Download workshop mods that aren't installed yet.
 
-        log.info(f"using Steam workshop content directory: {default_workshop_path}")
+    Args:
+        scheduler (DownloadScheduler): Shared scheduler to queue the mods
+            on, so jobs resumed from a previous launch and mods that already
+            failed this run aren't retried by every call
 
-        # Process mods one at a time to prevent hanging
-        for mod_id in mods_to_download:
-            try:
-                log.info(f"Downloading mod {mod_id}...")
+    Returns:
+        dict: mod_id -> mod_name for every mod in the catalog
+    """
+    steamcmd_path = os.path.join(app_path, "steamcmd")
+    mod_templates_path = os.path.join(
+        steamcmd_path, "steamapps", "workshop", "content", "221100"
+    )
+    os.makedirs(mod_templates_path, exist_ok=True)
 
-                # Create a command list for better security and control
-                cmd = [
-                    "./steamcmd.sh",
-                    "+login",
-                    username,
-                    "+workshop_download_item",
-                    "221100",
-                    mod_id,
-                    "+quit",
-                ]
-
-                # Run with timeout
-                process = subprocess.run(
-                    cmd,
-                    shell=False,
-                    cwd=steamcmd_path,
-                    timeout=300,  # 5 minute timeout per mod
-                    stdout=subprocess.PIPE,
-                    stderr=subprocess.PIPE,
-                )
+    catalog = get_catalog(app_path)
+    mods_to_download = set(mods_to_download)
 
-                if process.returncode != 0:
-                    log.warning(
-                        f"error downloading mod {mod_id}: {process.stderr.decode('utf-8')}"
-                    )
-                else:
-                    log.info(f"successfully downloaded mod {mod_id}")
+    log.debug(f"mods to download: {list(mods_to_download)}")
 
-                # create symlink for the downloaded mod
-                default_mod_path = os.path.join(default_workshop_path, mod_id)
-                target_mod_path = os.path.join(mod_templates_path, mod_id)
+    if not mods_to_download:
+        log.info("no new mods to download")
+        return catalog.by_id()
 
-                if os.path.exists(default_mod_path) and not os.path.exists(
-                    target_mod_path
-                ):
-                    try:
-                        os.symlink(default_mod_path, target_mod_path)
-                        log.info(
-                            f"created symlink for mod {mod_id} from {default_mod_path} to {target_mod_path}"
-                        )
-                    except Exception as e:
-                        log.warning(f"failed to create symlink for mod {mod_id}: {e}")
+    # Find Steam workshop content directory
+    default_workshop_path = find_steam_workshop_path("221100", app_path)
+    if not default_workshop_path:
+        log.warning("could not find Steam workshop content directory")
+        # Fallback to the path in the project directory
+        default_workshop_path = mod_templates_path
 
-            except subprocess.TimeoutExpired:
-                log.error(f"timeout while downloading mod {mod_id}")
-            except Exception as e:
-                log.error(f"error processing mod {mod_id}: {e}")
-    else:
-        log.info("no new mods to download")
+    log.info(f"using Steam workshop content directory: {default_workshop_path}")
 
-    # Update mod_dict with names for newly downloaded mods
-    for mod_id in mods_to_download:
-        meta_path = os.path.join(mod_templates_path, mod_id, "meta.cpp")
-        name = mod_id  # Default to using the ID as the name
+    # download missing mods in parallel batches with retries
+    try:
+        if scheduler is None:
+            scheduler = DownloadScheduler(
+                steamcmd_path, username, workers=download_workers
+            )
+            mod_ids = None
+        else:
+            mod_ids = mods_to_download
+        scheduler.add(sorted(mods_to_download))
+        results = scheduler.run(mod_ids=mod_ids)
+    except Exception as e:
+        log.error(f"error downloading mods: {e}")
+        results = {}
 
-        if os.path.exists(meta_path):
-            try:
-                with open(meta_path) as cpp:
-                    lines = cpp.read().splitlines()
-
-                for line in lines:
-                    if "name" in line:
-                        name = (
-                            line.replace('"', "")
-                            .replace(";", "")
-                            .replace("name =", "")
-                            .strip()
-                        )
-                        break
-            except Exception as e:
-                log.warning(f"failed to parse meta.cpp for mod {mod_id}: {e}")
+    # include any jobs resumed from an interrupted run
+    mods_to_download.update(results)
 
-        workshop_mods_by_id[mod_id] = name
-        workshop_mods_by_name[name] = mod_id
-        known_mod_names[name] = mod_id
+    for mod_id, result in results.items():
+        if result["success"]:
+            log.info(f"successfully downloaded mod {mod_id}")
+        else:
+            log.warning(f"error downloading mod {mod_id}: {result['detail']}")
 
-    print("Done\n")
+        # create symlink for the downloaded mod
+        default_mod_path = os.path.join(default_workshop_path, mod_id)
+        target_mod_path = os.path.join(mod_templates_path, mod_id)
 
-    return workshop_mods_by_id
+        if os.path.exists(default_mod_path) and not os.path.exists(target_mod_path):
+            try:
+                os.symlink(default_mod_path, target_mod_path)
+                log.info(
+                    f"created symlink for mod {mod_id} from {default_mod_path} to {target_mod_path}"
+                )
+            except Exception as e:
+                log.warning(f"failed to create symlink for mod {mod_id}: {e}")
+
+    # Update mod_dict with names for newly downloaded mods
+    return catalog.refresh(force_ids=mods_to_download).by_id()
 
 
 # parse mod string to extract ids and names
@@ -684,10 +764,27 @@ def process_mod_string(mod_string, all_mod_ids, all_mod_names, known_mod_names):
 
 
 # copy mods to server directories and update configs
-def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_id):
+def import_mods(
+    app_path,
+    instance,
+    client_mods,
+    server_mods,
+    workshop_mods_by_id,
+    deploy_mode="auto",
+):
     """
-    copy mods to server directories and update config strings
+    deploy mods to server directories and update config strings
     with mod names instead of IDs
+
+    each mod version is staged under .mods/<id>/<manifest> and @name is
+    switched to it with one atomic symlink swap, so a starting server never
+    sees a half-deployed mod. the previous version is kept for rollback.
+
+    deploy_mode picks how the staged tree is built: 'reflink' or
+    'hardlink' link each file, 'copy' duplicates it, and 'auto' tries them
+    in that order. Staged versions are never symlinks into the workshop
+    folder, steamcmd changes that in place on the next update. Linking
+    falls back to copying when the filesystem doesn't allow it.
     """
     # create reverse lookup from mod name to mod ID
     name_to_id = {name: mod_id for mod_id, name in workshop_mods_by_id.items()}
@@ -709,6 +806,11 @@ def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_i
     log.debug(f"client mods before processing: {client}")
     log.debug(f"server mods before processing: {server}")
 
+    # installed workshop manifests, used as mod version ids
+    installed_items = read_workshop_items(
+        os.path.join(app_path, "steamcmd", "steamapps")
+    )
+
     # process all mods (both client and server)
     processed_client = []
     processed_server = []
@@ -740,57 +842,41 @@ def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_i
         if not mod_id or not mod_name:
             return mod
 
-        # check if mod exists in server directory
-        server_mod_path = os.path.join(instance_path, f"@{mod_name}")
         workshop_mod_path = os.path.join(
             app_path, "steamcmd", "steamapps", "workshop", "content", "221100", mod_id
         )
 
-        needs_copy = False
-
-        # determine if mod needs copying
-        if not os.path.exists(server_mod_path):
-            # mod doesn't exist in server directory
-            needs_copy = True
-        elif os.path.exists(workshop_mod_path):
-            # both exist, check if workshop version is newer
-            try:
-                workshop_time = os.path.getmtime(workshop_mod_path)
-                server_time = os.path.getmtime(server_mod_path)
-                if workshop_time > server_time:
-                    needs_copy = True
-            except Exception as e:
-                log.warning(f"error comparing mod timestamps: {e}")
-
-        # guard clause
-        if not needs_copy:
-            return mod_name
-
         if not os.path.exists(workshop_mod_path):
             log.warning(f"Workshop mod path does not exist: {workshop_mod_path}")
             return mod_name
 
-        # copy mod if needed
-        log.info(f"copying mod {mod_name} from workshop to server")
+        # versions are keyed by the workshop manifest steamcmd installed
+        version = installed_items.get(mod_id, {}).get("manifest")
+        if not version:
+            version = str(int(os.path.getmtime(workshop_mod_path)))
 
-        # remove existing mod directory if it exists
-        if os.path.exists(server_mod_path):
-            try:
-                shutil.rmtree(server_mod_path)
-            except Exception as e:
-                log.error(f"error removing existing mod directory: {e}")
+        # guard clause, already live at this version
+        if active_version(instance_path, mod_name) == (mod_id, version) and is_staged(
+            instance_path, mod_id, version
+        ):
+            return mod_name
+
+        log.info(f"staging mod {mod_name} version {version} ({deploy_mode})")
 
-        # copy mod directory
         try:
-            copytree(workshop_mod_path, server_mod_path)
+            # stage next to the live version, then swap it in atomically
+            version_path = stage_mod(
+                instance_path, mod_id, version, workshop_mod_path, deploy_mode
+            )
+            activate_mod(instance_path, mod_name, mod_id, version)
 
             # check for keys directory with any capitalization
             keys_dir_found = False
-            for sub_dir in os.listdir(server_mod_path):
+            for sub_dir in os.listdir(version_path):
                 if (
                     sub_dir.lower() == "keys" or sub_dir.lower() == "key"
-                ) and os.path.isdir(os.path.join(server_mod_path, sub_dir)):
-                    keys_src = os.path.join(server_mod_path, sub_dir)
+                ) and os.path.isdir(os.path.join(version_path, sub_dir)):
+                    keys_src = os.path.join(version_path, sub_dir)
                     keys_dir_found = True
 
                     log.debug(f"copying keys from {keys_src} to {keys_dir}")
@@ -808,7 +894,7 @@ def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_i
             if not keys_dir_found:
                 log.debug(f"no keys directory found in mod: {mod_name}")
         except Exception as e:
-            log.error(f"error copying mod {mod_name}: {e}")
+            log.error(f"error deploying mod {mod_name}: {e}")
 
         return mod_name
 
@@ -824,10 +910,6 @@ def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_i
         if processed_name:
             processed_server.append(processed_name)
 
-    # Ensure all file operations are complete
-    # Wait for any potential file operations to complete
-    time.sleep(3)
-
     # create updated mod strings
     client_mods = f"@{';@'.join(processed_client)}" if processed_client else ""
     server_mods = f"@{';@'.join(processed_server)}" if processed_server else ""
@@ -839,7 +921,12 @@ def import_mods(app_path, instance, client_mods, server_mods, workshop_mods_by_i
 
 
 def check_and_update_mods(
-    username, password, server_configs, app_path, force_check=False
+    username,
+    password,
+    server_configs,
+    app_path,
+    force_check=False,
+    download_workers=3,
 ):
     """
     Check if workshop mods have updates available and download them if needed.
@@ -848,7 +935,8 @@ def check_and_update_mods(
         username (str): Steam username
         server_configs (list): List of server configuration dictionaries
         app_path (str): Base application path
-        force_check (bool): Force update check even if last check was recent
+        force_check (bool): Ask Steam for new manifests even if last refresh was recent
+        download_workers (int): Number of parallel steamcmd download workers
 
     Returns:
         dict: Dictionary of updated mods (mod_id -> mod_name)
@@ -877,54 +965,22 @@ def check_and_update_mods(
     # Get current time
     current_time = time.time()
 
-    # Check if we've checked recently (within last 6 hours) and not forcing check
+    # Reading the acf is cheap, but asking Steam for new manifests costs a
+    # steamcmd session, so only refresh every 6 hours unless forced
     last_check_time = update_metadata.get("last_check_time", 0)
-    if not force_check and current_time - last_check_time < 21600:  # 6 hours in seconds
-        log.info(
-            f"Skipping mod update check - last check was {(current_time - last_check_time) / 3600:.1f} hours ago"
-        )
-        return {}
+    refresh_from_steam = (
+        force_check or current_time - last_check_time >= 21600
+    )  # 6 hours in seconds
 
     # Parse mod IDs from configs (same as in validate_workshop_mods)
     all_mod_ids = set()
     all_mod_names = set()
     known_mod_names = {}
 
-    # Dictionary to store mod details
-    workshop_mods_by_id = {}
-
-    # First, build mapping from existing mods
-    if os.path.exists(mod_templates_path):
-        existing_mod_ids = [
-            d
-            for d in os.listdir(mod_templates_path)
-            if os.path.isdir(os.path.join(mod_templates_path, d))
-        ]
-
-        # Get names for existing mods
-        for mod_id in existing_mod_ids:
-            meta_path = os.path.join(mod_templates_path, mod_id, "meta.cpp")
-            name = mod_id
-
-            if os.path.exists(meta_path):
-                try:
-                    with open(meta_path) as cpp:
-                        lines = cpp.read().splitlines()
-
-                    for line in lines:
-                        if "name" in line:
-                            name = (
-                                line.replace('"', "")
-                                .replace(";", "")
-                                .replace("name =", "")
-                                .strip()
-                            )
-                            break
-                except Exception as e:
-                    log.warning(f"Error reading meta.cpp for mod {mod_id}: {e}")
-
-            workshop_mods_by_id[mod_id] = name
-            known_mod_names[name] = mod_id
+    # Mod names from the shared catalog
+    catalog = get_catalog(app_path)
+    workshop_mods_by_id = catalog.by_id()
+    known_mod_names.update(catalog.by_name())
 
     # Extract mod IDs and names from configs
     for config in server_configs:
@@ -936,13 +992,9 @@ def check_and_update_mods(
         server_mods = config["server"]["info"]["server_mods"]
         process_mod_string(server_mods, all_mod_ids, all_mod_names, known_mod_names)
 
-    # Get current workshop mod details
+    # Manifests recorded at the previous check
     workshop_details = update_metadata.get("workshop_details", {})
 
-    # Get Steam API access for update checking
-    workshop_details_updated = False
-    mods_to_update = set()
-
     # Get default workshop path
     default_workshop_path = find_steam_workshop_path("221100", app_path)
     if not default_workshop_path:
@@ -953,141 +1005,54 @@ def check_and_update_mods(
     terminal_width = w
     bar_width = terminal_width - 50
 
-    # Initialize progress bar for update checking
-    with Progress(
-        SpinnerColumn(),
-        TextColumn("[bold blue]{task.description}"),
-        BarColumn(bar_width=bar_width),
-        TextColumn("[progress.percentage]{task.percentage:>3.0f}%"),
-        TimeElapsedColumn(),
-        console=console,
-        expand=True,
-    ) as progress:
-        check_task = progress.add_task(
-            "[cyan]Checking for mod updates...", total=len(all_mod_ids)
-        )
-
-        # Use SteamCMD to query workshop item details for each mod
-        for i, mod_id in enumerate(all_mod_ids):
-            # Console width for progress bar
-            w, h = get_console_size()
-            terminal_width = w
-            BarColumn(terminal_width - 50)
-            if not mod_id.isdigit() or len(mod_id) != 10:
-                continue
-
-            progress.update(
-                check_task, description=f"[cyan]Checking mod {mod_id}...", completed=i
-            )
-            log.debug(f"checking mod {mod_id}...")
+    # What steamcmd has recorded as installed, no per-mod queries needed
+    installed_items = read_workshop_items(os.path.join(steamcmd_path, "steamapps"))
 
-            # Check if mod exists in the workshop directory
-            mod_path = os.path.join(mod_templates_path, mod_id)
-            if not os.path.exists(mod_path):
-                # Mod doesn't exist locally, needs download
-                mods_to_update.add(mod_id)
-                continue
-
-            # Get last modified time of the mod directory
-            try:
-                local_mod_time = os.path.getmtime(mod_path)
-
-                # Get saved update details if available
-                mod_details = workshop_details.get(mod_id, {})
-                stored_update_time = mod_details.get("update_time", 0)
-
-                # Check if we need to query Steam for updates (once per day per mod)
-                need_query = (
-                    current_time - mod_details.get("last_query_time", 0) > 86400
-                )  # 24 hours
-
-                if need_query:
-                    # Use steamcmd to query workshop item details
-                    try:
-                        cmd = [
-                            "./steamcmd.sh",
-                            "+login",
-                            username,
-                            password,
-                            "+workshop_item_info",
-                            "221100",
-                            mod_id,
-                            "+quit",
-                        ]
-
-                        # Run with timeout
-                        process = subprocess.run(
-                            cmd,
-                            shell=False,
-                            cwd=steamcmd_path,
-                            timeout=60,  # 1 minute timeout per query
-                            stdout=subprocess.PIPE,
-                            stderr=subprocess.PIPE,
-                            text=True,
-                        )
+    mods_to_update = set()
+    changed_on_disk = set()
+    configured_mod_ids = sorted(
+        mod_id for mod_id in all_mod_ids if mod_id.isdigit() and len(mod_id) == 10
+    )
 
-                        # Parse the output to find the last updated time
-                        update_time = 0
-                        for line in process.stdout.splitlines():
-                            if (
-                                "timetouched" in line.lower()
-                                or "time_updated" in line.lower()
-                            ):
-                                parts = line.split(":", 1)
-                                if len(parts) == 2:
-                                    try:
-                                        update_time = int(parts[1].strip())
-                                        break
-                                    except ValueError:
-                                        pass
-
-                        # Update the metadata
-                        if update_time > 0:
-                            mod_details["update_time"] = update_time
-                            mod_details["last_query_time"] = current_time
-                            workshop_details[mod_id] = mod_details
-                            workshop_details_updated = True
-
-                            # Check if update is needed
-                            if update_time > local_mod_time:
-                                log.info(f"Update available for mod {mod_id}")
-                                mods_to_update.add(mod_id)
-
-                    except subprocess.TimeoutExpired:
-                        log.warning(f"Timeout while querying mod {mod_id}")
-                    except Exception as e:
-                        log.warning(f"Error querying mod {mod_id}: {e}")
+    for mod_id in configured_mod_ids:
+        item = installed_items.get(mod_id)
+        mod_path = os.path.join(mod_templates_path, mod_id)
 
-                # Check based on stored update time if query wasn't done
-                elif stored_update_time > local_mod_time:
-                    log.info(f"Update needed for mod {mod_id} based on stored metadata")
-                    mods_to_update.add(mod_id)
+        if not os.path.exists(mod_path) or not item or not item["installed"]:
+            # Mod doesn't exist locally, needs download
+            mods_to_update.add(mod_id)
+            continue
 
-            except Exception as e:
-                log.warning(f"Error checking mod {mod_id} for updates: {e}")
+        if (
+            item["latest_manifest"] != item["manifest"]
+            or item["latest_timeupdated"] > item["timeupdated"]
+            or item["size"] == 0
+        ):
+            log.info(f"Update available for mod {mod_id}")
+            mods_to_update.add(mod_id)
+            continue
 
-        # Update progress to complete
-        progress.update(
-            check_task,
-            completed=len(all_mod_ids),
-            description="[cyan]Mod update check complete",
-        )
+        # Installed content changed since the last check (e.g. downloaded
+        # during validation), servers still need the new version
+        stored = workshop_details.get(mod_id, {})
+        if stored.get("manifest") and stored["manifest"] != item["manifest"]:
+            log.info(f"Mod {mod_id} changed since last check")
+            changed_on_disk.add(mod_id)
 
-    # Update metadata with latest check time
-    update_metadata["last_check_time"] = current_time
-    update_metadata["workshop_details"] = workshop_details
+    log.debug(f"mods needing download: {sorted(mods_to_update)}")
 
-    # Save the metadata
-    try:
-        with open(update_metadata_path, "w") as f:
-            json.dump(update_metadata, f)
-    except Exception as e:
-        log.warning(f"Failed to save mod update metadata: {e}")
+    # Downloading an up to date item is a cheap no-op for steamcmd, so the
+    # periodic refresh reuses the batched session to pull new manifests
+    mods_to_fetch = set(mods_to_update)
+    if refresh_from_steam:
+        mods_to_fetch.update(configured_mod_ids)
 
     # If there are mods to update, download them
     updated_mods = {}
-    if mods_to_update:
-        log.info(f"Updating {len(mods_to_update)} mods...")
+    if mods_to_fetch:
+        log.info(
+            f"Updating {len(mods_to_update)} mods, refreshing {len(mods_to_fetch) - len(mods_to_update)} more..."
+        )
 
         with Progress(
             SpinnerColumn(),
@@ -1100,175 +1065,118 @@ def check_and_update_mods(
             expand=True,
         ) as progress:
             update_task = progress.add_task(
-                f"[yellow]Updating {len(mods_to_update)} mods...",
-                total=len(mods_to_update),
+                f"[yellow]Updating {len(mods_to_fetch)} mods...",
+                total=len(mods_to_fetch),
             )
 
-            # Download each mod that needs updating
-            for i, mod_id in enumerate(mods_to_update):
-                try:
-                    mod_name = workshop_mods_by_id.get(mod_id, mod_id)
-                    progress.update(
-                        update_task,
-                        description=f"[yellow]Updating mod {mod_name} ({mod_id})...",
-                        completed=i,
-                    )
-
-                    # Create command for workshop download
-                    cmd = [
-                        "./steamcmd.sh",
-                        "+login",
-                        username,
-                        password,
-                        "+workshop_download_item",
-                        "221100",
-                        mod_id,
-                        "+quit",
-                    ]
-
-                    # Process running flag for progress tracking
-                    process_running = True
-
-                    # Run steamcmd with correct arguments using Popen for real-time output
-                    process = subprocess.Popen(
-                        cmd,
-                        shell=False,
-                        cwd=steamcmd_path,
-                        stdout=subprocess.PIPE,
-                        stderr=subprocess.PIPE,
-                        text=True,
-                        bufsize=1,
-                        universal_newlines=True,
-                    )
+            # report each mod as the batch works through it
+            def on_result(mod_id, success, detail):
+                mod_name = workshop_mods_by_id.get(mod_id, mod_id)
+                progress.update(
+                    update_task,
+                    description=f"[yellow]Updated mod {mod_name} ({mod_id})",
+                    advance=1,
+                )
+                if not success:
+                    log.error(f"Failed to download mod {mod_id}: {detail}")
 
-                    # Regex to extract progress percentage from SteamCMD output
-                    progress_pattern = re.compile(r"Update state \(0x\d+\) (\d+)%.*")
+            # download mods that need updating in parallel batches with retries
+            try:
+                scheduler = DownloadScheduler(
+                    steamcmd_path,
+                    username,
+                    password=password,
+                    workers=download_workers,
+                )
+                scheduler.add(sorted(mods_to_fetch))
+                results = scheduler.run(on_result=on_result)
+            except Exception as e:
+                log.error(f"Error updating mods: {e}")
+                results = {}
 
-                    # Current progress percentage
-                    current_progress = 0
-                    download_sub_task = progress.add_task(
-                        f"[green]Downloading {mod_name}...", total=100
-                    )
+            # steamcmd rewrote the acf, compare manifests to see what changed
+            refreshed_items = read_workshop_items(
+                os.path.join(steamcmd_path, "steamapps")
+            )
 
-                    # Function to parse output and update progress
-                    def update_download_progress():
-                        nonlocal current_progress
-                        for line in iter(process.stdout.readline, ""):
-                            if not process_running:
-                                break
-
-                            match = progress_pattern.search(line)
-                            if match:
-                                percent = int(match.group(1))
-                                current_progress = percent
-                                progress.update(download_sub_task, completed=percent)
-                            log.debug(f"SteamCMD download output: {line.strip()}")
-
-                        # Process stderr
-                        for line in iter(process.stderr.readline, ""):
-                            if not process_running:
-                                break
-                            log.error(f"SteamCMD download error: {line.strip()}")
-
-                    # Start progress updater in a thread
-                    progress_thread = threading.Thread(
-                        target=update_download_progress, daemon=True
-                    )
-                    progress_thread.start()
+            for mod_id, result in results.items():
+                if not result["success"]:
+                    continue
 
-                    # Wait for process to complete
-                    process.wait()
+                before = installed_items.get(mod_id, {}).get("manifest")
+                after = refreshed_items.get(mod_id, {}).get("manifest")
+                if mod_id not in mods_to_update and before == after:
+                    continue
 
-                    # Mark process as completed
-                    process_running = False
+                log.info(f"Successfully updated mod {mod_id}")
 
-                    # Small delay to let the thread catch up
-                    time.sleep(0.2)
+                # create symlink for the downloaded mod if needed
+                default_mod_path = os.path.join(default_workshop_path, mod_id)
+                target_mod_path = os.path.join(mod_templates_path, mod_id)
 
-                    # Ensure progress is at 100%
-                    progress.update(
-                        download_sub_task,
-                        completed=100,
-                        description=f"[green]Download complete: {mod_name}",
-                    )
+                if (
+                    os.path.exists(default_mod_path)
+                    and default_mod_path != target_mod_path
+                ):
+                    # Remove existing symlink if it exists
+                    if os.path.exists(target_mod_path):
+                        if os.path.islink(target_mod_path):
+                            os.unlink(target_mod_path)
+                        else:
+                            shutil.rmtree(target_mod_path)
 
-                    if process.returncode != 0:
-                        log.error(
-                            f"Failed to download mod {mod_id} with return code: {process.returncode}"
+                    try:
+                        os.symlink(default_mod_path, target_mod_path)
+                        log.info(
+                            f"Created symlink for mod {mod_id} from {default_mod_path} to {target_mod_path}"
                         )
-                    else:
-                        log.info(f"Successfully updated mod {mod_id}")
-
-                        # create symlink for the downloaded mod if needed
-                        default_mod_path = os.path.join(default_workshop_path, mod_id)
-                        target_mod_path = os.path.join(mod_templates_path, mod_id)
-
-                        if (
-                            os.path.exists(default_mod_path)
-                            and default_mod_path != target_mod_path
-                        ):
-                            # Remove existing symlink if it exists
-                            if os.path.exists(target_mod_path):
-                                if os.path.islink(target_mod_path):
-                                    os.unlink(target_mod_path)
-                                else:
-                                    shutil.rmtree(target_mod_path)
-
-                            try:
-                                os.symlink(default_mod_path, target_mod_path)
-                                log.info(
-                                    f"Created symlink for mod {mod_id} from {default_mod_path} to {target_mod_path}"
-                                )
-                            except Exception as e:
-                                log.warning(
-                                    f"Failed to create symlink for mod {mod_id}: {e}"
-                                )
-
-                        # Read updated mod name from meta.cpp
-                        meta_path = os.path.join(mod_templates_path, mod_id, "meta.cpp")
-                        name = mod_id
-
-                        if os.path.exists(meta_path):
-                            try:
-                                with open(meta_path) as cpp:
-                                    lines = cpp.read().splitlines()
-
-                                for line in lines:
-                                    if "name" in line:
-                                        name = (
-                                            line.replace('"', "")
-                                            .replace(";", "")
-                                            .replace("name =", "")
-                                            .strip()
-                                        )
-                                        break
-                            except Exception as e:
-                                log.warning(
-                                    f"Error reading meta.cpp for mod {mod_id}: {e}"
-                                )
-
-                        # Store the updated mod
-                        workshop_mods_by_id[mod_id] = name
-                        updated_mods[mod_id] = name
+                    except Exception as e:
+                        log.warning(f"Failed to create symlink for mod {mod_id}: {e}")
 
-                except subprocess.TimeoutExpired:
-                    log.error(f"Timeout while updating mod {mod_id}")
-                except Exception as e:
-                    log.error(f"Error updating mod {mod_id}: {e}")
+                updated_mods[mod_id] = mod_id
 
-                # Remove the download subtask
-                progress.remove_task(download_sub_task)
+            # Re-index the updated mods to pick up their names
+            if updated_mods:
+                catalog.refresh(force_ids=updated_mods)
+                workshop_mods_by_id = catalog.by_id()
+                for mod_id in updated_mods:
+                    updated_mods[mod_id] = catalog.name(mod_id)
 
             # Update progress to complete
             progress.update(
                 update_task,
-                completed=len(mods_to_update),
+                completed=len(mods_to_fetch),
                 description="[yellow]Mod updates complete",
             )
 
     else:
         log.info("All mods are up to date")
 
+    # Mods that changed on disk since the last check need redeploying too
+    for mod_id in changed_on_disk:
+        updated_mods.setdefault(mod_id, workshop_mods_by_id.get(mod_id, mod_id))
+
+    # Record installed manifests so the next check can spot changes
+    for mod_id, item in read_workshop_items(
+        os.path.join(steamcmd_path, "steamapps")
+    ).items():
+        workshop_details[mod_id] = {
+            "manifest": item["manifest"],
+            "timeupdated": item["timeupdated"],
+            "size": item["size"],
+        }
+
+    if refresh_from_steam:
+        update_metadata["last_check_time"] = current_time
+    update_metadata["workshop_details"] = workshop_details
+
+    # Save the metadata
+    try:
+        with open(update_metadata_path, "w") as f:
+            json.dump(update_metadata, f)
+    except Exception as e:
+        log.warning(f"Failed to save mod update metadata: {e}")
+
     # If any mods were updated, we need to update the servers
     if updated_mods:
         # Handle server side updates here or call other functions as needed
@@ -0,0 +1,161 @@
+import logging
+import os
+import re
+
+log = logging.getLogger(__name__)
+
+
+# quoted string, line comment, brace, or bare word
+token_pattern = re.compile(r'"((?:\\.|[^"\\])*)"|(//[^\n]*)|([{}])|([^\s{}"]+)')
+escapes = {"n": "\n", "t": "\t", "\\": "\\", '"': '"'}
+
+# parsed acf files keyed by path -> (mtime_ns, size, data)
+_acf_cache = {}
+
+
+def _unescape(value):
+    if "\\" not in value:
+        return value
+    return re.sub(r"\\(.)", lambda m: escapes.get(m.group(1), m.group(1)), value)
+
+
+def parse_vdf(text):
+    """
+    Parse Valve KeyValues text (.vdf/.acf) into nested dictionaries.
+
+    Keys map either to a string or to another dictionary. Duplicate keys
+    keep the last value, which matches how Steam reads these files.
+    """
+    root = {}
+    stack = [root]
+    key = None
+
+    for match in token_pattern.finditer(text):
+        quoted, comment, brace, bare = match.groups()
+
+        if comment:
+            continue
+        elif brace == "{":
+            child = {}
+            if key is not None:
+                stack[-1][key] = child
+            stack.append(child)
+            key = None
+        elif brace == "}":
+            if len(stack) > 1:
+                stack.pop()
+            key = None
+        else:
+            token = _unescape(quoted) if quoted is not None else bare
+            if key is None:
+                key = token
+            else:
+                stack[-1][key] = token
+                key = None
+
+    return root
+
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace('"', '\\"')
+
+
+def dump_vdf(data, depth=0):
+    """Serialize nested dictionaries back to Valve KeyValues text"""
+    pad = "\t" * depth
+    lines = []
+    for key, value in data.items():
+        if isinstance(value, dict):
+            lines.append(f'{pad}"{_escape(key)}"')
+            lines.append(f"{pad}{{")
+            if value:
+                lines.append(dump_vdf(value, depth + 1).rstrip("\n"))
+            lines.append(f"{pad}}}")
+        else:
+            lines.append(f'{pad}"{_escape(key)}"\t\t"{_escape(str(value))}"')
+    return "\n".join(lines) + "\n"
+
+
+def write_acf(path, data):
+    """Write an acf file atomically, readers never see a partial file"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(dump_vdf(data))
+    os.replace(tmp_path, path)
+
+
+def load_acf(path):
+    """
+    Load and parse an acf file, reusing the cached result while the file's
+    mtime and size are unchanged. Returns an empty dict if it is missing.
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        _acf_cache.pop(path, None)
+        return {}
+
+    cached = _acf_cache.get(path)
+    if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+        return cached[2]
+
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            data = parse_vdf(f.read())
+    except Exception as e:
+        log.warning(f"failed to parse {path}: {e}")
+        return {}
+
+    _acf_cache[path] = (stat.st_mtime_ns, stat.st_size, data)
+    return data
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return 0
+
+
+def read_workshop_items(steamapps_path, app_id="221100"):
+    """
+    Read installed workshop items from appworkshop_<app_id>.acf.
+
+    Returns a dict of workshop id -> {"size", "timeupdated", "manifest",
+    "latest_timeupdated", "latest_manifest"}. The latest_* fields are
+    what Steam last reported as current, so an item whose latest values
+    differ from the installed ones is out of date.
+    """
+    acf_path = os.path.join(steamapps_path, "workshop", f"appworkshop_{app_id}.acf")
+    data = load_acf(acf_path).get("AppWorkshop", {})
+
+    installed = data.get("WorkshopItemsInstalled", {})
+    details = data.get("WorkshopItemDetails", {})
+
+    items = {}
+    for mod_id in set(installed) | set(details):
+        item = installed.get(mod_id, {})
+        detail = details.get(mod_id, {})
+        manifest = item.get("manifest") or detail.get("manifest", "")
+        timeupdated = _int(item.get("timeupdated") or detail.get("timeupdated"))
+
+        items[mod_id] = {
+            "installed": mod_id in installed,
+            "size": _int(item.get("size")),
+            "timeupdated": timeupdated,
+            "manifest": manifest,
+            "latest_timeupdated": _int(detail.get("latest_timeupdated"))
+            or timeupdated,
+            "latest_manifest": detail.get("latest_manifest") or manifest,
+        }
+
+    return items
+
+
+def read_app_manifest(steamapps_path, app_id="223350"):
+    """
+    Read appmanifest_<app_id>.acf and return its AppState section, which
+    holds fields such as buildid, StateFlags and SizeOnDisk.
+    """
+    acf_path = os.path.join(steamapps_path, f"appmanifest_{app_id}.acf")
+    return load_acf(acf_path).get("AppState", {})
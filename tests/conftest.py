@@ -0,0 +1,5 @@
+import os
+import sys
+
+# dman runs from its checkout, make `modules` importable the same way
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
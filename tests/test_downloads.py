@@ -0,0 +1,134 @@
+import os
+import sys
+import json
+import threading
+
+from modules import downloads
+from modules.downloads import DownloadScheduler
+from modules.vdf import read_workshop_items
+
+# stands in for steamcmd.sh: reads the acf at start and writes it back at
+# exit like SteamCMD does, so sessions sharing one install lose entries
+FAKE_STEAMCMD = """#!{python}
+import os, sys, time
+sys.path.insert(0, {root!r})
+from modules.vdf import parse_vdf, write_acf
+
+install_dir = os.getcwd()
+mod_ids = []
+for line in open(sys.argv[2]):
+    words = line.split()
+    if words and words[0] == "force_install_dir":
+        install_dir = line.split(None, 1)[1].strip().strip('"')
+    elif words and words[0] == "workshop_download_item":
+        mod_ids.append(words[2])
+
+workshop = os.path.join(install_dir, "steamapps", "workshop")
+acf_path = os.path.join(workshop, "appworkshop_221100.acf")
+os.makedirs(workshop, exist_ok=True)
+try:
+    data = parse_vdf(open(acf_path).read())
+except FileNotFoundError:
+    data = {{}}
+installed = data.setdefault("AppWorkshop", {{}}).setdefault(
+    "WorkshopItemsInstalled", {{}}
+)
+
+for mod_id in mod_ids:
+    time.sleep(0.05)
+    content = os.path.join(workshop, "content", "221100", mod_id)
+    os.makedirs(content, exist_ok=True)
+    open(os.path.join(content, "meta.cpp"), "w").write(mod_id)
+    installed[mod_id] = {{"manifest": "m" + mod_id}}
+    print(f"Success. Downloaded item {{mod_id}} to {{content}}", flush=True)
+
+write_acf(acf_path, data)
+"""
+
+
+def make_steamcmd(path):
+    os.makedirs(path, exist_ok=True)
+    script = os.path.join(path, "steamcmd.sh")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    with open(script, "w") as f:
+        f.write(FAKE_STEAMCMD.format(python=sys.executable, root=root))
+    os.chmod(script, 0o755)
+
+
+def test_parallel_workers_keep_every_download(tmp_path):
+    steamcmd_path = str(tmp_path / "steamcmd")
+    make_steamcmd(steamcmd_path)
+    mod_ids = [str(1000000000 + i) for i in range(9)]
+
+    finished = []
+    lock = threading.Lock()
+
+    def on_result(mod_id, success, detail):
+        with lock:
+            finished.append((mod_id, success))
+
+    scheduler = DownloadScheduler(steamcmd_path, "user", workers=3, batch_size=2)
+    scheduler.add(mod_ids)
+    results = scheduler.run(on_result=on_result)
+
+    assert all(result["success"] for result in results.values())
+    assert sorted(mod_id for mod_id, _ in finished) == mod_ids
+
+    # every mod landed in the shared install and is recorded in its acf
+    steamapps = os.path.join(steamcmd_path, "steamapps")
+    content = os.path.join(steamapps, "workshop", "content", "221100")
+    assert sorted(os.listdir(content)) == mod_ids
+    items = read_workshop_items(steamapps)
+    assert sorted(items) == mod_ids
+    assert all(items[mod_id]["manifest"] == "m" + mod_id for mod_id in mod_ids)
+
+
+def test_redownload_replaces_shared_copy(tmp_path):
+    steamcmd_path = str(tmp_path / "steamcmd")
+    make_steamcmd(steamcmd_path)
+
+    for _ in range(2):
+        scheduler = DownloadScheduler(steamcmd_path, "user", workers=2, batch_size=1)
+        scheduler.add(["1000000001", "1000000002"])
+        results = scheduler.run()
+        assert all(result["success"] for result in results.values())
+
+    # the workers don't keep items around once they are published
+    workers = os.path.join(steamcmd_path, "dman_workers")
+    for worker in os.listdir(workers):
+        content = os.path.join(workers, worker, "steamapps", "workshop", "content")
+        assert not os.listdir(os.path.join(content, "221100"))
+        assert read_workshop_items(os.path.join(workers, worker, "steamapps")) == {}
+
+
+def test_failed_jobs_are_not_retried_by_later_batches(tmp_path, monkeypatch):
+    steamcmd_path = str(tmp_path / "steamcmd")
+    os.makedirs(steamcmd_path)
+    # a job left over from an interrupted launch
+    with open(os.path.join(steamcmd_path, "dman_download_queue.json"), "w") as f:
+        json.dump({"jobs": {"3": {"status": "failed", "attempts": 3}}}, f)
+
+    calls = []
+
+    def download(steamcmd_path, username, mod_ids, **kwargs):
+        calls.append(sorted(mod_ids))
+        return {
+            mod_id: {"success": mod_id != "1", "detail": "Success"}
+            for mod_id in mod_ids
+        }
+
+    monkeypatch.setattr(downloads, "download_workshop_items", download)
+    scheduler = DownloadScheduler(steamcmd_path, "user", workers=1, retries=1)
+
+    # one batch per instance, the resumed job isn't part of either
+    scheduler.add(["1"])
+    assert not scheduler.run(mod_ids=["1"])["1"]["success"]
+    scheduler.add(["1", "2"])
+    assert list(scheduler.run(mod_ids=["1", "2"])) == ["2"]
+    assert calls == [["1"], ["2"]]
+
+    # leftovers are drained once, the failure is kept for the next launch
+    assert list(scheduler.run()) == ["3"]
+    assert scheduler.run() == {}
+    assert calls == [["1"], ["2"], ["3"]]
+    assert DownloadScheduler(steamcmd_path, "user").jobs["1"]["status"] == "pending"
@@ -0,0 +1,61 @@
+import datetime
+import sqlite3
+import time
+
+from modules.events import EventJournal
+
+
+def event(message):
+    return {
+        "timestamp": datetime.datetime.now(),
+        "state": "running",
+        "message": message,
+    }
+
+
+def count(path):
+    db = sqlite3.connect(path)
+    try:
+        return db.execute("SELECT COUNT(*) FROM events").fetchone()[0]
+    finally:
+        db.close()
+
+
+def test_appends_are_buffered_until_flush(tmp_path):
+    path = str(tmp_path / "events.db")
+    journal = EventJournal(path, flush_interval=60)
+
+    for i in range(5):
+        journal.append("server1", event(f"event {i}"))
+    assert count(path) == 0
+
+    journal.flush()
+    assert count(path) == 5
+    journal.close()
+
+
+def test_full_buffer_flushes_in_the_background(tmp_path):
+    path = str(tmp_path / "events.db")
+    journal = EventJournal(path, flush_interval=60, flush_size=3)
+
+    for i in range(3):
+        journal.append("server1", event(f"event {i}"))
+    deadline = time.time() + 5
+    while count(path) < 3 and time.time() < deadline:
+        time.sleep(0.01)
+    assert count(path) == 3
+    journal.close()
+
+
+def test_query_and_close_see_pending_events(tmp_path):
+    path = str(tmp_path / "events.db")
+    journal = EventJournal(path, flush_interval=60)
+
+    journal.append("server1", event("started"))
+    journal.append("server2", event("stopped"))
+    messages = [e["message"] for e in journal.query(instance="server1")]
+    assert messages == ["started"]
+
+    journal.append("server1", event("restarted"))
+    journal.close()
+    assert count(path) == 3
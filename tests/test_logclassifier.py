@@ -0,0 +1,45 @@
+import pytest
+
+from modules.logclassifier import LineClassifier, regression_lines, self_check
+
+
+@pytest.mark.parametrize("line, expected", list(regression_lines.items()))
+def test_regression_line(line, expected):
+    result = LineClassifier().classify(line)
+    assert result is not None
+    captures = result[2]
+    got = (
+        result[1],
+        captures.get("player"),
+        captures.get("player_id") or captures.get("connect_id"),
+    )
+    assert got == expected
+
+
+def test_self_check():
+    assert self_check() == []
+
+
+class SpyPattern:
+    """Stands in for a compiled rule pattern and records every search"""
+
+    def __init__(self):
+        self.searched = []
+
+    def search(self, line):
+        self.searched.append(line)
+        return None
+
+
+def test_prefilter_rejects_before_rules():
+    classifier = LineClassifier([("hay", ["needle"], r"hay", None, "Found hay")])
+    spy = SpyPattern()
+    index, event, _, state = classifier.rules[0]
+    classifier.rules[0] = (index, event, spy, state)
+
+    # the pattern would match, but the line lacks the rule's literal
+    assert classifier.classify("a stack of hay") is None
+    assert spy.searched == []
+
+    assert classifier.classify("hay with a needle") is None
+    assert spy.searched == ["hay with a needle"]
@@ -0,0 +1,44 @@
+import sys
+import json
+import queue
+import pickle
+import logging
+
+from __logger__ import JsonLinesFormatter, TracebackQueueHandler
+
+
+def queued_record(message, *args):
+    logger = logging.getLogger("test_logger")
+    try:
+        raise ValueError("boom")
+    except ValueError:
+        record = logger.makeRecord(
+            logger.name, logging.ERROR, __file__, 1, message, args, sys.exc_info()
+        )
+    return TracebackQueueHandler(queue.SimpleQueue()).prepare(record)
+
+
+def test_jsonl_keeps_traceback_of_queued_record():
+    record = queued_record("[%s] failed", "inst")
+
+    entry = json.loads(JsonLinesFormatter().format(record))
+
+    assert entry["message"] == "[inst] failed"
+    assert "Traceback" in entry["exception"]
+    assert "ValueError: boom" in entry["exception"]
+
+
+def test_text_logs_still_show_traceback():
+    record = queued_record("[inst] failed")
+
+    text = logging.Formatter("%(levelname)s - %(message)s").format(record)
+
+    assert text.startswith("ERROR - [inst] failed\nTraceback")
+    assert text.rstrip().endswith("ValueError: boom")
+
+
+def test_queued_record_can_be_pickled():
+    record = pickle.loads(pickle.dumps(queued_record("[inst] failed")))
+
+    assert record.exc_info is None
+    assert "ValueError: boom" in record.exc_text
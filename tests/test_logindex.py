@@ -0,0 +1,99 @@
+import os
+import datetime
+
+from modules.logindex import LogIndex, read_line
+
+
+ADM_LINES = [
+    "AdminLog started on 2026-10-18 at 23:00:00",
+    '23:10:00 | Player "John" (id=AbC123=) has connected',
+    '23:40:00 | Player "John" (id=AbC123= pos=<1.0, 2.0, 3.0>) hit by Infected',
+    # past midnight, the file name only carries the start date
+    '00:20:00 | Player "Bob" (id=XyZ789=) has connected',
+]
+
+
+def write(path, lines, mode="w"):
+    with open(path, mode) as f:
+        f.write("".join(line + "\n" for line in lines))
+
+
+def at(day, hour, minute):
+    return datetime.datetime(2026, 10, day, hour, minute)
+
+
+def make_logs(tmp_path):
+    profiles = tmp_path / "profiles"
+    os.makedirs(profiles)
+    adm = str(profiles / "DayZServer_x64_2026-10-18_23-00-00.ADM")
+    other = str(profiles / "DayZServer_x64_2026-10-18_22-00-00.ADM")
+    write(adm, ADM_LINES)
+    write(other, ['22:30:00 | Player "john" (id=AbC123=) has connected'])
+    return adm, other
+
+
+def test_postings_and_day_rollover(tmp_path):
+    adm, _ = make_logs(tmp_path)
+    index = LogIndex(str(tmp_path / "log_index.db"))
+    assert index.index_file(adm, "server1") == 3
+
+    postings = index.query()
+    assert [(p["event"], p["player"], p["timestamp"]) for p in postings] == [
+        ("player_connected", "John", at(18, 23, 10)),
+        ("hit", "John", at(18, 23, 40)),
+        ("player_connected", "Bob", at(19, 0, 20)),
+    ]
+
+    # the stored offset reads back the exact source line
+    assert [read_line(p["path"], p["offset"]) for p in postings] == ADM_LINES[1:]
+    index.close()
+
+
+def test_reindex_resumes_from_saved_offset(tmp_path):
+    adm, _ = make_logs(tmp_path)
+    path = str(tmp_path / "log_index.db")
+    index = LogIndex(path)
+    index.index_file(adm, "server1")
+    assert index.index_file(adm, "server1") == 0
+
+    # a half-written line waits until it is complete
+    with open(adm, "a") as f:
+        f.write('00:30:00 | Player "Bob" (id=XyZ789=) hit by')
+    assert index.index_file(adm, "server1") == 0
+    index.close()
+
+    # resumes after a restart with the time of the last line it saw
+    index = LogIndex(path)
+    write(adm, [" Infected"], mode="a")
+    assert index.index_file(adm, "server1") == 1
+    posting = index.query(event="hit", player="bob")[0]
+    assert posting["timestamp"] == at(19, 0, 30)
+    assert read_line(adm, posting["offset"]).endswith("hit by Infected")
+    assert len(index.query(limit=1000)) == 4
+    index.close()
+
+
+def test_query_filters(tmp_path):
+    adm, other = make_logs(tmp_path)
+    index = LogIndex(str(tmp_path / "log_index.db"))
+    index.index_file(adm, "server1")
+    index.index_file(other, "server2")
+
+    def events(**filters):
+        return [(p["instance"], p["event"]) for p in index.query(**filters)]
+
+    assert events(instance="server2") == [("server2", "player_connected")]
+    assert events(player="JOHN") == [
+        ("server2", "player_connected"),
+        ("server1", "player_connected"),
+        ("server1", "hit"),
+    ]
+    assert events(event="hit") == [("server1", "hit")]
+    assert events(start=at(18, 23, 10), end=at(19, 0, 0)) == [
+        ("server1", "player_connected"),
+        ("server1", "hit"),
+    ]
+    assert events(instance="server1", player="john", limit=1) == [
+        ("server1", "player_connected")
+    ]
+    index.close()
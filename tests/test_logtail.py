@@ -0,0 +1,114 @@
+import os
+import time
+import asyncio
+
+import pytest
+
+from modules import logtail
+from modules.logtail import ProfileTailer
+
+
+@pytest.fixture(autouse=True)
+def no_inotify(monkeypatch):
+    """Drive the polling path"""
+
+    def unavailable(path):
+        raise OSError("inotify disabled for tests")
+
+    monkeypatch.setattr(logtail, "Inotify", unavailable)
+
+
+def append(path, text):
+    with open(path, "a") as f:
+        f.write(text)
+
+
+async def wait_for(lines, count):
+    for _ in range(500):
+        if len(lines) >= count:
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"only saw {lines}")
+
+
+def tailer(tmp_path, lines):
+    return ProfileTailer(
+        str(tmp_path / "profiles"),
+        str(tmp_path / "offsets.json"),
+        lambda batch, kind: lines.extend((kind, line) for line in batch),
+        poll_interval=0.01,
+    )
+
+
+def test_existing_file_is_followed_from_its_end(tmp_path):
+    profiles = tmp_path / "profiles"
+    os.makedirs(profiles)
+    rpt = str(profiles / "DayZServer_x64_2026-10-18_12-00-00.RPT")
+    append(rpt, "old line 1\nold line 2\n")
+    old = time.time() - 60
+    os.utime(rpt, (old, old))
+
+    async def run():
+        lines = []
+        task = asyncio.create_task(tailer(tmp_path, lines).run())
+        await asyncio.sleep(0.05)
+        append(rpt, "new line\npartial")
+        await wait_for(lines, 1)
+        await asyncio.sleep(0.05)
+        task.cancel()
+        return lines
+
+    # the partial line waits for its newline
+    assert asyncio.run(run()) == [("RPT", "new line")]
+
+
+def test_offsets_survive_a_restart(tmp_path):
+    profiles = tmp_path / "profiles"
+    os.makedirs(profiles)
+    adm = str(profiles / "DayZServer_x64_2026-10-18_12-00-00.ADM")
+
+    async def run(text, count):
+        lines = []
+        task = asyncio.create_task(tailer(tmp_path, lines).run())
+        await asyncio.sleep(0.05)
+        append(adm, text)
+        await wait_for(lines, count)
+        task.cancel()
+        await asyncio.gather(task, return_exceptions=True)
+        return lines
+
+    assert asyncio.run(run("first\n", 1)) == [("ADM", "first")]
+    assert os.path.exists(tmp_path / "offsets.json")
+
+    # written while dman was down, picked up without rereading "first"
+    append(adm, "while down\n")
+    assert asyncio.run(run("second\n", 2)) == [("ADM", "while down"), ("ADM", "second")]
+
+
+def test_rotation_and_truncation(tmp_path):
+    profiles = tmp_path / "profiles"
+    os.makedirs(profiles)
+    first = str(profiles / "DayZServer_x64_2026-10-18_12-00-00.RPT")
+    second = str(profiles / "DayZServer_x64_2026-10-18_18-00-00.RPT")
+
+    lines = []
+    follower = tailer(tmp_path, lines)
+    append(first, "one\n")
+    follower.scan()
+    assert lines == [("RPT", "one")]
+
+    # the old file's tail is read before switching to the new one
+    append(first, "two\n")
+    append(second, "three\n")
+    later = time.time() + 10
+    os.utime(second, (later, later))
+    follower.scan()
+    assert lines[1:] == [("RPT", "two"), ("RPT", "three")]
+    assert follower.files["RPT"]["path"] == second
+
+    # truncated in place, read again from the start
+    with open(second, "w") as f:
+        f.write("four\n")
+    os.utime(second, (later, later))
+    follower.scan()
+    assert lines[3:] == [("RPT", "four")]
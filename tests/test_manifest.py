@@ -0,0 +1,114 @@
+import os
+
+from modules.clone import clone_tree
+from modules.manifest import build_template_manifest, diff_manifests, sync_instance
+
+
+def write(path, content):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # replace rather than rewrite, the way steamcmd updates files
+    with open(f"{path}.new", "w") as f:
+        f.write(content)
+    os.replace(f"{path}.new", path)
+
+
+def read(path):
+    with open(path) as f:
+        return f.read()
+
+
+def make_template(root):
+    write(os.path.join(root, "DayZServer"), "server v1")
+    write(os.path.join(root, "addons", "ai.pbo"), "ai v1")
+    write(os.path.join(root, "addons", "old.pbo"), "old")
+    write(os.path.join(root, "serverDZ.cfg"), "hostname = template")
+    write(os.path.join(root, "profiles", "server.log"), "")
+    write(
+        os.path.join(root, "mpmissions", "dayzOffline", "storage_1", "data.bin"), "x"
+    )
+
+
+def same_file(a, b):
+    return os.stat(a).st_ino == os.stat(b).st_ino
+
+
+def test_diff_manifests():
+    source = {"a": {"hash": "1"}, "b": {"hash": "2"}, "c": {"hash": "3"}}
+    target = {"a": {"hash": "1"}, "b": {"hash": "old"}, "d": {"hash": "4"}}
+    changed, removed = diff_manifests(source, target)
+    assert sorted(changed) == ["b", "c"]
+    assert removed == ["d"]
+
+
+def test_clone_tree_copies_owned_files(tmp_path):
+    template = str(tmp_path / "template")
+    instance = str(tmp_path / "instance")
+    make_template(template)
+
+    cloner = clone_tree(template, instance, mode="hardlink")
+
+    for rel_path in ("DayZServer", "addons/ai.pbo"):
+        src = os.path.join(template, rel_path)
+        assert same_file(src, os.path.join(instance, rel_path))
+    for rel_path in (
+        "serverDZ.cfg",
+        "profiles/server.log",
+        "mpmissions/dayzOffline/storage_1/data.bin",
+    ):
+        src = os.path.join(template, rel_path)
+        dst = os.path.join(instance, rel_path)
+        assert not same_file(src, dst)
+        assert read(src) == read(dst)
+    assert cloner.stats["copy"] == 3
+
+    # editing the instance config leaves the template alone
+    with open(os.path.join(instance, "serverDZ.cfg"), "a") as f:
+        f.write("\nhostname = instance")
+    assert read(os.path.join(template, "serverDZ.cfg")) == "hostname = template"
+
+
+def test_sync_instance_propagates_template_changes(tmp_path):
+    template = str(tmp_path / "template")
+    instance = str(tmp_path / "instance")
+    manifest_path = str(tmp_path / "manifests" / "instance.json")
+    make_template(template)
+    clone_tree(template, instance, mode="hardlink")
+
+    manifest = build_template_manifest(template)
+    assert "serverDZ.cfg" not in manifest
+    assert "profiles/server.log" not in manifest
+    stats = sync_instance(template, manifest, instance, manifest_path, "hardlink")
+    assert stats["changed"] == stats["removed"] == 0
+
+    # the instance writes its own state
+    write(os.path.join(instance, "serverDZ.cfg"), "hostname = instance")
+    write(os.path.join(instance, "profiles", "server.log"), "running")
+    storage = os.path.join("mpmissions", "dayzOffline", "storage_1", "data.bin")
+    write(os.path.join(instance, storage), "world state")
+
+    # the template is updated: one file changed, one added, one removed
+    write(os.path.join(template, "DayZServer"), "server v2!")
+    write(os.path.join(template, "addons", "new.pbo"), "new")
+    os.remove(os.path.join(template, "addons", "old.pbo"))
+    write(os.path.join(template, "serverDZ.cfg"), "hostname = new template")
+    write(os.path.join(template, storage), "")
+
+    manifest = build_template_manifest(template, manifest)
+    stats = sync_instance(template, manifest, instance, manifest_path, "hardlink")
+    assert stats == {"changed": 2, "removed": 1, "bytes": len("server v2!new")}
+
+    assert read(os.path.join(instance, "DayZServer")) == "server v2!"
+    assert same_file(
+        os.path.join(template, "DayZServer"), os.path.join(instance, "DayZServer")
+    )
+    assert read(os.path.join(instance, "addons", "new.pbo")) == "new"
+    assert not os.path.exists(os.path.join(instance, "addons", "old.pbo"))
+
+    # owned files are neither replaced nor removed
+    assert read(os.path.join(instance, "serverDZ.cfg")) == "hostname = instance"
+    assert read(os.path.join(instance, "profiles", "server.log")) == "running"
+    assert read(os.path.join(instance, storage)) == "world state"
+
+    # nothing left to do on the next pass
+    stats = sync_instance(template, manifest, instance, manifest_path, "hardlink")
+    assert stats["changed"] == stats["removed"] == 0
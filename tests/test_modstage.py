@@ -0,0 +1,65 @@
+import os
+
+from modules.modstage import (
+    activate_mod,
+    active_version,
+    rollback_mod,
+    stage_mod,
+    staging_path,
+)
+
+
+def make_workshop_mod(path, content):
+    os.makedirs(os.path.join(path, "addons"), exist_ok=True)
+    with open(os.path.join(path, "addons", "mod.pbo"), "w") as f:
+        f.write(content)
+
+
+def read_live(instance_path):
+    with open(os.path.join(instance_path, "@Mod", "addons", "mod.pbo")) as f:
+        return f.read()
+
+
+def test_staged_version_is_a_real_tree(tmp_path):
+    workshop = str(tmp_path / "workshop" / "123")
+    instance = str(tmp_path / "instance")
+    make_workshop_mod(workshop, "v1")
+
+    version_path = stage_mod(instance, "123", "1", workshop, "symlink")
+    activate_mod(instance, "Mod", "123", "1")
+
+    assert not os.path.islink(version_path)
+    # steamcmd updating the workshop copy doesn't touch the staged version
+    os.remove(os.path.join(workshop, "addons", "mod.pbo"))
+    make_workshop_mod(workshop, "v2")
+    assert read_live(instance) == "v1"
+
+
+def test_symlinked_version_is_restaged(tmp_path):
+    workshop = str(tmp_path / "workshop" / "123")
+    instance = str(tmp_path / "instance")
+    make_workshop_mod(workshop, "v1")
+    os.makedirs(staging_path(instance, "123"))
+    os.symlink(workshop, staging_path(instance, "123", "1"))
+
+    version_path = stage_mod(instance, "123", "1", workshop)
+
+    assert os.path.isdir(version_path) and not os.path.islink(version_path)
+
+
+def test_rollback_switches_to_previous_version(tmp_path):
+    workshop = str(tmp_path / "workshop" / "123")
+    instance = str(tmp_path / "instance")
+    make_workshop_mod(workshop, "v1")
+    stage_mod(instance, "123", "1", workshop)
+    activate_mod(instance, "Mod", "123", "1")
+
+    os.remove(os.path.join(workshop, "addons", "mod.pbo"))
+    make_workshop_mod(workshop, "v2")
+    stage_mod(instance, "123", "2", workshop)
+    activate_mod(instance, "Mod", "123", "2")
+    assert read_live(instance) == "v2"
+
+    assert rollback_mod(instance, "Mod")
+    assert active_version(instance, "Mod") == ("123", "1")
+    assert read_live(instance) == "v1"
@@ -0,0 +1,64 @@
+from modules.players import PlayerRegistry
+
+
+def test_connect_and_disconnect():
+    registry = PlayerRegistry()
+    registry.connect("server1", "Bob", "id-bob", when=100)
+
+    assert registry.is_online("server1", "bob")
+    assert registry.count("server1") == 1
+    assert registry.where("Bob") == registry.where("id-bob") == "server1"
+    assert registry.duration("server1", "Bob", now=160) == 60
+
+    assert registry.disconnect("server1", "BOB", when=190) == 90
+    assert not registry.is_online("server1", "Bob")
+    assert registry.where("id-bob") is None
+    assert registry.disconnect("server1", "Bob") is None
+    assert registry.history["server1"][-1]["until"] == 190
+
+
+def test_battleye_and_adm_lines_share_one_session():
+    registry = PlayerRegistry()
+    # BattlEye reports the name first, the ADM line adds the id later
+    registry.connect("server1", "Bob ", when=100)
+    session = registry.connect("server1", "bob", "id-bob", when=105)
+
+    assert registry.count("server1") == 1
+    assert session["name"] == "Bob"
+    assert session["since"] == 100
+    assert registry.where("id-bob") == "server1"
+
+    # the first id sticks
+    registry.connect("server1", "BOB", "id-other")
+    assert session["id"] == "id-bob"
+
+
+def test_connect_elsewhere_moves_the_player():
+    registry = PlayerRegistry()
+    registry.connect("server1", "Bob", "id-bob", when=100)
+    registry.connect("server2", "Bob", "id-bob", when=200)
+
+    assert not registry.is_online("server1", "Bob")
+    assert registry.where("id-bob") == "server2"
+    assert registry.history["server1"][-1]["until"] == 200
+
+
+def test_reconcile_matches_the_rcon_list():
+    registry = PlayerRegistry()
+    registry.connect("server1", "Bob")
+    registry.connect("server1", "Alice")
+
+    added, removed = registry.reconcile("server1", ["alice", "Carol"])
+    assert added == ["Carol"]
+    assert removed == ["Bob"]
+    assert sorted(s["name"] for s in registry.players("server1")) == [
+        "Alice",
+        "Carol",
+    ]
+
+    # nothing changes once the lists agree, whatever the casing
+    assert registry.reconcile("server1", ["ALICE", "carol"]) == ([], [])
+
+    registry.clear("server1")
+    assert registry.count("server1") == 0
+    assert registry.where("Alice") is None
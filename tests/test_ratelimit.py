@@ -0,0 +1,43 @@
+from modules.ratelimit import TokenBucketLimiter, line_signature
+
+
+def test_line_signature_groups_lines_differing_in_numbers():
+    a = line_signature("12:00:01 Player 1234 hit by Infected at <100.5, 200.1>")
+    b = line_signature("12:00:02 Player 9876 hit by Infected at <3.0, 4.25>")
+    assert a == b
+    assert line_signature("Player connected") != line_signature("Player left")
+    assert len(line_signature("x" * 500)) == 80
+
+
+def test_burst_then_suppress():
+    limiter = TokenBucketLimiter(rate=1.0, burst=3)
+    results = [limiter.allow("key", now=0) for _ in range(5)]
+    assert results == [(True, 0)] * 3 + [(False, 0)] * 2
+
+    # other keys have their own bucket
+    assert limiter.allow("other", now=0) == (True, 0)
+
+
+def test_refill_reports_suppressed_count():
+    limiter = TokenBucketLimiter(rate=2.0, burst=2)
+    for _ in range(6):
+        limiter.allow("key", now=0)
+
+    # half a second buys one token, which carries the dropped count
+    assert limiter.allow("key", now=0.5) == (True, 4)
+    assert limiter.allow("key", now=0.5) == (False, 0)
+
+    # refill is capped at the burst size
+    results = [limiter.allow("key", now=100) for _ in range(3)]
+    assert results == [(True, 1), (True, 0), (False, 0)]
+
+
+def test_summaries_report_long_storms_once():
+    limiter = TokenBucketLimiter(rate=0.0, burst=1, summary_interval=30)
+    limiter.allow("key", now=0)
+    for i in range(10):
+        limiter.allow("key", now=i)
+
+    assert limiter.summaries(now=10) == []
+    assert limiter.summaries(now=30) == [("key", 10)]
+    assert limiter.summaries(now=31) == []
@@ -0,0 +1,257 @@
+import time
+import zlib
+import struct
+import asyncio
+
+from modules import rconclient
+from modules.events import new_event_ring
+from modules.fakebeserver import start_fake_server
+from modules.players import registry
+from modules.rconclient import (
+    BE_COMMAND,
+    BE_LOGIN,
+    RCONClient,
+    RCONSessionPool,
+    build_packet,
+    fan_out,
+    kick_all_and_restart,
+    kick_players,
+    parse_packet,
+    parse_players,
+)
+from modules.serverstate import ServerState
+
+
+async def connected_client(port, **kwargs):
+    client = RCONClient(port, "test", **kwargs)
+    assert await client.connect()
+    return client
+
+
+def test_packet_framing():
+    packet = build_packet(BE_COMMAND, b"\x05players")
+
+    assert packet[:2] == b"BE"
+    assert packet[6:] == b"\xff\x01\x05players"
+    assert struct.unpack("<I", packet[2:6])[0] == zlib.crc32(b"\xff\x01\x05players")
+    assert parse_packet(packet) == (BE_COMMAND, b"\x05players")
+    assert parse_packet(build_packet(BE_LOGIN)) == (BE_LOGIN, b"")
+
+
+def test_malformed_packets_are_rejected():
+    packet = build_packet(BE_COMMAND, b"\x05players")
+
+    corrupted = packet[:-1] + b"X"
+    assert parse_packet(corrupted) is None
+    assert parse_packet(b"XE" + packet[2:]) is None
+    assert parse_packet(packet[:6] + b"\x00" + packet[7:]) is None
+    assert parse_packet(packet[:7]) is None
+
+
+def test_login_failure():
+    async def run():
+        transport, _ = await start_fake_server(port=23472, password="secret")
+        client = RCONClient(23472, "wrong", timeout=0.5)
+        try:
+            return await client.connect(), client
+        finally:
+            transport.close()
+
+    connected, client = asyncio.run(run())
+
+    assert connected is False
+    assert client.transport is None
+    assert not client.authenticated
+
+
+def test_multi_packet_response_is_reassembled():
+    names = [f"Survivor{i}" for i in range(40)]
+
+    async def run():
+        transport, _ = await start_fake_server(
+            port=23473, players=names, max_payload=64
+        )
+        client = await connected_client(23473)
+        try:
+            return await client.send_command("players")
+        finally:
+            client.close()
+            transport.close()
+
+    response = asyncio.run(run())
+
+    assert len(response.encode("utf-8")) > 64
+    assert response.endswith("(40 players in total)")
+    assert [name for _, name in parse_players(response)] == names
+
+
+def test_pipelined_commands_answered_out_of_order():
+    async def run():
+        transport, server = await start_fake_server(
+            port=23474,
+            players=["Alice", "Bob"],
+            latency=lambda command: 0.5 if command == "players" else 0.05,
+        )
+        client = await connected_client(23474, timeout=2.0)
+        finished = []
+
+        async def send(command):
+            response = await client.send_command(command)
+            finished.append(command)
+            return response
+
+        try:
+            started = time.monotonic()
+            responses = await asyncio.gather(
+                send("players"), send("say -1 one"), send("say -1 two")
+            )
+            return responses, finished, time.monotonic() - started, server
+        finally:
+            client.close()
+            transport.close()
+
+    responses, finished, seconds, server = asyncio.run(run())
+
+    # replies are matched by sequence number, not arrival order
+    assert finished[-1] == "players"
+    assert [name for _, name in parse_players(responses[0])] == ["Alice", "Bob"]
+    assert responses[1:] == ["", ""]
+    # sent together, not one after the other
+    assert seconds < 1.0
+    assert sorted(server.commands) == ["players", "say -1 one", "say -1 two"]
+
+
+def test_unanswered_command_times_out_without_dropping_session():
+    async def run():
+        transport, server = await start_fake_server(
+            port=23475, drop=lambda seq, command: command == "say -1 lost"
+        )
+        pool = RCONSessionPool(timeout=0.2, retries=1)
+        pool.register("test", 23475, "test")
+        try:
+            client = await pool.get("test")
+            lost = await pool.command("test", "say -1 lost")
+            after = await pool.command("test", "say -1 after")
+            return client, await pool.get("test"), lost, after, server
+        finally:
+            pool.close()
+            transport.close()
+
+    client, same, lost, after, server = asyncio.run(run())
+
+    assert lost is None
+    assert after == ""
+    assert same is client
+    # never re-sent on a new session
+    assert "say -1 lost" not in server.commands
+
+
+def test_kick_players_confirms_and_reports_stubborn_players(monkeypatch):
+    names = [f"Survivor{i}" for i in range(5)]
+
+    async def run():
+        transport, server = await start_fake_server(
+            port=23476,
+            players=names,
+            drop=lambda seq, command: command.startswith("kick 2 "),
+        )
+        pool = RCONSessionPool(timeout=0.2, retries=0)
+        pool.register("kicktest", 23476, "test")
+        monkeypatch.setattr(rconclient, "sessions", pool)
+        try:
+            result = await kick_players(
+                "kicktest",
+                list(enumerate(names)),
+                reason="bye",
+                rate=0,
+                confirm_timeout=1.0,
+                confirm_interval=0.2,
+            )
+            online = [player["name"] for player in registry.players("kicktest")]
+            return result, online, server
+        finally:
+            registry.clear("kicktest")
+            pool.close()
+            transport.close()
+
+    result, online, server = asyncio.run(run())
+
+    assert result["remaining"] == ["Survivor2"]
+    assert sorted(result["kicked"]) == [n for n in names if n != "Survivor2"]
+    assert server.players == [None, None, "Survivor2", None, None]
+    assert 1.0 <= result["seconds"] < 3.0
+    # the confirmation poll also reconciled the registry
+    assert online == ["Survivor2"]
+
+
+def test_fan_out_reports_dead_instance(monkeypatch):
+    async def run():
+        transport, _ = await start_fake_server(port=23477)
+        pool = RCONSessionPool(timeout=0.3, retries=0)
+        pool.register("alive", 23477, "test")
+        # nothing listens here
+        pool.register("dead", 23478, "test")
+        monkeypatch.setattr(rconclient, "sessions", pool)
+        try:
+            started = time.monotonic()
+            results = await fan_out("say -1 hello", timeout=2.0)
+            return results, time.monotonic() - started
+        finally:
+            pool.close()
+            transport.close()
+
+    results, seconds = asyncio.run(run())
+
+    assert results["alive"]["ok"]
+    assert results["alive"]["response"] == ""
+    assert not results["dead"]["ok"]
+    assert results["dead"]["response"] is None
+    assert results["dead"]["error"]
+    assert seconds < 2.0
+
+
+def test_kick_all_and_restart_survives_unanswered_kick(monkeypatch):
+    # kick 3 is lost the first time, every reply takes longer than the
+    # client timeout, the restart still has to go through
+    dropped = set()
+
+    def drop(seq, command):
+        if command.startswith("kick 3 ") and (not dropped or seq in dropped):
+            dropped.add(seq)
+            return True
+        return False
+
+    async def run():
+        transport, server = await start_fake_server(
+            port=23471,
+            players=[f"Survivor{i}" for i in range(5)],
+            latency=0.8,
+            drop=drop,
+        )
+        pool = RCONSessionPool(timeout=0.3)
+        monkeypatch.setattr(rconclient, "sessions", pool)
+        server_states = {
+            "test": {"state": ServerState.RUNNING, "events": new_event_ring()}
+        }
+        try:
+            ok = await kick_all_and_restart(
+                server_states,
+                "test",
+                rcon_port=23471,
+                rcon_password="test",
+                restart_delay=0,
+                kick_rate=5,
+            )
+        finally:
+            pool.close()
+            transport.close()
+        return ok, server, server_states
+
+    ok, server, server_states = asyncio.run(run())
+
+    assert ok
+    assert dropped
+    assert server.players == [None] * 5
+    assert server.shutdown
+    assert server.commands[-1] == "#shutdown"
+    assert server_states["test"]["state"] == ServerState.STOPPED
@@ -0,0 +1,110 @@
+import os
+import asyncio
+
+from modules.logclassifier import LineClassifier
+from modules.servers import open_output_file, rotate_output, tail_output
+
+
+async def follow(path, until, **kwargs):
+    """Run tail_output until until(lines) is true, returns every line seen"""
+    lines = []
+    task = asyncio.create_task(tail_output(path, lines.extend, interval=0.01, **kwargs))
+    try:
+        for _ in range(500):
+            await asyncio.sleep(0.01)
+            if until(lines):
+                break
+    finally:
+        task.cancel()
+    return lines
+
+
+def test_backlog_skip_keeps_state_lines(tmp_path):
+    noise = [f"12:00:00.000 loading thing {i}" for i in range(20000)]
+    backlog = noise[:10000] + ["Waiting for connection..."] + noise[10000:]
+    fd, path = open_output_file(str(tmp_path))
+    os.write(fd, ("\n".join(backlog) + "\n").encode())
+
+    lines = asyncio.run(
+        follow(
+            path,
+            lambda lines: lines,
+            max_read=4096,
+            keep=LineClassifier().prefilter,
+        )
+    )
+    os.close(fd)
+
+    assert "Waiting for connection..." in lines
+    # the rest of the backlog was skipped, only the newest lines sampled
+    assert len(lines) < 200
+    assert lines[-1] == noise[-1]
+    assert all(line in backlog for line in lines)
+
+
+def test_backlog_scan_is_capped(tmp_path, caplog):
+    noise = [f"12:00:00.000 loading thing {i}" for i in range(20000)]
+    backlog = ["Waiting for connection..."] + noise[:10000]
+    backlog += ["Player Bob connected"] + noise[10000:]
+    fd, path = open_output_file(str(tmp_path))
+    os.write(fd, ("\n".join(backlog) + "\n").encode())
+
+    lines = asyncio.run(
+        follow(
+            path,
+            lambda lines: lines,
+            max_read=4096,
+            max_scan=400 * 1024,
+            keep=LineClassifier().prefilter,
+        )
+    )
+    os.close(fd)
+
+    # only the newest max_scan bytes of the backlog are searched
+    assert "Player Bob connected" in lines
+    assert "Waiting for connection..." not in lines
+    assert any("skipped" in record.getMessage() for record in caplog.records)
+
+
+def test_rotation_keeps_every_line(tmp_path):
+    fd, path = open_output_file(str(tmp_path))
+    written = [f"line {i}" for i in range(3000)]
+
+    async def run():
+        async def write():
+            for start in range(0, len(written), 100):
+                batch = written[start : start + 100]
+                os.write(fd, ("\n".join(batch) + "\n").encode())
+                await asyncio.sleep(0.005)
+
+        writer = asyncio.create_task(write())
+        lines = await follow(
+            path,
+            lambda lines: len(lines) >= len(written),
+            max_bytes=4096,
+            backups=2,
+        )
+        await writer
+        return lines
+
+    lines = asyncio.run(run())
+    os.close(fd)
+
+    assert lines == written
+    assert os.path.exists(f"{path}.1")
+    assert os.path.exists(f"{path}.2")
+    assert not os.path.exists(f"{path}.3")
+    assert os.path.getsize(path) < 8192
+
+
+def test_rotate_output_copies_then_truncates(tmp_path):
+    fd, path = open_output_file(str(tmp_path))
+    os.write(fd, b"first\n")
+    assert rotate_output(path) == 6
+    os.write(fd, b"second\n")
+    os.close(fd)
+
+    with open(path, "rb") as f:
+        assert f.read() == b"second\n"
+    with open(f"{path}.1", "rb") as f:
+        assert f.read() == b"first\n"
@@ -0,0 +1,142 @@
+import os
+import subprocess
+
+from modules import steamcmd
+from modules.vdf import dump_vdf, load_acf, parse_vdf, read_workshop_items, write_acf
+
+
+APP_INFO_PRINT = """Redirecting stderr to '/home/dayz/Steam/logs/stderr.txt'
+Loading Steam API...OK
+Logging in user 'dayz' to Steam Public...OK
+Waiting for user info...OK
+AppID : 223350, change number : 28104550/0, last change : Tue Oct  6 12:00:00 2026
+"223350"
+{
+\t"common"
+\t{
+\t\t"name"\t\t"DayZ Server"
+\t\t"type"\t\t"Tool"
+\t}
+\t"depots"
+\t{
+\t\t"branches"
+\t\t{
+\t\t\t"public"
+\t\t\t{
+\t\t\t\t"buildid"\t\t"20345678"
+\t\t\t\t"timeupdated"\t\t"1791288000"
+\t\t\t}
+\t\t\t"experimental"
+\t\t\t{
+\t\t\t\t"buildid"\t\t"20399999"
+\t\t\t\t"pwdrequired"\t\t"1"
+\t\t\t}
+\t\t}
+\t}
+}
+Unloading Steam API...OK
+"""
+
+
+def test_round_trip():
+    data = {
+        "AppWorkshop": {
+            "appid": "221100",
+            "WorkshopItemsInstalled": {
+                "1559212036": {"size": "1024", "manifest": "123"},
+                "1564026768": {},
+            },
+        }
+    }
+    assert parse_vdf(dump_vdf(data)) == data
+
+
+def test_escaped_strings():
+    data = {"key": 'a "quoted" C:\\path\\ value'}
+    text = dump_vdf(data)
+    assert '\\"quoted\\"' in text
+    assert parse_vdf(text) == data
+    parsed = parse_vdf('"tab"\t"a\\tb"  "line" "a\\nb"')
+    assert parsed == {"tab": "a\tb", "line": "a\nb"}
+
+
+def test_nested_blocks_comments_and_bare_words():
+    text = """
+    // written by steam
+    "AppState"
+    {
+        appid 223350
+        "UserConfig" { "language" "english" }
+        "MountedConfig"
+        {
+        }
+    }
+    """
+    assert parse_vdf(text) == {
+        "AppState": {
+            "appid": "223350",
+            "UserConfig": {"language": "english"},
+            "MountedConfig": {},
+        }
+    }
+
+
+def test_latest_build_from_app_info_print(monkeypatch):
+    def run(args, **kwargs):
+        return subprocess.CompletedProcess(args, 0, stdout=APP_INFO_PRINT)
+
+    monkeypatch.setattr(steamcmd.subprocess, "run", run)
+    assert steamcmd.get_latest_build("/tmp", "dayz", "secret") == "20345678"
+
+
+def test_load_acf_sees_rewrite(tmp_path):
+    steamapps = tmp_path / "steamapps"
+    os.makedirs(steamapps / "workshop")
+    acf_path = str(steamapps / "workshop" / "appworkshop_221100.acf")
+
+    def write(manifest, size):
+        write_acf(
+            acf_path,
+            {
+                "AppWorkshop": {
+                    "WorkshopItemsInstalled": {
+                        "1559212036": {"manifest": manifest, "size": size}
+                    }
+                }
+            },
+        )
+
+    write("1", "10")
+    assert read_workshop_items(str(steamapps))["1559212036"]["manifest"] == "1"
+    # unchanged files come from the cache
+    assert load_acf(acf_path) is load_acf(acf_path)
+
+    # same size, the new mtime alone invalidates the cached parse
+    stat = os.stat(acf_path)
+    write("2", "10")
+    os.utime(acf_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+    assert read_workshop_items(str(steamapps))["1559212036"]["manifest"] == "2"
+
+    os.remove(acf_path)
+    assert load_acf(acf_path) == {}
+
+
+def test_write_acf_is_atomic(tmp_path, monkeypatch):
+    acf_path = str(tmp_path / "appmanifest_223350.acf")
+    write_acf(acf_path, {"AppState": {"buildid": "1"}})
+
+    # a write that dies halfway leaves the old file in place
+    def fail(data, depth=0):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("modules.vdf.dump_vdf", fail)
+    try:
+        write_acf(acf_path, {"AppState": {"buildid": "2"}})
+    except OSError:
+        pass
+    assert load_acf(acf_path) == {"AppState": {"buildid": "1"}}
+
+    monkeypatch.undo()
+    write_acf(acf_path, {"AppState": {"buildid": "2"}})
+    assert load_acf(acf_path) == {"AppState": {"buildid": "2"}}
+    assert os.listdir(tmp_path) == ["appmanifest_223350.acf"]